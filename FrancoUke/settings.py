@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -61,12 +62,14 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'core.middleware.request_metrics.RequestMetricsMiddleware',
     'core.middleware.path_based_site.PathBasedSiteMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.user_context.UserContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
   #  'g_users.middleware.CuberSessionMiddleware',
@@ -235,6 +238,62 @@ TAGGIT_CASE_INSENSITIVE = True
 ENABLE_STRUMSPHERE = True
 
 
+# ============================================================================
+# SONG IMPORTS
+# ============================================================================
+
+# Username credited for the songs imported by the import_songs.py shell
+# scripts (`manage.py import_chordpro` takes --contributor instead)
+SONG_IMPORT_CONTRIBUTOR = os.environ.get("SONG_IMPORT_CONTRIBUTOR", "")
+
+
+# ============================================================================
+# PDF RENDER QUEUE (songbook/utils/render_queue.py)
+# ============================================================================
+
+# Renders running at once, across all `manage.py run_render_jobs` workers
+PDF_RENDER_CONCURRENCY = 2
+
+# Finished jobs (and their PDFs) are deleted after this many hours
+PDF_RENDER_JOB_TTL_HOURS = 24
+
+# A worker renews its running job's lease every third of this; a job whose
+# lease runs out (dead worker) is queued again
+PDF_RENDER_JOB_LEASE_SECONDS = 60
+
+# Cache pre-warming (songbook/utils/pdf_cache.py): seconds a pre-warm job
+# waits after a song save, and pre-warm jobs started per minute at most
+PDF_PREWARM_DELAY = 30
+PDF_PREWARM_PER_MINUTE = 20
+
+
+# ============================================================================
+# LOGGING
+# ============================================================================
+
+# Per-request timings, query counts and spans (songbook/utils/metrics.py) are
+# logged at DEBUG on "songbook.metrics": shown while DEBUG is on, except
+# under `manage.py test`. SONGBOOK_METRICS_LOG_LEVEL (environment) overrides
+# that. Set "songbook" to DEBUG to see the chord resolution / teleprompter
+# details.
+RUNNING_TESTS = sys.argv[1:2] == ["test"]
+SONGBOOK_METRICS_LOG_LEVEL = os.environ.get(
+    "SONGBOOK_METRICS_LOG_LEVEL", "DEBUG" if DEBUG and not RUNNING_TESTS else "INFO"
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "songbook": {"handlers": ["console"], "level": "INFO"},
+        "songbook.metrics": {"level": SONGBOOK_METRICS_LOG_LEVEL},
+    },
+}
+
+
 # ============================================================================
 # DEFAULT PRIMARY KEY FIELD TYPE
 # ============================================================================
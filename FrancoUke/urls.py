@@ -3,7 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
-from core.views import landing_page 
+from core.views import landing_page, metrics
 from public import views as public_views
 
 urlpatterns = [
@@ -15,6 +15,9 @@ urlpatterns = [
     # Root landing page
     path('', landing_page, name='landing'),
 
+    # Staff: hot-path timings and query counts (songbook/utils/metrics.py)
+    path("metrics/", metrics, name="metrics"),
+
     # Board (Trello-style UI)
     path('board/', include('board.urls')),
 
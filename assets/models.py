@@ -13,7 +13,6 @@ from django.db import models, transaction
 from django.utils import timezone
 from django.utils.html import mark_safe
 from django.core.files.storage import default_storage
-from PIL import Image
 
 # Helper for upload path
 def asset_upload_to(instance, filename):
@@ -108,6 +107,8 @@ class Asset(models.Model):
         return t or ''
 
     def _generate_image_thumbnail(self, pil_img, size=(400, 400)):
+        from PIL import Image
+
         pil_img.thumbnail(size, Image.LANCZOS)
         buf = BytesIO()
         pil_img.save(buf, format='JPEG', quality=85)
@@ -167,6 +168,8 @@ class Asset(models.Model):
                 # If image — thumbnail via PIL
                 if self.type == self.TYPE_IMAGE or (mime and mime.startswith('image')):
                     try:
+                        from PIL import Image  # Pillow: loaded only for image uploads
+
                         f.seek(0)
                         img = Image.open(f)
                         img.load()
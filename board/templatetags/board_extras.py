@@ -1,5 +1,7 @@
 from django import template
 
+from users.context import get_user_context
+
 register = template.Library()
 
 @register.filter
@@ -17,4 +19,4 @@ def cover_or_first(photos):
 
 @register.filter
 def has_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
+    return get_user_context(user).in_group(group_name)
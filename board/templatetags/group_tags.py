@@ -1,8 +1,10 @@
 from django import template
 
+from users.context import get_user_context
+
 register = template.Library()
 
 @register.filter
 def has_group(user, group_name):
     """Return True if user is in the given group."""
-    return user.groups.filter(name=group_name).exists()
+    return get_user_context(user).in_group(group_name)
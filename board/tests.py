@@ -1,3 +1,47 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from songbook.models import Song
+
+from .models import Event, RehearsalDetails, SongRehearsalNote
+from .utils.song_notes import save_song_notes
+
+
+class SongNotesTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("leader", email="leader@example.com")
+        self.songs = [
+            Song.objects.create(songTitle=f"Song {n}", songChordPro="[C]la", contributor=self.user,
+                                site_name="FrancoUke")
+            for n in range(3)
+        ]
+        event = Event.objects.create(title="Rehearsal", event_type="rehearsal")
+        self.rehearsal = RehearsalDetails.objects.create(event=event)
+
+    def notes(self):
+        return dict(SongRehearsalNote.objects.filter(rehearsal=self.rehearsal).values_list("song_id", "notes"))
+
+    def test_notes_are_diffed(self):
+        first, second, third = (song.pk for song in self.songs)
+        counts = save_song_notes(self.rehearsal, {first: "Slow intro", str(second): "Watch the bridge "}, self.user)
+        self.assertEqual(counts, {"created": 2, "updated": 0, "deleted": 0})
+        kept = SongRehearsalNote.objects.get(song_id=second)
+
+        counts = save_song_notes(
+            self.rehearsal, {first: "Slow intro, then faster", second: "Watch the bridge", third: "  "}, self.user
+        )
+        self.assertEqual(counts, {"created": 0, "updated": 1, "deleted": 0})
+        self.assertEqual(SongRehearsalNote.objects.get(song_id=second).updated_at, kept.updated_at)
+
+        counts = save_song_notes(self.rehearsal, {second: "", third: "New"}, self.user)
+        self.assertEqual(counts, {"created": 1, "updated": 0, "deleted": 2})
+        self.assertEqual(self.notes(), {third: "New"})
+
+    def test_duplicate_notes_are_merged(self):
+        song = self.songs[0]
+        for text in ("One", "Two"):
+            SongRehearsalNote.objects.create(rehearsal=self.rehearsal, song=song, notes=text)
+
+        counts = save_song_notes(self.rehearsal, {song.pk: "Two"}, self.user)
+        self.assertEqual(counts, {"created": 0, "updated": 1, "deleted": 1})
+        self.assertEqual(self.notes(), {song.pk: "Two"})
@@ -0,0 +1,50 @@
+# board/utils/song_notes.py
+from django.db import transaction
+from django.utils import timezone
+
+from board.models import SongRehearsalNote
+
+
+def save_song_notes(rehearsal, notes_by_song, user):
+    """
+    Make the rehearsal's SongRehearsalNotes match `notes_by_song` ({song_id: text}).
+
+    Notes are updated in place when their text changed, created for new songs
+    and deleted for songs no longer listed (or left empty), in one transaction.
+    Returns {"created", "updated", "deleted"} counts.
+    """
+    wanted = {int(song_id): text.strip() for song_id, text in notes_by_song.items() if text and text.strip()}
+
+    with transaction.atomic():
+        current = {}
+        duplicates = []
+        for note in SongRehearsalNote.objects.select_for_update().filter(rehearsal=rehearsal).order_by("pk"):
+            if note.song_id in current:
+                duplicates.append(note.pk)
+            else:
+                current[note.song_id] = note
+
+        now = timezone.now()
+        changed = []
+        for song_id, note in current.items():
+            text = wanted.get(song_id)
+            if text is not None and note.notes != text:
+                note.notes = text
+                note.updated_at = now  # auto_now isn't applied by bulk_update
+                changed.append(note)
+
+        removed = duplicates + [note.pk for song_id, note in current.items() if song_id not in wanted]
+        new_notes = [
+            SongRehearsalNote(rehearsal=rehearsal, song_id=song_id, notes=text, created_by=user)
+            for song_id, text in wanted.items()
+            if song_id not in current
+        ]
+
+        if removed:
+            SongRehearsalNote.objects.filter(pk__in=removed).delete()
+        if changed:
+            SongRehearsalNote.objects.bulk_update(changed, ["notes", "updated_at"])
+        if new_notes:
+            SongRehearsalNote.objects.bulk_create(new_notes)
+
+    return {"created": len(new_notes), "updated": len(changed), "deleted": len(removed)}
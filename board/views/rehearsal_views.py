@@ -6,11 +6,13 @@ from django.contrib import messages  # ✅ Add this
 
 from board.forms_rehearsal import RehearsalDetailsForm, SongRehearsalNote
 from songbook.models import Song
+from users.context import get_user_context
+from board.utils.song_notes import save_song_notes
 
 
 # Optional helper: restrict to leaders only
 def is_leader(user):
-    return user.groups.filter(name="Leaders").exists()
+    return get_user_context(user).is_leader
 
 
 @login_required
@@ -71,23 +73,24 @@ def edit_song_rehearsal_notes(request, event_id):
     existing_notes = SongNote.objects.filter(rehearsal=rehearsal_details).select_related("song")
 
     if request.method == "POST":
-        # Clear existing notes and rebuild from POST
-        SongNote.objects.filter(rehearsal=rehearsal_details).delete()
-        for key, value in request.POST.items():
-            if key.startswith("notes_") and value.strip():
-                song_id = key.split("_")[1]
-                SongNote.objects.create(
-                    rehearsal=rehearsal_details,
-                    song_id=song_id,
-                    notes=value.strip(),
-                    created_by=request.user
-                )
+        # Only the notes that changed are written, in one transaction
+        submitted = {
+            key.split("_")[1]: value
+            for key, value in request.POST.items()
+            if key.startswith("notes_") and key.split("_")[1].isdigit()
+        }
+        existing_songs = set(Song.objects.filter(pk__in=submitted).values_list("pk", flat=True))
+        save_song_notes(
+            rehearsal_details,
+            {song_id: text for song_id, text in submitted.items() if int(song_id) in existing_songs},
+            request.user,
+        )
         messages.success(request, "🎶 Rehearsal song notes updated.")
         return redirect("board:full_board")
 
-    songs = Song.objects.all().order_by("songTitle")
+    # The song library is paged in from setlists:ajax_song_search
     return render(
         request,
         "board/edit_song_rehearsal_notes.html",
-        {"event": event, "songs": songs, "notes": existing_notes},
+        {"event": event, "notes": existing_notes},
     )
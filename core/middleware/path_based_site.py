@@ -1,15 +1,12 @@
 # FrancoUke/core/middleware/path_based_site.py
 
 from django.utils.deprecation import MiddlewareMixin
-from django.contrib.sites.models import Site
+
+from core.sites import get_site_for_path
+
 
 class PathBasedSiteMiddleware(MiddlewareMixin):
     def process_request(self, request):
-        # Get the first segment of the path (e.g. 'FrancoUke' or 'StrumSphere')
-        path_root = request.path.strip("/").split("/")[0]
-
-        try:
-            # Match site based on name (case-insensitive)
-            request.site = Site.objects.get(name__iexact=path_root)
-        except Site.DoesNotExist:
-            request.site = Site.objects.get(pk=1)  # fallback to default
+        # Match the first segment of the path (e.g. 'FrancoUke' or 'StrumSphere')
+        # against the site names, falling back to the default site
+        request.site = get_site_for_path(request.path)
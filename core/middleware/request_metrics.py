@@ -0,0 +1,37 @@
+# FrancoUke/core/middleware/request_metrics.py
+
+import logging
+import time
+
+from songbook.utils import metrics
+
+logger = logging.getLogger("songbook.metrics")
+
+
+class RequestMetricsMiddleware:
+    """Per-request duration, query count and database time (songbook/utils/metrics.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with metrics.track_request() as stats:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+        metrics.inc("songbook_requests_total", view=view, status=f"{response.status_code // 100}xx")
+        metrics.observe("songbook_request_seconds", elapsed, view=view)
+        metrics.observe("songbook_request_queries", stats.queries, buckets=metrics.QUERY_BUCKETS, view=view)
+        metrics.observe("songbook_request_db_seconds", stats.db_seconds, view=view)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            spans = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in sorted(stats.spans.items()))
+            logger.debug(
+                "%s %s -> %s in %.1f ms, %d queries (%.1f ms db)%s",
+                request.method, request.path, response.status_code, elapsed * 1000,
+                stats.queries, stats.db_seconds * 1000, f"; {spans}" if spans else "",
+            )
+        return response
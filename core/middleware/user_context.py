@@ -0,0 +1,13 @@
+# FrancoUke/core/middleware/user_context.py
+
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from users.context import get_user_context
+
+
+class UserContextMiddleware(MiddlewareMixin):
+    """Attach request.user_context (see users/context.py); nothing is queried until it's used."""
+
+    def process_request(self, request):
+        request.user_context = SimpleLazyObject(lambda: get_user_context(request))
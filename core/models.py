@@ -1,3 +1,13 @@
 from django.db import models
+from django.contrib.sites.models import Site
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.sites import clear_site_registry
 
 # Create your models here.
+
+
+@receiver([post_save, post_delete], sender=Site)
+def refresh_site_registry(sender, **kwargs):
+    clear_site_registry()
@@ -0,0 +1,49 @@
+# FrancoUke/core/sites.py
+"""
+In-memory registry of Site rows, used by PathBasedSiteMiddleware.
+
+All sites are loaded on first use and the first path segment is resolved with
+a dict lookup, so requests don't query the sites table. The registry is
+dropped when a Site is saved or deleted (receivers in core/models.py) and
+reloads on the next lookup; other server processes pick up the change when
+they restart.
+"""
+import threading
+
+from django.contrib.sites.models import Site
+
+DEFAULT_SITE_ID = 1
+
+_lock = threading.Lock()
+_registry = None  # (sites by lowercase name, default site)
+
+
+def _load():
+    global _registry
+    with _lock:
+        if _registry is None:
+            sites = list(Site.objects.all())
+            by_name = {site.name.lower(): site for site in sites}
+            default = next((site for site in sites if site.pk == DEFAULT_SITE_ID), None)
+            _registry = (by_name, default)
+        return _registry
+
+
+def clear_site_registry():
+    global _registry
+    with _lock:
+        _registry = None
+
+
+def get_site_by_name(name):
+    """The Site named `name` (case-insensitive), else the default site."""
+    by_name, default = _registry or _load()
+    site = by_name.get((name or "").lower(), default)
+    if site is None:
+        raise Site.DoesNotExist(f"No site named '{name}' and no default site (pk={DEFAULT_SITE_ID})")
+    return site
+
+
+def get_site_for_path(path):
+    """Site matching the first path segment (e.g. '/FrancoUke/...')."""
+    return get_site_by_name(path.strip("/").split("/")[0])
@@ -1,3 +1,39 @@
+from django.contrib.sites.models import Site
 from django.test import TestCase
 
-# Create your tests here.
+from core import sites
+from core.sites import DEFAULT_SITE_ID, clear_site_registry, get_site_for_path
+
+
+class SiteRegistryTests(TestCase):
+    def setUp(self):
+        clear_site_registry()
+        self.addCleanup(clear_site_registry)
+        self.default = Site.objects.get(pk=DEFAULT_SITE_ID)
+        self.site = Site.objects.create(domain="francouke.example.com", name="FrancoUke")
+
+    def test_path_lookup(self):
+        self.assertEqual(get_site_for_path("/FrancoUke/songs/"), self.site)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_site_for_path("/francouke/songs/"), self.site)
+            self.assertEqual(get_site_for_path("FRANCOUKE"), self.site)
+            self.assertEqual(get_site_for_path("/unknown/songs/"), self.default)
+            self.assertEqual(get_site_for_path("/"), self.default)
+
+    def test_saving_or_deleting_a_site_clears_the_registry(self):
+        get_site_for_path("/FrancoUke/")
+        self.site.name = "StrumSphere"
+        self.site.save()
+        self.assertIsNone(sites._registry)
+        self.assertEqual(get_site_for_path("/strumsphere/"), self.site)
+        self.assertEqual(get_site_for_path("/francouke/"), self.default)
+
+        self.site.delete()
+        self.assertIsNone(sites._registry)
+        self.assertEqual(get_site_for_path("/strumsphere/"), self.default)
+
+    def test_missing_default_site(self):
+        self.default.delete()
+        self.assertEqual(get_site_for_path("/FrancoUke/"), self.site)
+        with self.assertRaises(Site.DoesNotExist):
+            get_site_for_path("/unknown/")
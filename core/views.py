@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from songbook.utils.metrics import render_prometheus
+
 
 def landing_page(request):
     brands = [
@@ -17,3 +21,9 @@ def landing_page(request):
         }
     ]
     return render(request, "core/landing.html", {"brands": brands})
+
+
+@staff_member_required
+def metrics(request):
+    """This process's counters and timing histograms, in the Prometheus text format."""
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,21 +1,9 @@
 #Importing songs from a folder from shell
-#Script provided by chatGPT
-
-#As a temporary measure for testing, you can allow the contributor field to be null by updating your model:
-
-#Change songbook/model.py
-
-contributor = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
-
-
-#After modifying the model, run migrations:
-
-
-#python manage.py makemigrations
-#python manage.py migrate
-
-
-
+#
+#The management commands are usually simpler:
+#    python manage.py import_chordpro <directory>      (*.chordpro, contributor = artist)
+#    python manage.py importfromozbcoz <directory>     (*.pro, title = file name)
+#Add --dry-run to see what would be imported.
 
 
 #STEP 1:  Run following command in terminal
@@ -27,34 +15,26 @@ contributor = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank
 
 
 
-import os
-from songbook.models import Song  # Replace 'yourapp' with the name of your Django app
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import OutputWrapper
+from django.core.management.color import color_style
+from songbook.utils.chordpro_import import ChordProImporter, collect_files, write_report
 
 
 # Define the directory containing your ChordPro files
 chordpro_dir = 'mychordpro'
 
+# User credited for the imported songs: the SONG_IMPORT_CONTRIBUTOR setting
+# (environment variable of the same name), an existing username
+contributor = get_user_model().objects.get(username=settings.SONG_IMPORT_CONTRIBUTOR)
+
+# Parses every .pro file in parallel and writes them in batched transactions
+# (change the extension list if your files are different)
+importer = ChordProImporter("chordpro", contributor=contributor, update_existing=False)
+report = importer.run(collect_files(chordpro_dir, ['.pro']))
 
-# Counter to track imported files
-imported_count = 0
-
-# Loop through all .txt files in the directory if your extension are different change line 27
-for filename in os.listdir(chordpro_dir):
-    if filename.endswith('.pro'):
-        # Construct the full path to the file
-        file_path = os.path.join(chordpro_dir, filename)
-        
-        # Open and read the file content
-        with open(file_path, 'r') as file:
-            chordpro_text = file.read()
-            
-            # Create a new Song instance with the file content
-            song = Song(songChordPro=chordpro_text)
-            song.save()
-            
-            # Increment the counter
-            imported_count += 1
-            print(f"Imported: {filename}")
-
-# Print the total count of imported songs
-print(f"Total songs imported: {imported_count}")
+# Same output as the import commands: one line per song, errors, then the totals
+write_report(report, OutputWrapper(sys.stdout), OutputWrapper(sys.stderr), color_style())
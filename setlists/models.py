@@ -1,7 +1,12 @@
 from django.db import models
+from django.db.models import Max
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.conf import settings
 from songbook.models import Song
 from board.models import Event  # optional, only if you want to attach setlists to events
+from songbook.utils.pdf_cache import prewarm_songs
 
 class SetList(models.Model):
     name = models.CharField(max_length=200)
@@ -43,3 +48,27 @@ class SetListSong(models.Model):
 
     def __str__(self):
         return f"{self.setlist.name} – {self.order}. {self.song.songTitle}"
+
+
+# -------------------------------------------------------------
+# Pre-warm the PDF cache for setlists of upcoming events
+# -------------------------------------------------------------
+def is_upcoming(event):
+    return bool(event) and event.status == "upcoming" and (
+        event.event_date is None or event.event_date >= timezone.localdate()
+    )
+
+
+@receiver(post_save, sender=SetList)
+def prewarm_setlist_songs(sender, instance, raw=False, **kwargs):
+    if raw or not is_upcoming(instance.event):
+        return
+    songs = [item.song for item in instance.songs.select_related("song")]
+    prewarm_songs(songs, delay=0)
+
+
+@receiver(post_save, sender=SetListSong)
+def prewarm_added_setlist_song(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not created or not is_upcoming(instance.setlist.event):
+        return
+    prewarm_songs([instance.song], delay=0)
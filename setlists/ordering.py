@@ -0,0 +1,103 @@
+# setlists/ordering.py
+"""
+Diff-based saving of a setlist's song order.
+
+save_setlist_order() compares the submitted song ids with the current
+SetListSong rows and only deletes the rows that were removed, moves the rows
+whose position changed and inserts the new ones, all in one transaction.
+move_setlist_song() moves a single item (drag-and-drop reorder endpoint).
+
+Because of unique_together = ("setlist", "order"), moved rows are first
+parked above every order in use and then written to their final position:
+two bulk_update statements whatever the number of moves.
+
+Songs added to the setlist of an upcoming event are queued for PDF
+pre-warming (utils/pdf_cache.py), as the SetListSong receiver does for
+single saves.
+"""
+from django.db import transaction
+
+from songbook.models import Song
+from songbook.utils.pdf_cache import prewarm_songs
+
+from .models import SetListSong, is_upcoming
+
+
+def _write_orders(moved, ceiling):
+    """Save the new `order` of the `moved` rows; `ceiling` is >= every order in use."""
+    if not moved:
+        return
+    final = [row.order for row in moved]
+    for offset, row in enumerate(moved, start=1):
+        row.order = ceiling + offset
+    SetListSong.objects.bulk_update(moved, ["order"])
+    for row, order in zip(moved, final):
+        row.order = order
+    SetListSong.objects.bulk_update(moved, ["order"])
+
+
+def save_setlist_order(setlist, song_ids):
+    """
+    Store `song_ids` as the setlist's songs, in that order.
+    Returns {"created", "deleted", "moved"} counts.
+    """
+    song_ids = [int(song_id) for song_id in song_ids]
+
+    with transaction.atomic():
+        rows = list(setlist.songs.select_for_update().order_by("order"))
+        ceiling = max([len(song_ids)] + [row.order for row in rows])
+
+        available = {}
+        for row in rows:
+            available.setdefault(row.song_id, []).append(row)
+
+        new_rows, moved = [], []
+        for position, song_id in enumerate(song_ids, start=1):
+            matches = available.get(song_id)
+            if matches:
+                row = matches.pop(0)
+                if row.order != position:
+                    row.order = position
+                    moved.append(row)
+            else:
+                new_rows.append(SetListSong(setlist=setlist, song_id=song_id, order=position))
+        removed = [row.pk for matches in available.values() for row in matches]
+
+        if removed:
+            SetListSong.objects.filter(pk__in=removed).delete()
+        _write_orders(moved, ceiling)
+        if new_rows:
+            SetListSong.objects.bulk_create(new_rows)
+
+    # bulk_create sends no post_save: pre-warm the added songs here
+    if new_rows and is_upcoming(setlist.event):
+        prewarm_songs(Song.objects.filter(pk__in={row.song_id for row in new_rows}), delay=0)
+
+    return {"created": len(new_rows), "deleted": len(removed), "moved": len(moved)}
+
+
+def move_setlist_song(setlist, item_id, after_id=None):
+    """
+    Move one SetListSong right after `after_id` (another item of the setlist),
+    or to the top when after_id is None; orders are compacted to 1..n.
+    Returns the items in their new order.
+    Raises SetListSong.DoesNotExist for items not in this setlist.
+    """
+    with transaction.atomic():
+        rows = list(setlist.songs.select_for_update().order_by("order"))
+        by_id = {row.pk: row for row in rows}
+        if item_id not in by_id or (after_id is not None and after_id not in by_id) or item_id == after_id:
+            raise SetListSong.DoesNotExist("Item is not in this setlist")
+
+        ordered = [row for row in rows if row.pk != item_id]
+        position = 0 if after_id is None else ordered.index(by_id[after_id]) + 1
+        ordered.insert(position, by_id[item_id])
+
+        ceiling = max(row.order for row in rows)
+        moved = []
+        for index, row in enumerate(ordered, start=1):
+            if row.order != index:
+                row.order = index
+                moved.append(row)
+        _write_orders(moved, ceiling)
+    return ordered
@@ -0,0 +1,185 @@
+// setlists/static/setlists/song_picker.js
+// 🎶 Paged song library shared by the setlist builder and the rehearsal notes editor.
+// Songs come from /setlists/ajax/song-search/ one page at a time; the next page
+// loads when the end of the list scrolls into view, and pages scrolled far out
+// of view are dropped so the list stays small whatever the catalogue size.
+
+function SongPicker(options) {
+  const listEl = options.listEl;
+  const searchInput = options.searchInput;
+  const clearBtn = options.clearBtn;
+  const searchUrl = options.searchUrl || "/setlists/ajax/song-search/";
+  const pageSize = options.pageSize || 50;
+  const maxPages = options.maxPages || 6;
+
+  let query = "";
+  let nextPage = 1;
+  let hasNext = true;
+  let loading = false;
+  let generation = 0;
+  let firstPage = 1;
+
+  const sentinel = document.createElement("li");
+  sentinel.className = "list-group-item text-muted small picker-sentinel";
+  sentinel.textContent = "Loading…";
+
+  function songItem(song) {
+    const li = document.createElement("li");
+    li.className = "list-group-item d-flex justify-content-between align-items-center";
+    li.dataset.page = song.page;
+
+    const info = document.createElement("div");
+    const title = document.createElement("span");
+    title.textContent = song.title;
+    info.appendChild(title);
+    if (song.artist) {
+      const artist = document.createElement("span");
+      artist.className = "text-muted small ms-1";
+      artist.textContent = `– ${song.artist}`;
+      info.appendChild(artist);
+    }
+    if (options.showNotes && song.note_count > 0) {
+      info.appendChild(notesButton(song.id, song.note_count));
+    }
+
+    const add = document.createElement("button");
+    add.type = "button";
+    add.className = "btn btn-sm btn-success add-song";
+    add.dataset.id = song.id;
+    add.dataset.title = song.title;
+    add.textContent = "+ Add";
+    add.addEventListener("click", (e) => {
+      e.preventDefault();
+      options.onAdd(song);
+    });
+
+    li.append(info, add);
+    return li;
+  }
+
+  function load() {
+    if (loading || !hasNext) return;
+    loading = true;
+    const requested = generation;
+    const params = new URLSearchParams({ q: query, page: nextPage, page_size: pageSize });
+
+    fetch(`${searchUrl}?${params}`)
+      .then((res) => res.json())
+      .then((data) => {
+        if (requested !== generation) return;  // a newer search replaced this one
+        sentinel.remove();
+        if (data.page === 1 && data.songs.length === 0) {
+          listEl.innerHTML = `<li class="list-group-item text-muted">No songs found.</li>`;
+        }
+        data.songs.forEach((song) => listEl.appendChild(songItem({ ...song, page: data.page })));
+        hasNext = data.has_next;
+        nextPage = data.page + 1;
+        trimPages();
+        if (hasNext) listEl.appendChild(sentinel);
+      })
+      .catch((err) => console.error("Song search failed:", err))
+      .finally(() => {
+        if (requested === generation) loading = false;
+      });
+  }
+
+  // Keep at most `maxPages` pages in the DOM: drop the oldest ones and
+  // compensate the scroll position so the visible rows don't jump
+  function trimPages() {
+    while (nextPage - firstPage > maxPages) {
+      const oldRows = listEl.querySelectorAll(`li[data-page="${firstPage}"]`);
+      let removedHeight = 0;
+      oldRows.forEach((row) => {
+        removedHeight += row.offsetHeight;
+        row.remove();
+      });
+      listEl.scrollTop -= removedHeight;
+      firstPage += 1;
+    }
+  }
+
+  function reset(newQuery) {
+    generation += 1;
+    query = newQuery;
+    nextPage = 1;
+    firstPage = 1;
+    hasNext = true;
+    loading = false;
+    listEl.innerHTML = "";
+    listEl.scrollTop = 0;
+    listEl.appendChild(sentinel);
+    load();
+  }
+
+  const observer = new IntersectionObserver((entries) => {
+    if (entries.some((entry) => entry.isIntersecting)) load();
+  }, { root: listEl, rootMargin: "200px" });
+  observer.observe(sentinel);
+
+  // Scrolling back up past the dropped pages restarts from the top
+  listEl.addEventListener("scroll", () => {
+    if (firstPage > 1 && listEl.scrollTop === 0) reset(query);
+  });
+
+  let debounceTimer = null;
+  searchInput.addEventListener("keydown", (e) => {
+    if (e.key === "Enter") e.preventDefault();
+  });
+  searchInput.addEventListener("input", () => {
+    clearTimeout(debounceTimer);
+    debounceTimer = setTimeout(() => reset(searchInput.value.trim()), 250);
+  });
+  if (clearBtn) {
+    clearBtn.addEventListener("click", () => {
+      searchInput.value = "";
+      reset("");
+      searchInput.focus();
+    });
+  }
+
+  reset("");
+  return { reset };
+}
+
+
+// 📝 "Notes" button that fetches a song's rehearsal notes the first time it's opened
+function notesButton(songId, count) {
+  const wrapper = document.createElement("span");
+  const btn = document.createElement("button");
+  btn.type = "button";
+  btn.className = "btn btn-sm btn-outline-info ms-2";
+  btn.textContent = count > 1 ? `📝 Notes (${count})` : "📝 Notes";
+
+  const panel = document.createElement("div");
+  panel.className = "song-notes small border rounded p-2 mt-1 bg-light";
+  panel.hidden = true;
+
+  btn.addEventListener("click", (e) => {
+    e.preventDefault();
+    panel.hidden = !panel.hidden;
+    if (panel.hidden || panel.dataset.loaded) return;
+    panel.textContent = "Loading…";
+    fetch(`/setlists/ajax/song-notes/${songId}/`)
+      .then((res) => res.json())
+      .then((data) => {
+        panel.dataset.loaded = "1";
+        panel.innerHTML = "";
+        data.notes.forEach((note) => {
+          const header = document.createElement("div");
+          header.className = "fw-semibold";
+          header.textContent = [note.event, note.date, note.author].filter(Boolean).join(" · ");
+          const body = document.createElement("div");
+          body.className = "mb-2";
+          body.innerHTML = note.html;  // rich text from the rehearsal notes editor
+          panel.append(header, body);
+        });
+        if (!data.notes.length) panel.textContent = "No rehearsal notes.";
+      })
+      .catch(() => {
+        panel.textContent = "Could not load notes.";
+      });
+  });
+
+  wrapper.append(btn, panel);
+  return wrapper;
+}
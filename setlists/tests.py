@@ -1,3 +1,184 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from board.models import Event, RehearsalDetails, SongRehearsalNote
+from songbook.models import RenderJob, Song
+from songbook.utils import render_queue
+
+from . import views
+from .models import SetList, SetListSong
+from .ordering import move_setlist_song, save_setlist_order
+
+
+class SetlistOrderingTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("setlist", email="setlist@example.com")
+        self.songs = [
+            Song.objects.create(songTitle=f"Song {n}", songChordPro="[C]la", contributor=user, site_name="FrancoUke")
+            for n in range(5)
+        ]
+        self.setlist = SetList.objects.create(name="Gig")
+
+    def ids(self, *indexes):
+        return [self.songs[i].pk for i in indexes]
+
+    def stored(self):
+        return list(self.setlist.songs.order_by("order").values_list("song_id", "order"))
+
+    def test_save_writes_only_the_differences(self):
+        save_setlist_order(self.setlist, self.ids(0, 1, 2))
+        unchanged = SetListSong.objects.get(setlist=self.setlist, song=self.songs[0])
+
+        # Swapping rows 2 and 3 goes through orders above the ones in use
+        with self.assertNumQueries(6):  # savepoint, select, 2 parking/final updates, insert, release
+            counts = save_setlist_order(self.setlist, self.ids(0, 2, 1, 3))
+        self.assertEqual(counts, {"created": 1, "deleted": 0, "moved": 2})
+        self.assertEqual(self.stored(), list(zip(self.ids(0, 2, 1, 3), [1, 2, 3, 4])))
+        self.assertEqual(SetListSong.objects.get(setlist=self.setlist, song=self.songs[0]).pk, unchanged.pk)
+
+        counts = save_setlist_order(self.setlist, self.ids(3, 0))
+        self.assertEqual(counts, {"created": 0, "deleted": 2, "moved": 2})
+        self.assertEqual(self.stored(), [(self.songs[3].pk, 1), (self.songs[0].pk, 2)])
+
+    def test_reorder_parks_above_orders_left_by_gaps(self):
+        # Rows with high orders (older edits) must not collide with the parked ones
+        for song, order in zip(self.songs[:3], (1, 5, 6)):
+            SetListSong.objects.create(setlist=self.setlist, song=song, order=order)
+
+        save_setlist_order(self.setlist, self.ids(2, 1, 0))
+        self.assertEqual(self.stored(), list(zip(self.ids(2, 1, 0), [1, 2, 3])))
+
+    def test_move_one_song(self):
+        save_setlist_order(self.setlist, self.ids(0, 1, 2, 3))
+        rows = {row.song_id: row.pk for row in self.setlist.songs.all()}
+
+        move_setlist_song(self.setlist, rows[self.songs[3].pk], after_id=rows[self.songs[0].pk])
+        self.assertEqual([song_id for song_id, _ in self.stored()], self.ids(0, 3, 1, 2))
+        move_setlist_song(self.setlist, rows[self.songs[2].pk])
+        self.assertEqual(self.stored(), list(zip(self.ids(2, 0, 3, 1), [1, 2, 3, 4])))
+
+        with self.assertRaises(SetListSong.DoesNotExist):
+            move_setlist_song(self.setlist, rows[self.songs[1].pk], after_id=rows[self.songs[1].pk])
+
+
+class RehearsalPackTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, True)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = get_user_model().objects.create_user("pack", email="pack@example.com", password="pw")
+        self.setlist = SetList.objects.create(name="Spring Gig", created_by=self.user)
+        songs = [
+            Song.objects.create(songTitle=title, songChordPro=f"{{title: {title}}}\n[C]la [G7]la [Am]la",
+                                contributor=self.user, site_name="FrancoUke")
+            for title in ("First", "Second")
+        ]
+        save_setlist_order(self.setlist, [song.pk for song in songs])
+        RenderJob.objects.all().delete()  # the songs' pre-warm jobs
+        self.client.force_login(self.user)
+
+    def render(self, instruments):
+        response = self.client.get(reverse("setlists:pack", args=[self.setlist.pk]), {"instrument": instruments})
+        self.assertEqual(response.status_code, 202)
+        render_queue.run_job(render_queue.claim_job())
+        job = RenderJob.objects.get()
+        self.assertEqual(job.status, RenderJob.DONE, job.error)
+        return job
+
+    def test_zip_holds_one_pdf_per_instrument(self):
+        import pdfplumber
+
+        job = self.render(["ukulele", "guitar", "nose_flute"])
+        self.assertTrue(job.result.name.endswith(f"setlist_{self.setlist.pk}_pack.zip"))
+        with job.result.open("rb") as handle, zipfile.ZipFile(io.BytesIO(handle.read())) as archive:
+            self.assertEqual(archive.namelist(), ["spring-gig_ukulele.pdf", "spring-gig_guitar.pdf"])
+            pdfs = {name: archive.read(name) for name in archive.namelist()}
+
+        for name, pdf in pdfs.items():
+            with self.subTest(name=name), pdfplumber.open(io.BytesIO(pdf)) as document:
+                self.assertEqual(len(document.pages), 2)  # one page per song
+                self.assertIn("First", document.pages[0].extract_text())
+                self.assertIn("Guitar" if "guitar" in name else "Ukulele", document.metadata["Title"])
+
+    def test_one_instrument_is_a_plain_pdf(self):
+        job = self.render(["mandolin"])
+        self.assertTrue(job.result.name.endswith("_mandolin.pdf"))
+        with job.result.open("rb") as handle:
+            self.assertTrue(handle.read().startswith(b"%PDF"))
+
+
+class SongPickerTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("picker", email="picker@example.com")
+        self.songs = [
+            Song.objects.create(songTitle=f"Song {n}", songChordPro=f"{{title: Song {n}}}\n{{artist: Band}}\n[C]la",
+                                contributor=self.user, site_name="FrancoUke")
+            for n in range(5)
+        ]
+        self.client.force_login(self.user)
+
+    def rehearsal(self, title, event_date):
+        event = Event.objects.create(title=title, event_type="rehearsal", event_date=event_date)
+        return RehearsalDetails.objects.create(event=event)
+
+    def search(self, **params):
+        response = self.client.get(reverse("setlists:ajax_song_search"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages(self):
+        data = self.search(page_size=2)
+        self.assertEqual([song["title"] for song in data["songs"]], ["Song 0", "Song 1"])
+        self.assertEqual((data["page"], data["has_next"]), (1, True))
+        self.assertEqual(data["songs"][0],
+                         {"id": self.songs[0].pk, "title": "Song 0", "artist": "Band", "note_count": 0})
+
+        data = self.search(page_size=2, page=3)
+        self.assertEqual([song["title"] for song in data["songs"]], ["Song 4"])
+        self.assertEqual((data["page"], data["has_next"]), (3, False))
+
+        data = self.search(q="song 3")
+        self.assertEqual([song["title"] for song in data["songs"]], ["Song 3"])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(views, "MAX_SONG_PAGE_SIZE", 3):
+            data = self.search(page_size=1000)
+        self.assertEqual((len(data["songs"]), data["has_next"]), (3, True))
+
+        data = self.search(page_size="lots", page="-2")
+        self.assertEqual((len(data["songs"]), data["page"], data["has_next"]), (5, 1, False))
+
+    def test_note_counts_and_notes_newest_rehearsal_first(self):
+        song = self.songs[1]
+        for title, event_date in (("March", date(2025, 3, 1)), ("May", date(2025, 5, 1)), ("April", date(2025, 4, 1))):
+            SongRehearsalNote.objects.create(rehearsal=self.rehearsal(title, event_date), song=song,
+                                             notes=f"<p>{title}</p>", created_by=self.user)
+
+        counts = {item["title"]: item["note_count"] for item in self.search()["songs"]}
+        self.assertEqual(counts, {"Song 0": 0, "Song 1": 3, "Song 2": 0, "Song 3": 0, "Song 4": 0})
+
+        response = self.client.get(reverse("setlists:ajax_song_notes", args=[song.pk]))
+        data = response.json()
+        self.assertEqual(data["song"], {"id": song.pk, "title": "Song 1"})
+        self.assertEqual([(note["event"], note["date"], note["html"]) for note in data["notes"]], [
+            ("May", "2025-05-01", "<p>May</p>"),
+            ("April", "2025-04-01", "<p>April</p>"),
+            ("March", "2025-03-01", "<p>March</p>"),
+        ])
+        self.assertEqual(data["notes"][0]["author"], str(self.user))
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(reverse("setlists:ajax_song_search"))
+        self.assertEqual(response.status_code, 302)
@@ -12,12 +12,15 @@ urlpatterns = [
         name="setlist_teleprompter",
     ),
     path("export/<int:pk>/", views.export_setlist, name="export"),
+    path("<int:pk>/pack/", views.setlist_pack, name="pack"),
     path("import/", views.import_setlist, name="import"),
 
     # 🧱 The missing line — Add this one:
     path("builder/", views.setlist_builder, name="setlist_builder"),
     path("builder/<int:pk>/", views.setlist_builder, name="setlist_builder"),
+    path("<int:pk>/reorder/", views.setlist_reorder, name="reorder"),
     path("ajax/song-search/", views.song_search, name="ajax_song_search"),
+    path("ajax/song-notes/<int:song_id>/", views.song_notes, name="ajax_song_notes"),
 
     path("event/<int:event_id>/create/", views.create_setlist_for_event, name="setlist_create_for_event"),
 
@@ -1,59 +1,26 @@
 import json
-import re
+import logging
 from django.http import HttpResponse
 from django.http import JsonResponse
+from django.db import transaction
+from django.views.decorators.http import require_POST
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from .models import SetList, SetListSong
 from songbook.models import Song
 from songbook.utils.chord_library import extract_relevant_chords
 from songbook.utils.teleprompter_renderer import render_lyrics_with_chords_html
+from songbook.utils.render_ir import song_render_ir
+from songbook.utils.rehearsal_pack import DEFAULT_PACK_INSTRUMENTS, PACK_INSTRUMENTS
+from songbook.utils.render_queue import enqueue_render
+from songbook.views.render_job_views import render_job_accepted
+from songbook.utils.search import search_song_ids, order_by_ids
 from songbook.context_processors import site_context
+from songbook.utils.markup import apply_html_color_markup
+from users.context import get_user_context
+from .ordering import move_setlist_song, save_setlist_order
 
-
-# ----------------------------
-# 🎨 Color Markup Helper
-# ----------------------------
-def apply_html_color_markup(text):
-    """
-    Convert custom color tags to HTML for web display.
-    Similar to PDF apply_color_markup but outputs span tags.
-    """
-    if not text:
-        return text
-    
-    color_map = {
-        'red': 'red',
-        'blue': 'blue',
-        'green': 'green',
-        'yellow': 'gold',
-        'orange': 'orange',
-        'pink': 'hotpink',
-        'purple': 'purple',
-    }
-    
-    # Full color names: <red>text</red> → <span style='color:red'>text</span>
-    for tag, color in color_map.items():
-        pattern = re.compile(rf'<{tag}>(.*?)</{tag}>', re.IGNORECASE | re.DOTALL)
-        text = pattern.sub(lambda m: f"<span style='color:{color}'>{m.group(1)}</span>", text)
-    
-    # Short color codes: <r>text</r> → <span style='color:red'>text</span>
-    short_map = {'r': 'red', 'g': 'green', 'y': 'gold'}
-    for tag, color in short_map.items():
-        pattern = re.compile(rf'<{tag}>(.*?)</{tag}>', re.IGNORECASE | re.DOTALL)
-        text = pattern.sub(lambda m: f"<span style='color:{color}'>{m.group(1)}</span>", text)
-    
-    # Custom highlight: <highlight color="blue">text</highlight>
-    pattern = re.compile(r'<highlight\s+color="(.*?)">(.*?)</highlight>', re.IGNORECASE | re.DOTALL)
-    text = pattern.sub(lambda m: f"<span style='background-color:{m.group(1)}'>{m.group(2)}</span>", text)
-    
-    # Simple highlight: <h>text</h> → yellow background
-    text = re.sub(r'<h>(.*?)</h>', r"<span style='background-color:yellow'>\1</span>", text, flags=re.IGNORECASE | re.DOTALL)
-    
-    # Clean up any nested closing tags
-    text = re.sub(r'</span>\s*</span>', '</span>', text)
-    
-    return text
+logger = logging.getLogger(__name__)
 
 
 # ----------------------------
@@ -72,10 +39,7 @@ def setlist_detail(request, pk):
     songs = setlist.songs.select_related("song").order_by("order")
 
     # ✅ Group check
-    can_edit = (
-        request.user.is_authenticated
-        and request.user.groups.filter(name="Leaders").exists()
-    )
+    can_edit = get_user_context(request).is_leader
 
     # ✅ Event info (optional)
     event = setlist.event  # might be None
@@ -88,6 +52,8 @@ def setlist_detail(request, pk):
             "songs": songs,
             "event": event,
             "can_edit": can_edit,
+            "pack_instruments": PACK_INSTRUMENTS,
+            "default_pack_instruments": DEFAULT_PACK_INSTRUMENTS,
         },
     )
 
@@ -112,12 +78,12 @@ def setlist_teleprompter(request, setlist_id, order):
 
     # --- Determine instrument ---
     instrument = request.GET.get("instrument")
-    if not instrument and request.user.is_authenticated:
-        instrument = getattr(request.user.userpreference, "primary_instrument", "ukulele")
+    user_pref = get_user_context(request).preferences
+    if not instrument and user_pref:
+        instrument = getattr(user_pref, "primary_instrument", "ukulele")
     instrument = instrument or "ukulele"
 
     # --- 🆕 Get user preferences for chord loading ---
-    user_pref = getattr(request.user, "userpreference", None)
     user_prefs = {
         "primary_instrument": instrument,
         "is_lefty": getattr(user_pref, "is_lefty", False),
@@ -130,7 +96,6 @@ def setlist_teleprompter(request, setlist_id, order):
     suggested_alternate = None
     if current.song.metadata:
         suggested_alternate = current.song.metadata.get('suggested_alternate')
-        print(f"[TELEPROMPTER] suggested_alternate from metadata: {suggested_alternate}")
 
     # --- 🆕 Use load_relevant_chords (same as PDF) ---
     from songbook.utils.chords.loader import load_relevant_chords
@@ -141,19 +106,13 @@ def setlist_teleprompter(request, setlist_id, order):
         suggested_alternate=suggested_alternate
     )
 
-    # 🐛 DEBUG: Check what chords were loaded
-    print(f"[TELEPROMPTER] Loaded {len(relevant_chords)} chord definitions")
-    for chord in relevant_chords:
-        print(f"  - {chord['name']}: {len(chord.get('variations', []))} variations")
-
     # --- Site context ---
     context_data = site_context(request)
     site_name = context_data["site_name"]
 
     # --- Render lyrics + metadata ---
-    lyrics_html, metadata = render_lyrics_with_chords_html(
-        current.song.lyrics_with_chords, site_name
-    )
+    render_ir = song_render_ir(current.song, site_name)
+    lyrics_html, metadata = render_lyrics_with_chords_html(render_ir)
 
     # ✅ OVERRIDE with complete metadata from Song model
     # This ensures all metadata fields are available in the template
@@ -161,7 +120,7 @@ def setlist_teleprompter(request, setlist_id, order):
         metadata = current.song.metadata
     
     # ✅ Check for slash chords in lyrics for the instruction message
-    has_slash_chord = '/' in str(current.song.songChordPro)
+    has_slash_chord = any("/" in chord for chord in render_ir["chords"])
 
     # ----------------------------
     # 🎨 Apply color markup transformations
@@ -175,39 +134,14 @@ def setlist_teleprompter(request, setlist_id, order):
         "showAlternate": user_prefs["show_alternate_chords"],
     }
 
-    # ----------------------------
-    # 🐛 DEBUGGING OUTPUT
-    # ----------------------------
-    print("\n====== 🎶 TELEPROMPTER DEBUG ======")
-    print(f"Setlist: {setlist.name} (ID {setlist.id})")
-    print(f"Order: {current.order} / {total_songs}")
-    print(f"Song: {current.song.songTitle} (ID {current.song.id})")
-    print(f"Song.scroll_speed from DB: {getattr(current.song, 'scroll_speed', '❌ MISSING')}")
-    print(f"Metadata scroll_speed (if any): {current.song.metadata.get('scroll_speed') if current.song.metadata else 'None'}")
-    print(f"User: {request.user if request.user.is_authenticated else 'Anonymous'}")
-    print(f"Relevant chords count: {len(relevant_chords)}")
-    
-    # 🎨 Check for color markup
-    has_color_spans = '<span style=' in lyrics_html
-    print(f"🎨 Color markup applied? {has_color_spans}")
-    if has_color_spans:
-        print("✅ Color spans detected in lyrics_html")
-    else:
-        print("⚠️ No color spans found - check if song has color tags")
-    
-    # ✅ Print metadata fields for debugging
-    print(f"\n📋 Metadata fields available:")
-    if metadata:
-        for key, value in metadata.items():
-            if value:
-                print(f"  - {key}: {value}")
-    print("==================================\n")
-
     # --- Use scroll speed from the Song model ---
     initial_scroll_speed = getattr(current.song, "scroll_speed", 40) or 40
 
-    # 🐛 Confirm what we're actually passing to the template
-    print(f"✅ Passing scroll speed to template: {initial_scroll_speed}\n")
+    logger.debug(
+        "setlist %s teleprompter %s/%s: song %s (%s), %d chords, scroll speed %s, color markup %s",
+        setlist.pk, current.order, total_songs, current.song.pk, instrument, len(relevant_chords),
+        initial_scroll_speed, "applied" if "<span style=" in lyrics_html else "none",
+    )
 
     # --- Render template ---
     return render(
@@ -235,6 +169,13 @@ def setlist_teleprompter(request, setlist_id, order):
 # ----------------------------
 def export_setlist(request, pk):
     setlist = get_object_or_404(SetList, pk=pk)
+    # Notes live on the rehearsal of the setlist's event, not on SetListSong
+    notes = {}
+    if setlist.event_id:
+        notes = dict(
+            SongRehearsalNote.objects.filter(rehearsal__event_id=setlist.event_id)
+            .values_list("song_id", "notes")
+        )
     data = {
         "setlist": [
             {
@@ -242,10 +183,10 @@ def export_setlist(request, pk):
                 "title": s.song.songTitle,
                 "lyrics": s.song.render_lyrics_with_chords_html(),
                 "scroll_speed": getattr(s.song, "scroll_speed", 40),  # ✅ from Song
-                "tempo": s.song.metadata.get("tempo") if s.song.metadata else None,
-                "notes": s.rehearsal_notes,
+                "tempo": s.song.tempo,
+                "notes": notes.get(s.song_id) or "",
             }
-            for s in setlist.songs.all()
+            for s in setlist.songs.select_related("song")
         ]
     }
     response = HttpResponse(json.dumps(data, indent=2), content_type="application/json")
@@ -253,6 +194,32 @@ def export_setlist(request, pk):
     return response
 
 
+@login_required
+def setlist_pack(request, pk):
+    """
+    Rehearsal pack: the setlist's songs with chord footers per instrument
+    (?instrument=ukulele&instrument=guitar), rendered by run_render_jobs.
+    Answers 202 with the job's status URL; the result is a PDF for one
+    instrument, a zip of PDFs for several.
+    """
+    setlist = get_object_or_404(SetList, pk=pk)
+    instruments = [i for i in request.GET.getlist("instrument") if i in PACK_INSTRUMENTS] or DEFAULT_PACK_INSTRUMENTS
+    song_ids = list(setlist.songs.order_by("order").values_list("song_id", flat=True))
+
+    job = enqueue_render(
+        "setlist_pack",
+        {
+            "song_ids": song_ids,
+            "instruments": list(dict.fromkeys(instruments)),
+            "title": setlist.name,
+            "filename": f"setlist_{setlist.pk}",
+            "site_name": site_context(request)["site_name"],
+        },
+        user=request.user,
+    )
+    return render_job_accepted(job)
+
+
 def import_setlist(request):
     if request.method == "POST" and request.FILES.get("setlist_file"):
         uploaded_file = request.FILES["setlist_file"]
@@ -271,7 +238,6 @@ def import_setlist(request):
                 setlist=new_setlist,
                 song=song,
                 order=song_data["order"],
-                rehearsal_notes=song_data.get("notes", ""),
             )
         return redirect("setlists:detail", pk=new_setlist.pk)
 
@@ -281,7 +247,7 @@ def import_setlist(request):
 # ----------------------------
 # 🧱 Setlist Builder 
 # ----------------------------
-from django.db.models import Count, Prefetch
+from django.db.models import Count
 from board.models import SongRehearsalNote
 
 @login_required
@@ -293,66 +259,132 @@ def setlist_builder(request, pk=None):
 
     if request.method == "POST":
         name = request.POST.get("name")
-        if not setlist:
-            setlist = SetList.objects.create(name=name, created_by=request.user)
-        else:
-            setlist.name = name
-            setlist.save()
-
-        # Clear old songs
-        setlist.songs.all().delete()
-
-        # Rebuild setlist order from POST data
-        orders = request.POST.getlist("order[]")
-        for idx, song_id in enumerate(orders, start=1):
-            SetListSong.objects.create(
-                setlist=setlist,
-                song_id=song_id,
-                order=idx,
-            )
+        song_ids = [int(song_id) for song_id in request.POST.getlist("order[]") if song_id.isdigit()]
+        existing = set(Song.objects.filter(pk__in=song_ids).values_list("pk", flat=True))
+
+        # Only the added / removed / moved rows are written, in one transaction
+        with transaction.atomic():
+            if not setlist:
+                setlist = SetList.objects.create(name=name, created_by=request.user)
+            elif setlist.name != name:
+                setlist.name = name
+                setlist.save(update_fields=["name"])
+            save_setlist_order(setlist, [song_id for song_id in song_ids if song_id in existing])
 
         return redirect("setlists:detail", pk=setlist.pk)
 
-    # ✅ Prefetch rehearsal notes + their related rehearsal event titles
-    songs = (
-        Song.objects.all()
-        .annotate(note_count=Count("rehearsal_notes"))
-        .prefetch_related(
-            Prefetch(
-                "rehearsal_notes",
-                queryset=SongRehearsalNote.objects.select_related("rehearsal__event"),
-            )
+    # The song library is paged in by song_search and notes are fetched per
+    # song (song_notes), so only the setlist's own items are rendered here
+    items = []
+    if setlist:
+        items = (
+            setlist.songs.select_related("song")
+            .only("id", "order", "setlist_id", "song__id", "song__songTitle")
+            .annotate(note_count=Count("song__rehearsal_notes"))
+            .order_by("order")
         )
-        .order_by("songTitle")
-    )
 
     return render(
         request,
         "setlists/builder.html",
-        {"setlist": setlist, "songs": songs},
+        {"setlist": setlist, "items": items},
     )
 
 
 
+@login_required
+@require_POST
+def setlist_reorder(request, pk):
+    """
+    Drag-and-drop reorder: move one saved item.
+    JSON body: {"item": <SetListSong id>, "after": <SetListSong id or null for the top>}
+    """
+    setlist = get_object_or_404(SetList, pk=pk)
+    try:
+        payload = json.loads(request.body)
+        item_id = int(payload["item"])
+        after_id = int(payload["after"]) if payload.get("after") is not None else None
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Expected {\"item\": id, \"after\": id or null}"}, status=400)
+
+    try:
+        items = move_setlist_song(setlist, item_id, after_id)
+    except SetListSong.DoesNotExist:
+        return JsonResponse({"error": "Item not found in this setlist"}, status=404)
+    return JsonResponse({"order": [item.pk for item in items]})
+
+
 # ----------------------------
 # 🧱 AJAX filter for setlist builder
 # ----------------------------
 
+SONG_PAGE_SIZE = 50
+MAX_SONG_PAGE_SIZE = 100
+
+
+def _positive_int(value, default):
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
 @login_required
 def song_search(request):
-    """AJAX endpoint to filter songs for the builder."""
-    query = request.GET.get("q", "").strip().lower()
-    songs = Song.objects.all()
+    """
+    Paged song summaries for the song pickers (setlist builder, rehearsal notes).
+    GET: q (optional search), page (1-based), page_size (max 100).
+    Returns {"songs": [{"id", "title", "artist", "note_count"}], "page", "has_next"}.
+    """
+    query = request.GET.get("q", "").strip()
+    page = _positive_int(request.GET.get("page"), 1)
+    page_size = min(_positive_int(request.GET.get("page_size"), SONG_PAGE_SIZE), MAX_SONG_PAGE_SIZE)
+    start = (page - 1) * page_size
 
     if query:
-        songs = songs.filter(songTitle__icontains=query)
+        # Ranked, accent-insensitive lookup in the song search index
+        song_ids = search_song_ids(query, limit=start + page_size + 1)[start:]
+    else:
+        song_ids = list(
+            Song.objects.order_by("songTitle", "pk")
+            .values_list("pk", flat=True)[start:start + page_size + 1]
+        )
+    has_next = len(song_ids) > page_size
+    song_ids = song_ids[:page_size]
 
+    songs = order_by_ids(Song.objects.filter(pk__in=song_ids).only("id", "songTitle", "artist"), song_ids)
+    note_counts = dict(
+        SongRehearsalNote.objects.filter(song_id__in=song_ids)
+        .values("song").annotate(count=Count("id")).values_list("song", "count")
+    )
     results = [
-        {"id": s.id, "title": s.songTitle}
-        for s in songs.order_by("songTitle")[:100]  # Limit to 100 results for speed
+        {"id": s.id, "title": s.songTitle, "artist": s.artist, "note_count": note_counts.get(s.id, 0)}
+        for s in songs
     ]
+    return JsonResponse({"songs": results, "page": page, "has_next": has_next})
 
-    return JsonResponse({"songs": results})
+
+@login_required
+def song_notes(request, song_id):
+    """Rehearsal notes of one song, most recent rehearsal first (loaded on demand by the builder)."""
+    song = get_object_or_404(Song.objects.only("id", "songTitle"), pk=song_id)
+    notes = (
+        SongRehearsalNote.objects.filter(song=song)
+        .select_related("rehearsal__event", "created_by")
+        .order_by("-rehearsal__event__event_date", "-created_at")
+    )
+    return JsonResponse({
+        "song": {"id": song.id, "title": song.songTitle},
+        "notes": [
+            {
+                "event": note.rehearsal.event.title,
+                "date": note.rehearsal.event.event_date.isoformat() if note.rehearsal.event.event_date else None,
+                "author": str(note.created_by) if note.created_by else "",
+                "html": note.notes or "",
+            }
+            for note in notes
+        ],
+    })
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import get_object_or_404, redirect
@@ -360,7 +392,7 @@ from board.models import Event
 from .models import SetList
 
 @login_required
-@user_passes_test(lambda u: u.groups.filter(name="Leaders").exists())
+@user_passes_test(lambda u: get_user_context(u).is_leader)
 def create_setlist_for_event(request, event_id):
     """Create a new setlist and link it to a specific event."""
     event = get_object_or_404(Event, pk=event_id)
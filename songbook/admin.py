@@ -1,14 +1,18 @@
 from django.contrib import admin, messages
 from django.urls import path, reverse
-from django.shortcuts import redirect, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404, render
 from django.utils.html import format_html
 from django.db.models import Value
 from django.db.models.functions import Concat
 from django import forms
+from django.core.exceptions import PermissionDenied
 
-from .models import Song, SongFormatting
+from .models import RenderJob, Song, SongFormatting, SongLintIssue
 from .utils.admin_chordpro_transposer import transpose_chordpro_text
 from .utils.transposer import transpose_chordpro
+from .utils.artists import refresh_artists
+from .utils.sync import log_song_changes
+from .utils.chord_index import chord_matches, chord_usage_counts, normalize_chord_token
 
 
 # ---------- SongFormatting Admin ----------
@@ -50,13 +54,17 @@ class SongFormattingAdmin(admin.ModelAdmin):
 # 🆕 Privacy Actions
 @admin.action(description="🌐 Make selected songs PUBLIC")
 def make_public(modeladmin, request, queryset):
+    song_ids = list(queryset.values_list("pk", flat=True))
     updated = queryset.update(is_public=True)
+    log_song_changes(song_ids)
     messages.success(request, f"{updated} song(s) marked as PUBLIC.")
 
 
 @admin.action(description="🔒 Make selected songs PRIVATE")
 def make_private(modeladmin, request, queryset):
+    song_ids = list(queryset.values_list("pk", flat=True))
     updated = queryset.update(is_public=False)
+    log_song_changes(song_ids)
     messages.success(request, f"{updated} song(s) marked as PRIVATE.")
 
 
@@ -125,25 +133,36 @@ class PrivacyFilter(admin.SimpleListFilter):
 # Hide/Restore Actions
 @admin.action(description="Hide selected songs (set site_name=None)")
 def mark_hidden(modeladmin, request, queryset):
-    updated = queryset.update(site_name=None)
+    updated = move_songs_to_site(queryset, None)
     messages.success(request, f"{updated} song(s) marked as hidden.")
 
 
 @admin.action(description="Restore hidden songs to FrancoUke")
 def restore_francouke(modeladmin, request, queryset):
-    updated = queryset.filter(site_name__isnull=True).update(site_name='FrancoUke')
+    updated = move_songs_to_site(queryset.filter(site_name__isnull=True), 'FrancoUke')
     messages.success(request, f"{updated} hidden song(s) restored to FrancoUke.")
 
 
 @admin.action(description="Restore hidden songs to StrumSphere")
 def restore_strumsphere(modeladmin, request, queryset):
-    updated = queryset.filter(site_name__isnull=True).update(site_name='StrumSphere')
+    updated = move_songs_to_site(queryset.filter(site_name__isnull=True), 'StrumSphere')
     messages.success(request, f"{updated} hidden song(s) restored to StrumSphere.")
 
 
+def move_songs_to_site(queryset, site_name):
+    """Bulk site change; queryset.update() skips Song.save so recount the artist index here."""
+    slots = set(queryset.values_list("site_name", "artist_key"))
+    song_ids = list(queryset.values_list("pk", flat=True))
+    updated = queryset.update(site_name=site_name)
+    refresh_artists(slots | {(site_name, key) for _, key in slots})
+    log_song_changes(song_ids)
+    return updated
+
+
 @admin.register(Song)
 class SongAdmin(admin.ModelAdmin):
     change_form_template = "admin/song_change_form_with_transpose.html"
+    change_list_template = "admin/song_changelist_with_chord_usage.html"
 
     # 🆕 Added privacy and contributor to list_display
     list_display = [
@@ -162,11 +181,11 @@ class SongAdmin(admin.ModelAdmin):
     # 🆕 Added is_public to editable fields
     list_editable = ['site_name']
     
-    search_fields = ['songTitle', 'metadata__artist', 'contributor__username']  # 🆕 Can search by contributor
-    ordering = ('metadata__artist',)
+    search_fields = ['songTitle', 'artist', 'contributor__username']  # 🆕 Can search by contributor
+    ordering = ('artist',)
     
-    # 🆕 Added PrivacyFilter
-    list_filter = [SiteNameFilter, PrivacyFilter, 'contributor']
+    # 🆕 Added PrivacyFilter; year/key/time signature filter on indexed columns
+    list_filter = [SiteNameFilter, PrivacyFilter, 'contributor', 'year', 'key', 'time_signature']
     
     # 🆕 Added privacy actions
     actions = [
@@ -192,11 +211,16 @@ class SongAdmin(admin.ModelAdmin):
             'fields': ('metadata', 'tags', 'revised_on', 'acknowledgement'),
             'classes': ('collapse',),
         }),
+        ('Indexed Metadata (from ChordPro)', {
+            'fields': ('artist', 'year', 'key', 'tempo', 'capo', 'time_signature'),
+            'classes': ('collapse',),
+        }),
         ('Advanced', {
             'fields': ('lyrics_with_chords', 'scroll_speed'),
             'classes': ('collapse',),
         }),
     )
+    readonly_fields = ('artist', 'year', 'key', 'tempo', 'capo', 'time_signature')
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
@@ -225,8 +249,8 @@ class SongAdmin(admin.ModelAdmin):
     get_is_clone.short_description = 'Cloned From'
 
     def get_year(self, obj):
-        return obj.metadata.get('year', 'Unknown') if obj.metadata else 'No Metadata'
-    get_year.admin_order_field = 'metadata__year'
+        return obj.year or 'Unknown'
+    get_year.admin_order_field = 'year'
     get_year.short_description = 'Year'
 
     def get_youtube(self, obj):
@@ -235,7 +259,8 @@ class SongAdmin(admin.ModelAdmin):
     get_youtube.short_description = 'YouTube'
 
     def get_artist(self, obj):
-        return obj.metadata.get('artist', 'Unknown') if obj.metadata else ''
+        return obj.artist or 'Unknown'
+    get_artist.admin_order_field = 'artist'
     get_artist.short_description = 'Artist'
 
     def get_view_on_site_url(self, obj):
@@ -256,6 +281,11 @@ class SongAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(self.transpose_song),
                 name="songbook_song_transpose",
             ),
+            path(
+                "chord-usage/",
+                self.admin_site.admin_view(self.chord_usage),
+                name="songbook_song_chord_usage",
+            ),
         ]
         return custom_urls + urls
 
@@ -276,4 +306,50 @@ class SongAdmin(admin.ModelAdmin):
         song.save()
         direction = "up" if semitones > 0 else "down"
         messages.success(request, f"Transposed {direction} {abs(semitones)} semitone(s).")
-        return redirect(f"../../")
\ No newline at end of file
+        return redirect(f"../../")
+
+    def chord_usage(self, request):
+        """Where is this chord used? Reads the chord index (utils/chord_index.py)."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        chord = request.GET.get("chord", "").strip().strip("[]")
+        exact = bool(request.GET.get("exact"))
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Chord usage",
+            "opts": self.model._meta,
+            "chord": chord,
+            "exact": exact,
+            "normalized": normalize_chord_token(chord) if chord else "",
+            "matches": chord_matches(chord, exact=exact) if chord else [],
+            "usage": [] if chord else chord_usage_counts(),
+        }
+        return render(request, "admin/chord_usage.html", context)
+
+
+# ---------- Lint issues (rebuilt by lint_songs / on save) ----------
+
+@admin.register(SongLintIssue)
+class SongLintIssueAdmin(admin.ModelAdmin):
+    list_display = ('song', 'severity', 'code', 'instrument', 'token', 'line_number', 'message')
+    list_filter = ('severity', 'code', 'instrument')
+    search_fields = ('song__songTitle', 'token')
+    list_select_related = ('song',)
+    readonly_fields = ('song', 'code', 'severity', 'instrument', 'token', 'line_number', 'message')
+
+    def has_add_permission(self, request):
+        return False
+
+
+# ---------- RenderJob Admin ----------
+
+@admin.register(RenderJob)
+class RenderJobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'user', 'status', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    list_select_related = ('user',)
+    readonly_fields = ('token', 'kind', 'params', 'key', 'user', 'status', 'result', 'error',
+                       'created_at', 'started_at', 'finished_at', 'slot', 'lease_until')
+
+    def has_add_permission(self, request):
+        return False
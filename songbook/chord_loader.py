@@ -1,12 +1,14 @@
 # songbook/chord_loader.py
 import json
+import logging
 from pathlib import Path
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
 # Change this to point where your chord JSON files live on disk.
 # Default: <project_root>/songbook/chords/*.json
 CHORD_DIR = Path(settings.BASE_DIR) / "songbook" / "chords"
-CHORD_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def load_all_chords():
@@ -23,7 +25,7 @@ def load_all_chords():
                 all_chords[instrument] = json.load(fh)
         except Exception as e:
             # Keep an empty list so the front-end knows the instrument exists
-            print(f"[chord_loader] error loading {path}: {e}")
+            logger.warning("Error loading chord file %s: %s", path, e)
             all_chords[instrument] = []
     return all_chords
 
@@ -40,7 +42,7 @@ def save_all_chords(chords_dict):
             with open(tmp, "w", encoding="utf-8") as fh:
                 json.dump(data, fh, indent=2, ensure_ascii=False)
             tmp.replace(out)
-            print(f"[chord_loader] saved {out}")
+            logger.info("Saved chord file %s", out)
         except Exception as e:
-            print(f"[chord_loader] error saving {instrument} -> {out}: {e}")
+            logger.error("Error saving %s chords to %s: %s", instrument, out, e)
             raise
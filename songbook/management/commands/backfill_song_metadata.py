@@ -0,0 +1,62 @@
+# songbook/management/commands/backfill_song_metadata.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from songbook.models import Song
+from songbook.parsers import PROMOTED_METADATA_FIELDS, promoted_metadata_fields
+
+
+class Command(BaseCommand):
+    help = (
+        "Populate the Song columns promoted from metadata "
+        "(artist, year, key, tempo, capo, time_signature) for existing rows"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows read and written per transaction (default 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        started = time.monotonic()
+        scanned = updated = 0
+        last_pk = 0
+
+        # Walk the table by primary key so each batch is one short transaction
+        while True:
+            batch = list(
+                Song.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", "metadata", *PROMOTED_METADATA_FIELDS)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            scanned += len(batch)
+
+            changed = []
+            for song in batch:
+                values = promoted_metadata_fields(song.metadata)
+                if any(getattr(song, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(song, field, value)
+                    changed.append(song)
+
+            if changed:
+                with transaction.atomic():
+                    Song.objects.bulk_update(changed, PROMOTED_METADATA_FIELDS)
+                updated += len(changed)
+
+            self.stdout.write(f"  {scanned} scanned, {updated} updated")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled promoted metadata: {updated} of {scanned} songs updated in {elapsed:.1f}s."
+        ))
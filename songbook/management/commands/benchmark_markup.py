@@ -0,0 +1,99 @@
+# songbook/management/commands/benchmark_markup.py
+
+import re
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from songbook.models import Song
+from songbook.utils.markup import apply_color_markup, apply_html_color_markup
+
+SAMPLE_LINES = [
+    "[C]Quand le <r>soleil</r> se [G]lève sur la [Am]mer,<br/>",
+    "<h>On chante</h> [F]tous en<b><font color=\"black\">[G7]</font></b>semble<br/>",
+    "<highlight color=\"lightblue\">[C]Refrain</highlight> <green>doux</green> et [E7]<y>clair</y><br/>",
+    "Les [Dm]vagues, les <blue>[G]voiles</blue>, <purple>le vent</purple> du [C]soir<br/>",
+    "[Am]Plain lyric line with no markup at [F]all, just [C]chords and [G]words<br/>",
+]
+
+
+# Markup code as it was before utils/markup.py: one regex per tag, compiled on
+# every call, kept here as the baseline to compare against
+def _legacy_pdf_markup(text):
+    color_map = {"red": "red", "blue": "blue", "green": "green", "yellow": "gold",
+                 "orange": "orange", "pink": "hotpink", "purple": "purple"}
+    for tag, color in color_map.items():
+        pattern = re.compile(rf"<{tag}>(.*?)</{tag}>", re.IGNORECASE | re.DOTALL)
+        text = pattern.sub(lambda m: f"<font color='{color}'>{m.group(1)}</font>", text)
+    for tag, color in {"r": "red", "g": "green", "y": "gold"}.items():
+        pattern = re.compile(rf"<{tag}>(.*?)</{tag}>", re.IGNORECASE | re.DOTALL)
+        text = pattern.sub(lambda m: f"<font color='{color}'>{m.group(1)}</font>", text)
+    pattern = re.compile(r'<highlight\s+color="(.*?)">(.*?)</highlight>', re.IGNORECASE | re.DOTALL)
+    text = pattern.sub(lambda m: f"<font backColor='{m.group(1)}'>{m.group(2)}</font>", text)
+    text = re.sub(r"<h>(.*?)</h>", r"<font backColor='yellow'>\1</font>", text, flags=re.IGNORECASE | re.DOTALL)
+    return re.sub(r"</font>\s*</font>", "</font>", text)
+
+
+def _legacy_html_markup(text):
+    if not text:
+        return text
+    color_map = {"red": "red", "blue": "blue", "green": "green", "yellow": "gold",
+                 "orange": "orange", "pink": "hotpink", "purple": "purple"}
+    for tag, color in color_map.items():
+        pattern = re.compile(rf"<{tag}>(.*?)</{tag}>", re.IGNORECASE | re.DOTALL)
+        text = pattern.sub(lambda m: f"<span style='color:{color}'>{m.group(1)}</span>", text)
+    for tag, color in {"r": "red", "g": "green", "y": "gold"}.items():
+        pattern = re.compile(rf"<{tag}>(.*?)</{tag}>", re.IGNORECASE | re.DOTALL)
+        text = pattern.sub(lambda m: f"<span style='color:{color}'>{m.group(1)}</span>", text)
+    pattern = re.compile(r'<highlight\s+color="(.*?)">(.*?)</highlight>', re.IGNORECASE | re.DOTALL)
+    text = pattern.sub(lambda m: f"<span style='background-color:{m.group(1)}'>{m.group(2)}</span>", text)
+    text = re.sub(r"<h>(.*?)</h>", r"<span style='background-color:yellow'>\1</span>", text, flags=re.IGNORECASE | re.DOTALL)
+    return re.sub(r"</span>\s*</span>", "</span>", text)
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark of the colour markup engine (utils/markup.py) against the "
+        "previous regex-per-tag implementation, on a long synthetic song or real songs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=400, help="Lines in the synthetic song (default 400)")
+        parser.add_argument("--paragraph-lines", type=int, default=4,
+                            help="Lines per paragraph flush, as the renderers call it (default 4)")
+        parser.add_argument("--repeat", type=int, default=5, help="Timing repeats, best one kept (default 5)")
+        parser.add_argument("--from-db", action="store_true", help="Use the stored songs' ChordPro instead")
+
+    def handle(self, *args, **options):
+        paragraphs = self.paragraphs(options)
+        chars = sum(len(p) for p in paragraphs)
+        self.stdout.write(f"{len(paragraphs)} paragraphs, {chars} characters")
+
+        cases = [
+            ("PDF  (<font>)", _legacy_pdf_markup, apply_color_markup),
+            ("HTML (<span>)", _legacy_html_markup, apply_html_color_markup),
+        ]
+        for label, legacy, current in cases:
+            legacy_time = self.best_time(legacy, paragraphs, options["repeat"])
+            current_time = self.best_time(current, paragraphs, options["repeat"])
+            self.stdout.write(
+                f"  {label}: legacy {legacy_time * 1000:8.2f} ms   "
+                f"single pass {current_time * 1000:8.2f} ms   "
+                f"x{legacy_time / current_time:.1f}"
+            )
+
+    def paragraphs(self, options):
+        if options["from_db"]:
+            texts = Song.objects.values_list("songChordPro", flat=True)
+            lines = [line for text in texts for line in (text or "").splitlines()]
+        else:
+            lines = [SAMPLE_LINES[i % len(SAMPLE_LINES)] for i in range(options["lines"])]
+        size = max(1, options["paragraph_lines"])
+        return ["".join(lines[i:i + size]) for i in range(0, len(lines), size)]
+
+    @staticmethod
+    def best_time(func, paragraphs, repeat):
+        def run():
+            for paragraph in paragraphs:
+                func(paragraph)
+        return min(timeit.repeat(run, number=1, repeat=max(1, repeat)))
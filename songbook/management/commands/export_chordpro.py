@@ -1,48 +1,70 @@
+import json
 import os
-from django.core.management.base import BaseCommand
-from songbook.models import Song  # Update with the correct app name
+from datetime import date
 from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from songbook.utils.chordpro_export import (
+    ARCHIVE_FORMATS, export_archive, load_manifest, select_songs,
+)
+
 
 class Command(BaseCommand):
-    help = "Export songs in ChordPro format"
+    help = "Export songs in ChordPro format into a zip / tar.zst / tar.gz archive"
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--output-dir',
             type=str,
-            help='Directory to save the ChordPro files',
+            help='Directory to save the archive',
             default=str(Path.home() / "Downloads")  # Default to Downloads folder
         )
+        parser.add_argument('--format', choices=list(ARCHIVE_FORMATS), default='zip', help='Archive format')
+        parser.add_argument('--site', choices=['FrancoUke', 'StrumSphere'], help='Only songs of this site')
+        parser.add_argument('--tag', action='append', dest='tags', help='Only songs with this tag (repeatable)')
+        parser.add_argument('--changed-since', type=date.fromisoformat, help='Only songs changed on or after YYYY-MM-DD')
+        parser.add_argument(
+            '--since-manifest',
+            type=str,
+            help='manifest.json of an earlier export: only songs that changed since are written',
+        )
+        parser.add_argument('--chunk-size', type=int, default=200, help='Songs fetched per query')
 
     def handle(self, *args, **options):
         output_dir = options['output_dir']
         os.makedirs(output_dir, exist_ok=True)
 
-        songs = Song.objects.all()
-        for song in songs:
-            chordpro_content = self.convert_to_chordpro(song)
-            # Use songTitle or a fallback for the filename
-            filename = f"{song.songTitle or 'Untitled'}.chordpro"
-            safe_filename = "".join(c for c in filename if c.isalnum() or c in " ._-").strip()
-            file_path = os.path.join(output_dir, safe_filename)
-
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(chordpro_content)
-
-            self.stdout.write(f"Exported: {file_path}")
+        previous_manifest = None
+        if options['since_manifest']:
+            try:
+                previous_manifest = load_manifest(options['since_manifest'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read manifest: {e}")
 
-    def convert_to_chordpro(self, song):
-        """
-        Convert a Song instance to ChordPro format.
-        """
-        # Use songTitle for the title
-        title = song.songTitle if song.songTitle else "Untitled"
-        header = f"{{title: {title}}}\n"
+        filters = {
+            "site": options['site'],
+            "tags": options['tags'] or [],
+            "changed_since": options['changed_since'].isoformat() if options['changed_since'] else None,
+        }
+        songs = select_songs(options['site'], options['tags'], options['changed_since'])
 
-        # Optional metadata like artist or contributor
-        contributor = song.contributor.username if song.contributor else "Unknown"
-        header += f"{{artist: {contributor}}}\n\n"
+        stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+        archive_path = Path(output_dir) / f"songbook-export-{stamp}{ARCHIVE_FORMATS[options['format']]}"
+        try:
+            with open(archive_path, 'wb') as f:
+                manifest = export_archive(
+                    f, songs, options['format'], previous_manifest, filters, options['chunk_size']
+                )
+        except ValueError as e:
+            archive_path.unlink(missing_ok=True)
+            raise CommandError(str(e))
 
-        # Use songChordPro field for the ChordPro content
-        return header + song.songChordPro
+        # Keep a copy of the manifest next to the archive for the next --since-manifest
+        manifest_path = archive_path.with_name(f"songbook-export-{stamp}.manifest.json")
+        manifest_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
 
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {len(manifest['changed'])} of {len(manifest['songs'])} songs "
+            f"({len(manifest['removed'])} removed since the previous manifest) to {archive_path}"
+        ))
+        self.stdout.write(f"Manifest: {manifest_path}")
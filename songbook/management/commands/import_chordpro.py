@@ -1,14 +1,21 @@
 import os
-import re
+from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from songbook.models import Song
+from songbook.utils.chordpro_import import ChordProImporter, collect_files, write_report
+
 
 class Command(BaseCommand):
     help = "Import ChordPro files into the Song model"
 
     def add_arguments(self, parser):
         parser.add_argument('directory', type=str, help='Path to the directory containing ChordPro files')
+        parser.add_argument('--contributor', type=str, default=None,
+                            help="Username credited for every song (default: a user named after each song's artist)")
+        parser.add_argument('--extension', action='append', default=None,
+                            help='File extension to import, repeatable (default: .chordpro)')
+        parser.add_argument('--dry-run', action='store_true', help='Parse and report without writing anything')
+        parser.add_argument('--workers', type=int, default=None, help='Parser processes (default: one per CPU)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Songs written per transaction')
 
     def handle(self, *args, **kwargs):
         directory = kwargs['directory']
@@ -18,44 +25,21 @@ class Command(BaseCommand):
             self.stderr.write(f"Directory '{directory}' does not exist.")
             return
 
-        files_imported = 0
-        for filename in os.listdir(directory):
-            if filename.endswith('.chordpro'):
-                filepath = os.path.join(directory, filename)
-                with open(filepath, 'r', encoding='utf-8') as file:
-                    content = file.read()
-
-                # Parse metadata including artist
-                dummy_song = Song(songChordPro=content)
-                song_title, metadata = dummy_song.parse_metadata_from_chordpro()
-                artist_name = metadata.get('artist', "Unknown Artist").strip()
-                print(f"Extracted artist: {artist_name}")  # Debug statement
-
-                # Fetch or create the contributor based on the artist name
-                if artist_name != "Unknown Artist":
-                    contributor, created = User.objects.get_or_create(username=artist_name)
-                else:
-                    self.stderr.write(f"No artist found in {filename}. Skipping file.")
-                    continue
-
-                print(f"Contributor: {contributor.username}, Created: {created}")  # Debug statement
-
-                # Handle duplicates and create/update the song record
-                song = Song.objects.filter(songTitle=song_title.strip()).first()
-                if song:
-                    song.songChordPro = content.strip()
-                    song.contributor = contributor
-                    song.save()
-                    print(f"Updated song: {song.songTitle}")  # Debug statement
-                else:
-                    Song.objects.create(
-                        songTitle=song_title.strip(),
-                        songChordPro=content.strip(),
-                        contributor=contributor,
-                        metadata=metadata
-                    )
-                    print(f"Created new song: {song_title}")  # Debug statement
-
-                files_imported += 1
-
-        self.stdout.write(f"Successfully imported {files_imported} ChordPro files.")
+        contributor = None
+        if kwargs['contributor']:
+            contributor = get_user_model().objects.filter(username=kwargs['contributor']).first()
+            if contributor is None:
+                self.stderr.write(f"Contributor '{kwargs['contributor']}' does not exist.")
+                return
+
+        # Without --contributor each song is credited to a user named after its artist (created if needed)
+        importer = ChordProImporter(
+            "chordpro",
+            contributor=contributor,
+            contributor_from_artist=contributor is None,
+            batch_size=kwargs['batch_size'],
+            workers=kwargs['workers'],
+            dry_run=kwargs['dry_run'],
+        )
+        report = importer.run(collect_files(directory, kwargs['extension'] or ['.chordpro']))
+        write_report(report, self.stdout, self.stderr, self.style, verbose=kwargs['verbosity'] > 1)
@@ -1,72 +1,19 @@
-import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
-import pdfplumber
-from django.utils import timezone
+from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
-from songbook.models import Song  # adjust app name
-
-ACKNOWLEDGEMENT_TEXT = "Contribution of Heather J. Topps of the North Bay Ukulele Club"
-
-def pdf_to_chordpro_text(pdf_path: Path) -> str:
-    """Extract text from PDF and convert into ChordPro string."""
-    texts = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            content = page.extract_text()
-            if content:
-                texts.append(content)
-
-    if not texts:
-        raise ValueError("No extractable text found in PDF.")
-
-    text = "\n".join(texts)
-
-    # Prepend empty metadata block
-    lines = [
-        "{title:}",
-        "{artist:}",
-        "{youtube:}",
-        "{songwriter:}",
-        "{capo:}",
-        "{year:}",
-        "{1stnote:}",
-        "{timeSignature:}",
-        "",
-    ]
-
-    # Replace (C) style chords with [C]
-    text = re.sub(r"\(([^)]+)\)", r"[\1]", text)
-
-    # Replace common section headers with ChordPro markers
-    replacements = {
-        r"(?i)intro[\s:\-]*": "{soi}",
-        r"(?i)verse[\s:\-]*": "{sov}",
-        r"(?i)chorus[\s:\-]*": "{soc}",
-        r"(?i)bridge[\s:\-]*": "{sob}",
-        r"(?i)outro[\s:\-]*": "{soo}",
-    }
-    for pattern, repl in replacements.items():
-        text = re.sub(pattern, repl, text)
-
-    lines.extend(text.splitlines())
-    return "\n".join(lines)
-
-
-def extract_revision_date_from_filename(pdf_path: Path):
-    """
-    Extract revision date from file name in format:
-    Song Title (Month Day, Year).pdf
-    Returns a date object or None.
-    """
-    match = re.search(r'\(([^)]+)\)\.pdf$', pdf_path.name)
-    if match:
-        date_str = match.group(1)
-        try:
-            return datetime.strptime(date_str, "%B %d, %Y").date()
-        except ValueError:
-            return None
-    return None
+from songbook.utils.chordpro_import import ChordProImporter, write_report
+from songbook.utils.pdf_import import pdf_to_chordpro_text
+
+
+def convert_to_cho(pdf_file):
+    """Write `<name>.cho` next to the PDF. Returns (output path, error message)."""
+    try:
+        output_path = Path(pdf_file).with_suffix(".cho")
+        output_path.write_text(pdf_to_chordpro_text(pdf_file), encoding="utf-8")
+        return str(output_path), ""
+    except Exception as e:
+        return "", str(e)
 
 
 class Command(BaseCommand):
@@ -90,6 +37,9 @@ class Command(BaseCommand):
             default=None,  # Leave empty to hide the song
             help="Site name for imported songs (optional, leave empty to hide)",
         )
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+        parser.add_argument("--batch-size", type=int, default=100, help="Songs written per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="With --to-db: convert and report without saving")
 
     def handle(self, *args, **options):
         input_path = Path(options["input_path"])
@@ -102,7 +52,7 @@ class Command(BaseCommand):
         if input_path.is_file() and input_path.suffix.lower() == ".pdf":
             pdf_files = [input_path]
         elif input_path.is_dir():
-            pdf_files = list(input_path.glob("*.pdf"))
+            pdf_files = sorted(input_path.glob("*.pdf"))
         else:
             raise CommandError(
                 "Input must be a PDF file or a directory containing PDFs"
@@ -111,40 +61,57 @@ class Command(BaseCommand):
         if not pdf_files:
             raise CommandError("No PDF files found.")
 
-        for i, pdf_file in enumerate(pdf_files, 1):
-            self.stdout.write(f"[{i}/{len(pdf_files)}] Processing {pdf_file.name}...")
-            try:
-                chordpro_text = pdf_to_chordpro_text(pdf_file)
-                revision_date = extract_revision_date_from_filename(pdf_file)
-
-                if options["to_db"]:
-                    contributor_id = options.get("contributor_id")
-                    if not contributor_id:
-                        raise CommandError(
-                            "--contributor-id is required with --to-db"
-                        )
-
-                    song = Song.objects.create(
-                        songTitle=pdf_file.stem,  # fallback filename
-                        songChordPro=chordpro_text,
-                        revised_on=revision_date,
-                        metadata={"source": str(pdf_file)},
-                        date_posted=timezone.now(),
-                        contributor_id=contributor_id,
-                        site_name=options["site_name"],  # can be None
-                        acknowledgement=ACKNOWLEDGEMENT_TEXT,
-                    )
-                    self.stdout.write(
-                        self.style.SUCCESS(f"Saved to DB: {song.songTitle}")
-                    )
-                else:
-                    # Write to .cho file
-                    output_path = pdf_file.with_suffix(".cho")
-                    output_path.write_text(chordpro_text, encoding="utf-8")
-                    self.stdout.write(self.style.SUCCESS(f"Saved file: {output_path}"))
-
-            except Exception as e:
-                self.stderr.write(self.style.ERROR(f"Failed for {pdf_file}: {e}"))
+        if options["to_db"]:
+            self.import_to_db(pdf_files, options)
+        else:
+            self.convert_to_files(pdf_files, options["workers"])
+
+    def import_to_db(self, pdf_files, options):
+        contributor_id = options.get("contributor_id")
+        if not contributor_id:
+            raise CommandError("--contributor-id is required with --to-db")
+        contributor = get_user_model().objects.filter(pk=contributor_id).first()
+        if contributor is None:
+            raise CommandError(f"Contributor with ID {contributor_id} does not exist.")
+
+        # Every PDF becomes a new song; files already imported (same content hash)
+        # are skipped, so an interrupted run can just be restarted
+        importer = ChordProImporter(
+            "songbook_pdf",
+            contributor=contributor,
+            update_existing=False,
+            site_name=options["site_name"],  # can be None
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            dry_run=options["dry_run"],
+            ledger=True,
+            round_size=max(options["batch_size"], 50),
+        )
+
+        def progress(done, total):
+            self.stdout.write(f"[{done}/{total}] PDFs processed")
+
+        self.stdout.write(f"Importing {len(pdf_files)} PDFs...")
+        report = importer.run([str(path) for path in pdf_files], progress=progress)
+        write_report(report, self.stdout, self.stderr, self.style, verbose=options["verbosity"] > 1)
+
+    def convert_to_files(self, pdf_files, workers):
+        if len(pdf_files) == 1 or workers == 1:
+            results = map(convert_to_cho, pdf_files)
+            self.report_conversions(pdf_files, results)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                self.report_conversions(pdf_files, pool.map(convert_to_cho, pdf_files))
+
+    def report_conversions(self, pdf_files, results):
+        failed = 0
+        for i, (pdf_file, (output_path, error)) in enumerate(zip(pdf_files, results), 1):
+            if error:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f"[{i}/{len(pdf_files)}] Failed for {pdf_file}: {error}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[{i}/{len(pdf_files)}] Saved file: {output_path}"))
+        self.stdout.write(f"Converted {len(pdf_files) - failed} of {len(pdf_files)} PDFs, {failed} failed.")
 
 
 
@@ -207,10 +174,14 @@ python manage.py import_songbook_pdf path/to/song.pdf --to-db --contributor-id=1
 
 python manage.py import_songbook_pdf path/to/folder/ --to-db --contributor-id=1
 
-- Processes all `.pdf` files in the folder
-- Creates one Song DB entry per PDF
+- Processes all `.pdf` files in the folder, in parallel (--workers to limit)
+- Creates one Song DB entry per PDF, written in batches (--batch-size)
 - revision date is extracted from the file name if present
 - site_name remains hidden by default
+- Imported files are remembered by content hash (SongImportRecord): if the run
+  is interrupted, run the same command again and finished PDFs are skipped
+- Ends with a summary (new / already imported / errors); -v 2 lists every song
+- Add --dry-run to see what would be imported without saving
 
 ------------------------------------------------------------
 5️⃣ Make songs visible on a specific site:
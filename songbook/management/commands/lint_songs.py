@@ -0,0 +1,109 @@
+# songbook/management/commands/lint_songs.py
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from songbook.models import Song, SongLintIssue
+from songbook.utils.chordpro_lint import (
+    SEVERITIES,
+    available_instruments,
+    diagram_coverage,
+    impact_report,
+    lint_chordpro,
+    store_song_issues,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Lint every song's ChordPro (missing chord diagrams per instrument, forced "
+        "variations out of range, unbalanced sections, unknown directives) and "
+        "print the issues sorted by the number of songs they affect"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Songs written per transaction (default 200)")
+        parser.add_argument("--workers", type=int, default=None, help="Lint processes (default: one per CPU, 1 = no pool)")
+        parser.add_argument("--report-only", action="store_true", help="Report the stored issues without re-linting")
+        parser.add_argument("--instrument", action="append", help="Only report this instrument's library checks (repeatable)")
+        parser.add_argument("--code", action="append", choices=sorted(SEVERITIES), help="Only report this issue code (repeatable)")
+        parser.add_argument("--limit", type=int, default=30, help="Report rows to print (default 30, 0 = all)")
+
+    def handle(self, *args, **options):
+        instruments = options["instrument"]
+        unknown = set(instruments or []) - set(available_instruments())
+        if unknown:
+            raise CommandError(f"No chord library for: {', '.join(sorted(unknown))}")
+
+        if not options["report_only"]:
+            self.lint_catalogue(options["batch_size"], options["workers"])
+        self.print_report(instruments, options["code"], options["limit"], options["verbosity"])
+
+    def lint_catalogue(self, batch_size, workers):
+        started = time.monotonic()
+        song_ids = list(Song.objects.order_by("pk").values_list("pk", flat=True))
+        self.stdout.write(f"Linting {len(song_ids)} songs against {', '.join(available_instruments())}")
+
+        pool = None
+        if workers != 1 and len(song_ids) > batch_size:
+            pool = ProcessPoolExecutor(max_workers=workers)
+
+        done = stored = 0
+        try:
+            for offset in range(0, len(song_ids), batch_size):
+                rows = list(
+                    Song.objects.filter(pk__in=song_ids[offset:offset + batch_size])
+                    .order_by("pk").values_list("pk", "songChordPro")
+                )
+                texts = [chordpro for _pk, chordpro in rows]
+                if pool is None:
+                    results = map(lint_chordpro, texts)
+                else:
+                    results = pool.map(lint_chordpro, texts, chunksize=max(1, len(texts) // 16))
+                stored += store_song_issues({pk: issues for (pk, _text), issues in zip(rows, results)})
+
+                done += len(rows)
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"  [{done}/{len(song_ids)}] {stored} issues, {done / elapsed:.0f} songs/s")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Linted {done} songs in {elapsed:.1f}s: {stored} issues."))
+
+    def print_report(self, instruments, codes, limit, verbosity):
+        self.stdout.write("\nDiagram coverage:")
+        for row in diagram_coverage(instruments):
+            self.stdout.write(
+                f"  {row['instrument']:<18} {row['chords_used'] - row['missing']}/{row['chords_used']} chords, "
+                f"{row['missing']} missing, {row['songs_affected']} songs affected"
+            )
+
+        issues = SongLintIssue.objects.all()
+        if instruments:
+            # Song-level checks have no instrument and always stay in the report
+            issues = issues.filter(instrument__in=[*instruments, ""])
+        if codes:
+            issues = issues.filter(code__in=codes)
+
+        rows = impact_report(issues)
+        if not rows:
+            self.stdout.write(self.style.SUCCESS("\nNo lint issues."))
+            return
+
+        self.stdout.write(f"\nIssues by impact ({len(rows)} distinct):")
+        for row in rows[:limit or None]:
+            where = f" [{row['instrument']}]" if row["instrument"] else ""
+            line = f"  {row['songs']:>5} songs  {row['severity']:<7} {row['code']}{where} {row['token']}"
+            if verbosity > 1:
+                titles = (
+                    issues.filter(code=row["code"], instrument=row["instrument"], token=row["token"])
+                    .values_list("song__songTitle", flat=True).distinct()[:3]
+                )
+                line += f" (e.g. {', '.join(titles)})"
+            self.stdout.write(line)
+        if limit and len(rows) > limit:
+            self.stdout.write(f"  ... {len(rows) - limit} more (use --limit 0 to show all)")
@@ -0,0 +1,46 @@
+# songbook/management/commands/rebuild_song_indexes.py
+
+from django.core.management.base import BaseCommand
+
+from songbook.models import Song, SongSearchDocument
+from songbook.utils.search import index_songs, rebuild_fts
+from songbook.utils.artists import rebuild_artists
+from songbook.utils.chord_index import rebuild_chord_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the derived song indexes (accent-insensitive search index, artist index, chord index)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of songs indexed per batch (default 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        songs = Song.objects.only("pk", "songTitle", "metadata", "lyrics_with_chords")
+
+        # Drop documents of songs that no longer exist, then refresh the rest
+        SongSearchDocument.objects.exclude(song__in=Song.objects.all()).delete()
+
+        indexed = 0
+        batch = []
+        for song in songs.iterator(chunk_size=batch_size):
+            batch.append(song)
+            if len(batch) >= batch_size:
+                indexed += index_songs(batch)
+                batch = []
+        if batch:
+            indexed += index_songs(batch)
+
+        rebuild_fts()
+        self.stdout.write(self.style.SUCCESS(f"Search index: {indexed} songs indexed."))
+
+        artists = rebuild_artists()
+        self.stdout.write(self.style.SUCCESS(f"Artist index: {artists} artists."))
+
+        occurrences = rebuild_chord_index(batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Chord index: {occurrences} chord occurrences."))
@@ -0,0 +1,121 @@
+# songbook/management/commands/reparse_songs.py
+
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from songbook.models import Song, refresh_song_indexes
+from songbook.parsers import DERIVED_SONG_FIELDS, PARSER_VERSION, derive_song_fields, source_hash
+from songbook.utils.artists import song_artist_slot
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-derive lyrics_with_chords, metadata and the other parsed Song columns "
+        "from songChordPro, skipping songs already parsed by the current parser"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Songs written per transaction (default 200)")
+        parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: one per CPU, 1 = no pool)")
+        parser.add_argument("--force", action="store_true", help="Reparse every song, even when its hash is current")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        started = time.monotonic()
+
+        stale = self.find_stale_songs(options["force"])
+        total = Song.objects.count()
+        self.stdout.write(
+            f"Parser v{PARSER_VERSION}: {len(stale)} of {total} songs to reparse"
+            + (" (dry run)" if options["dry_run"] else "")
+        )
+        if not stale:
+            return
+
+        pool = None
+        if options["workers"] != 1 and len(stale) > batch_size:
+            pool = ProcessPoolExecutor(max_workers=options["workers"])
+
+        diff = Counter()
+        examples = {}
+        done = rewritten = 0
+        try:
+            for offset in range(0, len(stale), batch_size):
+                batch = list(Song.objects.filter(pk__in=stale[offset:offset + batch_size]).order_by("pk"))
+                changed, hash_only = self.reparse_batch(batch, pool, diff, examples)
+                if not options["dry_run"]:
+                    self.write_batch(changed, hash_only)
+
+                done += len(batch)
+                rewritten += len(changed)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"  [{done}/{len(stale)}] {rewritten} changed, {done / elapsed:.0f} songs/s"
+                )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write("Changed fields:" if diff else "No derived data changed.")
+        for field, count in diff.most_common():
+            line = f"  {field}: {count} songs"
+            if options["verbosity"] > 1:
+                line += f" (e.g. {', '.join(examples[field])})"
+            self.stdout.write(line)
+
+        verb = "Would update" if options["dry_run"] else "Updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {rewritten} of {done} reparsed songs in {elapsed:.1f}s "
+            f"({done / elapsed:.0f} songs/s)."
+        ))
+
+    def find_stale_songs(self, force):
+        """Ids of songs whose stored parse doesn't match their current ChordPro."""
+        rows = Song.objects.order_by("pk").values_list("pk", "songChordPro", "parsed_hash")
+        return [
+            pk for pk, chordpro, parsed_hash in rows.iterator(chunk_size=1000)
+            if force or parsed_hash != source_hash(chordpro)
+        ]
+
+    def reparse_batch(self, batch, pool, diff, examples):
+        chordpros = [song.songChordPro for song in batch]
+        titles = [song.songTitle for song in batch]
+        if pool is None:
+            results = map(derive_song_fields, chordpros, titles)
+        else:
+            results = pool.map(derive_song_fields, chordpros, titles, chunksize=max(1, len(batch) // 16))
+
+        changed, hash_only = [], []
+        for song, fields in zip(batch, results):
+            fields_changed = [
+                name for name, value in fields.items()
+                if name != "parsed_hash" and getattr(song, name) != value
+            ]
+            song._previous_artist_slot = song_artist_slot(song)
+            for name, value in fields.items():
+                setattr(song, name, value)
+
+            if fields_changed:
+                song.mark_changed()
+                changed.append(song)
+                for name in fields_changed:
+                    diff[name] += 1
+                    examples.setdefault(name, [])
+                    if len(examples[name]) < 3:
+                        examples[name].append(song.songTitle or f"#{song.pk}")
+            else:
+                hash_only.append(song)
+        return changed, hash_only
+
+    def write_batch(self, changed, hash_only):
+        with transaction.atomic():
+            Song.objects.bulk_update(changed, DERIVED_SONG_FIELDS + Song.VERSION_FIELDS)
+            Song.objects.bulk_update(hash_only, ["parsed_hash"])
+        if changed:
+            refresh_song_indexes(changed, [song._previous_artist_slot for song in changed])
@@ -0,0 +1,69 @@
+# songbook/management/commands/run_render_jobs.py
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from songbook.utils.render_queue import claim_job, prune_jobs, requeue_stale_jobs, run_job
+
+PRUNE_EVERY = 600  # seconds
+REQUEUE_EVERY = 30  # seconds
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued PDF render jobs (songbook exports, rehearsal packs). "
+        "At most PDF_RENDER_CONCURRENCY jobs run at once across all workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=None,
+                            help="Render threads in this worker (default PDF_RENDER_CONCURRENCY)")
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds between polls of an empty queue (default 1)")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        pruned = prune_jobs()
+        if requeued or pruned:
+            self.stdout.write(f"Requeued {requeued} stale job(s), pruned {pruned} expired job(s).")
+
+        threads = [
+            threading.Thread(target=self.work, args=(options,), daemon=True)
+            for _ in range(max(1, options["threads"] or settings.PDF_RENDER_CONCURRENCY))
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping; running jobs will be requeued by the next worker.")
+
+    def work(self, options):
+        last_prune = last_requeue = time.monotonic()
+        try:
+            while True:
+                close_old_connections()
+                job = claim_job()
+                if job is not None:
+                    started = time.monotonic()
+                    run_job(job)
+                    self.stdout.write(f"{job.kind} job {job.token}: {job.status} in {time.monotonic() - started:.1f}s")
+                    continue
+                if options["once"]:
+                    return
+                if time.monotonic() - last_requeue > REQUEUE_EVERY:
+                    # Jobs of workers that died since (their lease ran out)
+                    requeue_stale_jobs()
+                    last_requeue = time.monotonic()
+                if time.monotonic() - last_prune > PRUNE_EVERY:
+                    prune_jobs()
+                    last_prune = time.monotonic()
+                time.sleep(options["poll"])
+        finally:
+            connection.close()
@@ -1,28 +1,23 @@
 from django.core.management.base import BaseCommand
-from songbook.models import Song
-import re
+from songbook.utils.chord_index import chord_usage_counts
+
 
 class Command(BaseCommand):
-    help = "Scan all Song records and extract all unique chords used in songChordPro"
+    help = "List all unique chords used in songChordPro (read from the chord index)"
 
-    # Match ANYTHING inside brackets [ ... ] that looks like a chord
-    CHORD_REGEX = re.compile(
-        r'\[([A-G][#b]?[a-zA-Z0-9+\-]*)\]'
-    )
+    def add_arguments(self, parser):
+        parser.add_argument("--counts", action="store_true", help="Show how many songs use each chord")
 
     def handle(self, *args, **options):
-        all_chords = set()
-
-        for song in Song.objects.all():
-            text = song.songChordPro or ""
-            # Extract chords in brackets
-            matches = self.CHORD_REGEX.findall(text)
-            for chord in matches:
-                all_chords.add(chord.strip())
+        # The index holds every bracketed token; keep the chord-looking ones as before
+        usage = [row for row in chord_usage_counts() if row[0][:1] in "ABCDEFG"]
 
         # Output
         self.stdout.write("\n🎸 ALL UNIQUE CHORDS USED IN DATABASE:")
-        for chord in sorted(all_chords):
-            self.stdout.write(f"  {chord}")
+        for token, occurrences, songs in sorted(usage):
+            if options["counts"]:
+                self.stdout.write(f"  {token:<12} {songs} songs, {occurrences} times")
+            else:
+                self.stdout.write(f"  {token}")
 
-        self.stdout.write(f"\nTotal unique chords: {len(all_chords)}\n")
+        self.stdout.write(f"\nTotal unique chords: {len(usage)}\n")
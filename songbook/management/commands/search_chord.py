@@ -1,36 +1,42 @@
 from django.core.management.base import BaseCommand
-from songbook.models import Song
-import re
+from songbook.utils.chord_index import chord_matches, normalize_chord_token, split_line
+
 
 class Command(BaseCommand):
-    help = "Search for any bracketed chord-like token across all songs."
+    help = "Search for any bracketed chord-like token across all songs (uses the chord index)."
 
     def add_arguments(self, parser):
         parser.add_argument("token", type=str, help="Chord or token to search for, e.g. 'Feb-ru-ar-y' or 'Fadd9'")
+        parser.add_argument(
+            "--exact",
+            action="store_true",
+            help="Match the token as written (by default 'Bb7', 'A#7' and 'Bb7///' all match)",
+        )
 
     def handle(self, *args, **options):
         token = options["token"]
-        pattern = re.compile(rf'\[{re.escape(token)}\]')
-
-        self.stdout.write(f"\n🔍 Searching for: [{token}]\n")
+        label = token if options["exact"] else f"{token} (as {normalize_chord_token(token)})"
 
-        found = False
+        self.stdout.write(f"\n🔍 Searching for: [{label}]\n")
 
-        for song in Song.objects.all():
-            text = song.songChordPro or ""
+        matches = chord_matches(token, exact=options["exact"])
 
-            if re.search(pattern, text):
-                found = True
-                self.stdout.write(f"🎵 Found in: {song.songTitle} (ID {song.id})")
+        for match in matches:
+            song = match["song"]
+            self.stdout.write(f"🎵 Found in: {song.songTitle} (ID {song.id})")
 
-                # Show lines where it occurs
-                for line in text.splitlines():
-                    if re.search(pattern, line):
-                        self.stdout.write(f"   ➜ {line.strip()}")
+            # Show lines where it occurs, tokens marked with » «
+            for line in match["lines"]:
+                text = "".join(
+                    f"»{segment}«" if is_token else segment
+                    for segment, is_token in split_line(line["text"], line["columns"])
+                )
+                self.stdout.write(f"   ➜ {line['line_number']:>3}: {text.strip()}")
 
-                self.stdout.write("")  # spacer
+            self.stdout.write("")  # spacer
 
-        if not found:
+        if not matches:
             self.stdout.write("❌ No matches found.\n")
         else:
-            self.stdout.write("✔️ Search complete.\n")
+            self.stdout.write(f"✔️ Search complete: {len(matches)} songs.\n")
+
@@ -0,0 +1,144 @@
+# Generated by Django 5.2.2 on 2026-10-19 11:34
+
+import logging
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+from unidecode import unidecode
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "songbook_song_fts"
+DOC_TABLE = "songbook_songsearchdocument"
+FTS_COLUMNS = "title, artist, songwriter, tags, lyrics"
+
+MARKUP_TAG_RE = re.compile(r"<[^>]+>")
+
+
+# Folding as songbook/utils/search.py did when this migration was written;
+# kept here so later changes to that module don't alter this migration.
+def fold_text(text):
+    if not text:
+        return ""
+    return unidecode(str(text)).lower().strip()
+
+
+def extract_lyric_text(lyrics_with_chords):
+    words = []
+    for group in lyrics_with_chords or []:
+        if not isinstance(group, list):
+            continue
+        for item in group:
+            if isinstance(item, dict) and item.get("lyric"):
+                words.append(item["lyric"])
+            elif isinstance(item, dict) and item.get("format") == "LINEBREAK":
+                words.append("\n")
+        words.append("\n")
+    return MARKUP_TAG_RE.sub("", "".join(words))
+
+
+def build_search_fields(title, metadata, lyrics_with_chords, tag_names):
+    metadata = metadata or {}
+    return {
+        "title": fold_text(title),
+        "artist": fold_text(metadata.get("artist")),
+        "songwriter": fold_text(metadata.get("songwriter")),
+        "tags": fold_text(" ".join(sorted(tag_names))),
+        "lyrics": fold_text(extract_lyric_text(lyrics_with_chords)),
+    }
+
+
+def create_fts_index(apps, schema_editor):
+    """SQLite only: FTS5 mirror of the document table, kept in sync by triggers."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    cols = FTS_COLUMNS
+    new_cols = ", ".join(f"new.{c.strip()}" for c in cols.split(","))
+    old_cols = ", ".join(f"old.{c.strip()}" for c in cols.split(","))
+
+    statements = [
+        f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            {cols},
+            content='{DOC_TABLE}', content_rowid='song_id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOC_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.song_id, {new_cols});
+        END""",
+        f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOC_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.song_id, {old_cols});
+        END""",
+        f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOC_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.song_id, {old_cols});
+            INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.song_id, {new_cols});
+        END""",
+    ]
+    try:
+        for sql in statements:
+            schema_editor.execute(sql)
+    except Exception as e:
+        # SQLite built without FTS5: searches use the LIKE fallback instead
+        logger.warning("FTS5 unavailable, song search will use the LIKE fallback: %s", e)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for trigger in ("ai", "ad", "au"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def populate_search_documents(apps, schema_editor):
+    Song = apps.get_model("songbook", "Song")
+    SongSearchDocument = apps.get_model("songbook", "SongSearchDocument")
+    TaggedItem = apps.get_model("taggit", "TaggedItem")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+
+    tag_names = {}
+    content_type = ContentType.objects.filter(app_label="songbook", model="song").first()
+    if content_type:
+        tagged = TaggedItem.objects.filter(content_type=content_type).values_list("object_id", "tag__name")
+        for object_id, name in tagged:
+            tag_names.setdefault(object_id, []).append(name)
+
+    batch = []
+    songs = Song.objects.only("pk", "songTitle", "metadata", "lyrics_with_chords")
+    for song in songs.iterator(chunk_size=500):
+        batch.append(SongSearchDocument(
+            song_id=song.pk,
+            **build_search_fields(song.songTitle, song.metadata, song.lyrics_with_chords,
+                                  tag_names.get(song.pk, [])),
+        ))
+        if len(batch) >= 500:
+            SongSearchDocument.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        SongSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0013_alter_song_chords_used'),
+        ('taggit', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SongSearchDocument',
+            fields=[
+                ('song', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='songbook.song')),
+                ('title', models.TextField(blank=True, default='')),
+                ('artist', models.TextField(blank=True, default='')),
+                ('songwriter', models.TextField(blank=True, default='')),
+                ('tags', models.TextField(blank=True, default='')),
+                ('lyrics', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.RunPython(create_fts_index, reverse_code=drop_fts_index),
+        migrations.RunPython(populate_search_documents, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.2 on 2026-10-19 11:36
+
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+from unidecode import unidecode
+
+
+# Artist keys as songbook/utils/artists.py computed them when this migration
+# was written; kept here so later changes to that module don't alter it.
+def artist_sort_key(name):
+    if not name:
+        return ""
+    return unidecode(str(name)).lower().strip()[:200]
+
+
+def populate_artist_index(apps, schema_editor):
+    Song = apps.get_model("songbook", "Song")
+    Artist = apps.get_model("songbook", "Artist")
+
+    changed = []
+    spellings = defaultdict(Counter)  # (site_name, sort_key) -> Counter of display names
+    for song in Song.objects.only("pk", "site_name", "metadata").iterator(chunk_size=500):
+        name = (song.metadata or {}).get("artist")
+        song.artist_key = artist_sort_key(name)
+        if song.artist_key:
+            changed.append(song)
+            spellings[(song.site_name, song.artist_key)][str(name).strip()] += 1
+    Song.objects.bulk_update(changed, ["artist_key"], batch_size=500)
+
+    Artist.objects.bulk_create([
+        Artist(site_name=site_name, sort_key=key, name=counter.most_common(1)[0][0],
+               first_letter=key[:1].upper(), song_count=sum(counter.values()))
+        for (site_name, key), counter in spellings.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0014_songsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Artist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('site_name', models.CharField(blank=True, max_length=20, null=True)),
+                ('name', models.CharField(max_length=200)),
+                ('sort_key', models.CharField(help_text='Accent-folded, lower-cased name', max_length=200)),
+                ('first_letter', models.CharField(max_length=1)),
+                ('song_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['sort_key'],
+            },
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='artist_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['site_name', 'artist_key'], name='song_site_artist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artist',
+            index=models.Index(fields=['site_name', 'first_letter', 'sort_key'], name='artist_site_letter_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='artist',
+            unique_together={('site_name', 'sort_key')},
+        ),
+        migrations.RunPython(populate_artist_index, reverse_code=migrations.RunPython.noop),
+    ]
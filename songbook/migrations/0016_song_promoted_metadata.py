@@ -0,0 +1,43 @@
+# Generated by Django 5.2.2 on 2026-10-19 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0015_artist_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='artist',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='capo',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='tempo',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='time_signature',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='year',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
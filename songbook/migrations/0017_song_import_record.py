@@ -0,0 +1,25 @@
+# Generated by Django 5.2.2 on 2026-10-19 11:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0016_song_promoted_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SongImportRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(help_text='SHA-256 of the file contents', max_length=64, unique=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('source_format', models.CharField(max_length=30)),
+                ('imported_at', models.DateTimeField(auto_now_add=True)),
+                ('song', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_records', to='songbook.song')),
+            ],
+        ),
+    ]
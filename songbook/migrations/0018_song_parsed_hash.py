@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-19 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0017_song_import_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='parsed_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
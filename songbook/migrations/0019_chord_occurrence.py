@@ -0,0 +1,50 @@
+# Generated by Django 5.2.2 on 2026-10-19 11:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from songbook.utils.chord_index import chord_occurrences
+
+
+def populate_chord_index(apps, schema_editor):
+    Song = apps.get_model("songbook", "Song")
+    ChordOccurrence = apps.get_model("songbook", "ChordOccurrence")
+
+    batch = []
+    for song in Song.objects.only("pk", "songChordPro").iterator(chunk_size=500):
+        for token, normalized, line_number, column, line_text in chord_occurrences(song.songChordPro):
+            batch.append(ChordOccurrence(
+                song_id=song.pk, token=token, normalized=normalized,
+                line_number=line_number, column=column, line_text=line_text,
+            ))
+        if len(batch) >= 2000:
+            ChordOccurrence.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ChordOccurrence.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0018_song_parsed_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChordOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(help_text="Token as written, e.g. 'Bb7'", max_length=50)),
+                ('normalized', models.CharField(help_text="Canonical form, e.g. 'A#7'", max_length=50)),
+                ('line_number', models.PositiveIntegerField()),
+                ('column', models.PositiveIntegerField(help_text="Offset of the '[' in the line")),
+                ('line_text', models.CharField(max_length=300)),
+                ('song', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chord_occurrences', to='songbook.song')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['normalized', 'song'], name='chord_occ_normalized_idx'), models.Index(fields=['token', 'song'], name='chord_occ_token_idx')],
+            },
+        ),
+        migrations.RunPython(populate_chord_index, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-19 11:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0019_chord_occurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SongLintIssue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(help_text="e.g. 'missing_diagram'", max_length=30)),
+                ('severity', models.CharField(choices=[('error', 'Error'), ('warning', 'Warning')], max_length=10)),
+                ('instrument', models.CharField(blank=True, help_text='Set for chord library checks', max_length=30)),
+                ('token', models.CharField(blank=True, help_text='Chord or directive concerned', max_length=50)),
+                ('line_number', models.PositiveIntegerField(blank=True, null=True)),
+                ('message', models.CharField(max_length=255)),
+                ('song', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lint_issues', to='songbook.song')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['code', 'instrument', 'token'], name='lint_issue_code_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.2 on 2026-10-19 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0020_song_lint_issue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='content_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
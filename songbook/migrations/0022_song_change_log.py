@@ -0,0 +1,21 @@
+# Generated by Django 5.2.2 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0021_song_content_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SongChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('song_id', models.PositiveIntegerField(unique=True)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
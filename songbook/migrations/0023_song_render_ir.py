@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-19 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0022_song_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='render_ir',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.2 on 2026-10-19 12:23
+
+import django.db.models.deletion
+import songbook.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0025_renderjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfCacheStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('misses', models.PositiveIntegerField(default=0)),
+                ('prewarmed', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='not_before',
+            field=models.DateTimeField(blank=True, help_text='Not claimed before this time', null=True),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='priority',
+            field=models.SmallIntegerField(default=0, help_text='Lower runs first'),
+        ),
+        migrations.CreateModel(
+            name='RenderedPdf',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='SHA-256 of the render inputs', max_length=64, unique=True)),
+                ('content_version', models.PositiveIntegerField()),
+                ('file', models.FileField(upload_to=songbook.models.rendered_pdf_path)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('source', models.CharField(choices=[('request', 'Request'), ('prewarm', 'Pre-warm')], max_length=10)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('song', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rendered_pdfs', to='songbook.song')),
+            ],
+        ),
+    ]
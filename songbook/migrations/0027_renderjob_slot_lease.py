@@ -0,0 +1,27 @@
+# Generated by Django 5.2.2 on 2026-10-19 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('songbook', '0026_rendered_pdf_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='renderjob',
+            name='lease_until',
+            field=models.DateTimeField(blank=True, help_text='Requeued if its worker stops renewing this', null=True),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='slot',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Concurrency slot held while running', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='renderjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'running')), fields=('slot',), name='render_job_running_slot'),
+        ),
+    ]
@@ -5,13 +5,13 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 import re
 import json
+import uuid
 from .parsers import parse_song_data  # Import the parse_song_data function
 from .utils.transposer import detect_key
 from taggit.managers import TaggableManager
 from django.conf import settings
 from django.utils import timezone
 from .parsers import parse_song_data  # adjust as per your structure
-from songbook.utils.teleprompter_renderer import render_lyrics_with_chords_html
 
 import re
 from django.db import models
@@ -19,9 +19,16 @@ from django.utils import timezone
 from django.urls import reverse
 from taggit.managers import TaggableManager
 from django.conf import settings
-from .parsers import parse_song_data
-from songbook.utils.teleprompter_renderer import render_lyrics_with_chords_html
-from songbook.utils.transposer import extract_chords
+from .parsers import parse_song_data, parse_chordpro_metadata, derive_song_fields
+from songbook.utils.render_ir import song_render_ir, transpose_ir
+from songbook.utils.search import index_songs
+from songbook.utils.chord_index import index_song_chords
+from songbook.utils.chordpro_lint import lint_songs
+from songbook.utils.artists import refresh_artists, song_artist_slot
+from songbook.utils.sync import log_song_changes
+from songbook.utils.pdf_cache import prewarm_songs
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
 
 
 
@@ -81,63 +88,71 @@ class Song(models.Model):
         help_text="Comma-separated list of unique chords used in this song"
     )
 
+    # Folded artist name, kept in sync with metadata["artist"] (see utils/artists.py)
+    artist_key = models.CharField(max_length=200, blank=True, default="", editable=False)
+
+    # Hot metadata keys promoted to indexed columns (see parsers.promoted_metadata_fields).
+    # Backfill existing rows with: python manage.py backfill_song_metadata
+    artist = models.CharField(max_length=200, blank=True, default="", editable=False, db_index=True)
+    year = models.PositiveSmallIntegerField(null=True, blank=True, editable=False, db_index=True)
+    key = models.CharField(max_length=20, blank=True, default="", editable=False, db_index=True)
+    tempo = models.PositiveSmallIntegerField(null=True, blank=True, editable=False, db_index=True)
+    capo = models.CharField(max_length=20, blank=True, default="", editable=False)
+    time_signature = models.CharField(max_length=10, blank=True, default="", editable=False, db_index=True)
+
+    # Render-ready form of lyrics_with_chords shared by the PDF, chord sheet and
+    # teleprompter renderers (see utils/render_ir.py)
+    render_ir = models.JSONField(default=dict, blank=True, editable=False)
+
+    # parsers.source_hash() of the songChordPro the derived fields were built from;
+    # reparse_songs skips songs whose hash is current
+    parsed_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
+
+    # Bumped on every change; the chord sheet / teleprompter ETags are built
+    # from it (see utils/http_cache.py). Bulk writers call mark_changed()
+    # and include VERSION_FIELDS in their bulk_update.
+    content_version = models.PositiveIntegerField(default=1, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    VERSION_FIELDS = ["content_version", "updated_at"]
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["site_name", "artist_key"], name="song_site_artist_idx"),
+        ]
+
     def save(self, *args, **kwargs):
+        self._previous_artist_slot = None
         if self.pk:
-            old_song = Song.objects.get(pk=self.pk)
-            if old_song.songChordPro != self.songChordPro:
-                self.date_posted = timezone.now().date()
-
-        if self.songChordPro:
-            if not self.songTitle:
-                self.songTitle, self.metadata = self.parse_metadata_from_chordpro()
-            else:
-                _, self.metadata = self.parse_metadata_from_chordpro()
-            self.lyrics_with_chords = parse_song_data(self.songChordPro)
-            # 🆕 Populate chords_used
-            self.chords_used = ",".join(extract_chords(self.lyrics_with_chords, unique=True))
-        else:
-            self.metadata = {}
-            self.lyrics_with_chords = []
-            self.chords_used = []  # 🆕
+            old_song = Song.objects.filter(pk=self.pk).first()
+            if old_song:
+                self._previous_artist_slot = song_artist_slot(old_song)
+                if old_song.songChordPro != self.songChordPro:
+                    self.date_posted = timezone.now().date()
+
+        for field, value in derive_song_fields(self.songChordPro, self.songTitle).items():
+            setattr(self, field, value)
 
-        if self.lyrics_with_chords and self.metadata.get("suggested_alternate"):
-            suggested = self.metadata["suggested_alternate"]
-            for chord_dict in self.lyrics_with_chords:
-                if isinstance(chord_dict, dict):
-                    chord_dict["suggested_alternate"] = suggested
+        if self.pk:
+            self.mark_changed()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], *self.VERSION_FIELDS}
 
         super().save(*args, **kwargs)
 
+    def mark_changed(self):
+        """New content version, for writers that bypass save()."""
+        self.content_version = (self.content_version or 0) + 1
+        self.updated_at = timezone.now()
+
     def parse_metadata_from_chordpro(self):
-        tags = {
-            "title": re.search(r'{(?:title|t):\s*([^\}]+)}', self.songChordPro, re.IGNORECASE | re.UNICODE),
-            "comment": re.search(r'{(?:comment|c):\s*(.+?)}', self.songChordPro, re.IGNORECASE | re.UNICODE),
-            "artist": re.search(r'{artist:\s*([^\}]+)}', self.songChordPro, re.IGNORECASE | re.UNICODE),
-            "songwriter": re.search(r'{songwriter:\s*([^\}]+)}', self.songChordPro, re.IGNORECASE | re.UNICODE),
-            "capo": re.search(r'{capo:\s*([^\}]+)}', self.songChordPro, re.IGNORECASE | re.UNICODE),
-            "album": re.search(r'{album:\s*(.+?)}', self.songChordPro, re.IGNORECASE | re.UNICODE),
-            "year": re.search(r'{year:\s*(\d{4})}', self.songChordPro, re.IGNORECASE),
-            "key": re.search(r'{key:\s*(.+?)}', self.songChordPro, re.IGNORECASE),
-            "1stnote": re.search(r'{1stnote:\s*(.+?)}', self.songChordPro, re.IGNORECASE),
-            "tempo": re.search(r'{tempo:\s*(.+?)}', self.songChordPro, re.IGNORECASE),
-            "timeSignature": re.search(r'{timeSignature:\s*(.+?)}', self.songChordPro, re.IGNORECASE),
-            "youtube": re.search(r'{youtube:\s*(https?://[^\s\}]+)}', self.songChordPro, re.IGNORECASE),
-            # 🆕 NEW TAGS for header short notes
-            "count_in": re.search(r'{count_in:\s*(.+?)}', self.songChordPro, re.IGNORECASE | re.UNICODE),
-            "short_instruction_1": re.search(r'{short_instruction_1:\s*(.+?)}', self.songChordPro, re.IGNORECASE | re.UNICODE),
-            "short_instruction_2": re.search(r'{short_instruction_2:\s*(.+?)}', self.songChordPro, re.IGNORECASE | re.UNICODE),
-            # NEW TAG  for alternate chord
-            "suggested_alternate": re.search(r'{suggested_alternate:\s*([^\}]+)}', self.songChordPro, re.IGNORECASE | re.UNICODE
-),
-
-        }
-        metadata = {tag: match.group(1) if match else None for tag, match in tags.items()}
-        title = metadata.pop("title", "Untitled Song")
-        return title, metadata
+        return parse_chordpro_metadata(self.songChordPro)
 
     def render_lyrics_with_chords_html(self, site_name="StrumSphere", transpose_value=0):
-        lyrics_data = self.lyrics_with_chords
-        return render_lyrics_with_chords_html(lyrics_data, site_name=site_name)
+        from songbook.utils.teleprompter_renderer import render_lyrics_with_chords_html
+
+        render_ir = transpose_ir(song_render_ir(self, site_name), transpose_value)
+        return render_lyrics_with_chords_html(render_ir)
 
     def __str__(self):
         # 🆕 UPDATE THIS to show privacy status
@@ -181,9 +196,266 @@ class SongFormatting(models.Model):
     outro = models.JSONField(default=dict, blank=True)
     centered = models.JSONField(default=dict, blank=True)
 
+    # Part of the PDF style-set cache key (pdf_generator.get_paragraph_styles)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('user', 'song')  # Ensure each user has only one formatting per song
 
     def __str__(self):
-        return f"Formatting for {self.song.songTitle} by {self.user.username}"
\ No newline at end of file
+        return f"Formatting for {self.song.songTitle} by {self.user.username}"
+
+class SongSearchDocument(models.Model):
+    """
+    Accent-folded searchable text for a Song (see songbook/utils/search.py).
+    Mirrored into the SQLite FTS5 table songbook_song_fts by triggers.
+    """
+    song = models.OneToOneField(
+        Song,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    title = models.TextField(blank=True, default="")
+    artist = models.TextField(blank=True, default="")
+    songwriter = models.TextField(blank=True, default="")
+    tags = models.TextField(blank=True, default="")
+    lyrics = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"Search document for song {self.song_id}"
+
+
+class Artist(models.Model):
+    """
+    One row per artist and site, maintained from Song saves (see utils/artists.py).
+    """
+    site_name = models.CharField(max_length=20, null=True, blank=True)
+    name = models.CharField(max_length=200)
+    sort_key = models.CharField(max_length=200, help_text="Accent-folded, lower-cased name")
+    first_letter = models.CharField(max_length=1)
+    song_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["sort_key"]
+        unique_together = ("site_name", "sort_key")
+        indexes = [
+            models.Index(fields=["site_name", "first_letter", "sort_key"], name="artist_site_letter_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ChordOccurrence(models.Model):
+    """
+    One bracketed chord token in a song (see utils/chord_index.py).
+    """
+    song = models.ForeignKey(Song, on_delete=models.CASCADE, related_name="chord_occurrences")
+    token = models.CharField(max_length=50, help_text="Token as written, e.g. 'Bb7'")
+    normalized = models.CharField(max_length=50, help_text="Canonical form, e.g. 'A#7'")
+    line_number = models.PositiveIntegerField()
+    column = models.PositiveIntegerField(help_text="Offset of the '[' in the line")
+    line_text = models.CharField(max_length=300)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["normalized", "song"], name="chord_occ_normalized_idx"),
+            models.Index(fields=["token", "song"], name="chord_occ_token_idx"),
+        ]
+
+    def __str__(self):
+        return f"[{self.token}] in song {self.song_id}, line {self.line_number}"
+
+
+class SongImportRecord(models.Model):
+    """
+    Ledger of imported files, keyed by content hash, so interrupted or repeated
+    imports skip the files already done (see utils/chordpro_import.py).
+    """
+    file_hash = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the file contents")
+    file_name = models.CharField(max_length=255)
+    source_format = models.CharField(max_length=30)
+    song = models.ForeignKey(Song, null=True, blank=True, on_delete=models.SET_NULL, related_name="import_records")
+    imported_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.file_name} ({self.source_format})"
+
+
+class SongLintIssue(models.Model):
+    """
+    One ChordPro lint finding for a song (see utils/chordpro_lint.py).
+    """
+    SEVERITY_CHOICES = [("error", "Error"), ("warning", "Warning")]
+
+    song = models.ForeignKey(Song, on_delete=models.CASCADE, related_name="lint_issues")
+    code = models.CharField(max_length=30, help_text="e.g. 'missing_diagram'")
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES)
+    instrument = models.CharField(max_length=30, blank=True, help_text="Set for chord library checks")
+    token = models.CharField(max_length=50, blank=True, help_text="Chord or directive concerned")
+    line_number = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["code", "instrument", "token"], name="lint_issue_code_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.code} in song {self.song_id}: {self.message}"
+
+
+class SongChangeLog(models.Model):
+    """
+    Latest change of each song, read by the sync API (see utils/sync.py).
+    A change replaces the song's row, so the auto-increment id orders the
+    changes and doubles as the sync token. song_id is a plain integer so the
+    row outlives a deleted song.
+    """
+    song_id = models.PositiveIntegerField(unique=True)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Song {self.song_id} changed at {self.changed_at:%Y-%m-%d %H:%M}"
+
+
+def render_job_path(job, filename):
+    return f"render_jobs/{job.token}/{filename}"
+
+
+class RenderJob(models.Model):
+    """
+    A queued PDF render (see utils/render_queue.py), run by
+    `manage.py run_render_jobs`. Requests with the same key share the job
+    while it is queued or running. A running job holds one of the
+    PDF_RENDER_CONCURRENCY slots and a lease its worker keeps renewing.
+    """
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, help_text="Used in the status and download URLs")
+    kind = models.CharField(max_length=30, help_text="Renderer, e.g. 'songs' or 'setlist_pack'")
+    params = models.JSONField(default=dict)
+    key = models.CharField(max_length=64, help_text="SHA-256 of kind, params and user")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.FileField(upload_to=render_job_path, blank=True)
+    error = models.TextField(blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Lower runs first")
+    not_before = models.DateTimeField(null=True, blank=True, help_text="Not claimed before this time")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    slot = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Concurrency slot held while running")
+    lease_until = models.DateTimeField(null=True, blank=True, help_text="Requeued if its worker stops renewing this")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"], condition=models.Q(status__in=["queued", "running"]), name="render_job_active_key"
+            ),
+            models.UniqueConstraint(
+                fields=["slot"], condition=models.Q(status="running"), name="render_job_running_slot"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="render_job_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.token} ({self.status})"
+
+
+def rendered_pdf_path(entry, filename):
+    return f"rendered_pdfs/{entry.song_id}/{filename}"
+
+
+class RenderedPdf(models.Model):
+    """
+    A rendered song PDF kept for reuse (see utils/pdf_cache.py). The key covers
+    everything the render depends on: song version, site, transposition,
+    formatting and the viewer's chord preferences.
+    """
+    SOURCE_CHOICES = [("request", "Request"), ("prewarm", "Pre-warm")]
+
+    key = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the render inputs")
+    song = models.ForeignKey(Song, on_delete=models.CASCADE, related_name="rendered_pdfs")
+    content_version = models.PositiveIntegerField()
+    file = models.FileField(upload_to=rendered_pdf_path)
+    size = models.PositiveIntegerField(default=0)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"PDF of song {self.song_id} v{self.content_version} ({self.source})"
+
+
+class PdfCacheStat(models.Model):
+    """Daily counters of the rendered-PDF cache, for the hit-ratio dashboard."""
+    day = models.DateField(unique=True)
+    hits = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+    prewarmed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"PDF cache {self.day}: {self.hits} hits, {self.misses} misses"
+
+
+# -------------------------------------------------------------
+# Keep derived indexes in sync with Song edits
+# -------------------------------------------------------------
+def refresh_song_indexes(songs, previous_artist_slots=()):
+    """
+    Bring the derived indexes up to date for `songs`. Called by the post_save
+    receiver, and directly by bulk writers (importers) that bypass signals.
+    """
+    songs = list(songs)
+    index_songs(songs)
+    index_song_chords(songs)
+    lint_songs(songs)
+    log_song_changes(song.pk for song in songs)
+    refresh_artists([song_artist_slot(song) for song in songs] + [slot for slot in previous_artist_slots if slot])
+
+
+@receiver(post_save, sender=Song)
+def update_song_indexes(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_song_indexes([instance], [getattr(instance, "_previous_artist_slot", None)])
+    prewarm_songs([instance])
+
+
+@receiver(post_delete, sender=Song)
+def update_song_indexes_on_delete(sender, instance, **kwargs):
+    refresh_artists([song_artist_slot(instance)])
+    log_song_changes([instance.pk])
+
+
+@receiver(m2m_changed, sender=Song.tags.through)
+def update_song_indexes_on_tag_change(sender, instance, action, **kwargs):
+    if isinstance(instance, Song) and action in ("post_add", "post_remove", "post_clear"):
+        index_songs([instance])
+        Song.objects.filter(pk=instance.pk).update(
+            content_version=models.F("content_version") + 1, updated_at=timezone.now()
+        )
+        log_song_changes([instance.pk])
+
+
+@receiver(post_delete, sender=RenderedPdf)
+def delete_rendered_pdf_file(sender, instance, **kwargs):
+    instance.file.delete(save=False)
+
+
+@receiver([post_save, post_delete], sender=SongFormatting)
+def bump_song_version_on_formatting_change(sender, instance, raw=False, **kwargs):
+    # The chord sheet is rendered with the formatting, so its ETag must change
+    if raw:
+        return
+    Song.objects.filter(pk=instance.song_id).update(
+        content_version=models.F("content_version") + 1, updated_at=timezone.now()
+    )
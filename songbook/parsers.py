@@ -1,5 +1,9 @@
+import hashlib
 import re
 
+from songbook.utils.metrics import span
+from songbook.utils.render_ir import IR_VERSION, build_render_ir
+
 def parse_song_data(chordpro_text):
     paragraphs = chordpro_text.strip().split("\n\n")
     result = []
@@ -75,3 +79,136 @@ def parse_song_data(chordpro_text):
             result.append([{"format": "PARAGRAPHBREAK"}])
 
     return result
+
+
+# -------------------------------------------------------------
+# Metadata directives ({title: ...}, {artist: ...}, ...)
+# -------------------------------------------------------------
+METADATA_PATTERNS = {
+    "title": re.compile(r'{(?:title|t):\s*([^\}]+)}', re.IGNORECASE | re.UNICODE),
+    "comment": re.compile(r'{(?:comment|c):\s*(.+?)}', re.IGNORECASE | re.UNICODE),
+    "artist": re.compile(r'{artist:\s*([^\}]+)}', re.IGNORECASE | re.UNICODE),
+    "songwriter": re.compile(r'{songwriter:\s*([^\}]+)}', re.IGNORECASE | re.UNICODE),
+    "capo": re.compile(r'{capo:\s*([^\}]+)}', re.IGNORECASE | re.UNICODE),
+    "album": re.compile(r'{album:\s*(.+?)}', re.IGNORECASE | re.UNICODE),
+    "year": re.compile(r'{year:\s*(\d{4})}', re.IGNORECASE),
+    "key": re.compile(r'{key:\s*(.+?)}', re.IGNORECASE),
+    "1stnote": re.compile(r'{1stnote:\s*(.+?)}', re.IGNORECASE),
+    "tempo": re.compile(r'{tempo:\s*(.+?)}', re.IGNORECASE),
+    "timeSignature": re.compile(r'{timeSignature:\s*(.+?)}', re.IGNORECASE),
+    "youtube": re.compile(r'{youtube:\s*(https?://[^\s\}]+)}', re.IGNORECASE),
+    # Header short notes
+    "count_in": re.compile(r'{count_in:\s*(.+?)}', re.IGNORECASE | re.UNICODE),
+    "short_instruction_1": re.compile(r'{short_instruction_1:\s*(.+?)}', re.IGNORECASE | re.UNICODE),
+    "short_instruction_2": re.compile(r'{short_instruction_2:\s*(.+?)}', re.IGNORECASE | re.UNICODE),
+    # Alternate chord
+    "suggested_alternate": re.compile(r'{suggested_alternate:\s*([^\}]+)}', re.IGNORECASE | re.UNICODE),
+}
+
+
+def parse_chordpro_metadata(chordpro_text):
+    """
+    Extract metadata directives from ChordPro text.
+    Returns (title, metadata) where metadata holds every other directive (None if absent).
+    """
+    metadata = {}
+    for tag, pattern in METADATA_PATTERNS.items():
+        match = pattern.search(chordpro_text)
+        metadata[tag] = match.group(1) if match else None
+    title = metadata.pop("title", "Untitled Song")
+    return title, metadata
+
+
+def _text(value):
+    """Metadata values as text: imported metadata may hold numbers or lists."""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_text(item) for item in value)
+    return str(value)
+
+
+def _clean(value, max_length):
+    return _text(value).strip()[:max_length]
+
+
+def _leading_int(value):
+    match = re.match(r'\s*(\d+)', _text(value))
+    return int(match.group(1)) if match else None
+
+
+def promoted_metadata_fields(metadata):
+    """
+    Values of the Song columns promoted from metadata for indexed sorting/filtering.
+    Keep in sync with the fields declared on Song.
+    """
+    metadata = metadata or {}
+    year = _leading_int(metadata.get("year"))
+    tempo = _leading_int(metadata.get("tempo"))
+    return {
+        "artist": _clean(metadata.get("artist"), 200),
+        "year": year if year and year < 10000 else None,
+        "key": _clean(metadata.get("key"), 20),
+        "tempo": tempo if tempo and tempo < 1000 else None,
+        "capo": _clean(metadata.get("capo"), 20),
+        "time_signature": _clean(metadata.get("timeSignature"), 10),
+    }
+
+
+PROMOTED_METADATA_FIELDS = ["artist", "year", "key", "tempo", "capo", "time_signature"]
+
+
+# Bump whenever parse_song_data / the metadata parsing changes its output, so
+# `manage.py reparse_songs` treats every stored parse as stale (a new
+# render_ir.IR_VERSION does the same).
+PARSER_VERSION = 1
+
+
+def source_hash(chordpro_text):
+    """Fingerprint of the parser input, stored on Song.parsed_hash."""
+    payload = f"{PARSER_VERSION}.{IR_VERSION}\0{chordpro_text or ''}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+@span("parse")
+def derive_song_fields(chordpro_text, title=None):
+    """
+    Every Song column derived from songChordPro, as a dict of field values.
+    Pure (no database access), so Song.save() and the bulk importers share it
+    and imports can run it in worker processes.
+    `title` is kept when given, otherwise taken from the {title:} directive.
+    """
+    from songbook.utils.artists import artist_sort_key
+    from songbook.utils.transposer import extract_chords
+
+    if chordpro_text:
+        parsed_title, metadata = parse_chordpro_metadata(chordpro_text)
+        lyrics_with_chords = parse_song_data(chordpro_text)
+        # First-appearance order (not set order) so reparses give identical output
+        chords_used = ",".join(dict.fromkeys(extract_chords(lyrics_with_chords)))
+    else:
+        parsed_title, metadata = title, {}
+        lyrics_with_chords = []
+        chords_used = ""
+
+    if lyrics_with_chords and metadata.get("suggested_alternate"):
+        suggested = metadata["suggested_alternate"]
+        for chord_dict in lyrics_with_chords:
+            if isinstance(chord_dict, dict):
+                chord_dict["suggested_alternate"] = suggested
+
+    fields = {
+        "songTitle": title or parsed_title,
+        "metadata": metadata,
+        "lyrics_with_chords": lyrics_with_chords,
+        "chords_used": chords_used,
+        "render_ir": build_render_ir(lyrics_with_chords),
+    }
+    fields.update(promoted_metadata_fields(metadata))
+    fields["artist_key"] = artist_sort_key(fields["artist"])
+    fields["parsed_hash"] = source_hash(chordpro_text)
+    return fields
+
+
+DERIVED_SONG_FIELDS = ["songTitle", "metadata", "lyrics_with_chords", "chords_used", "render_ir",
+                       *PROMOTED_METADATA_FIELDS, "artist_key", "parsed_hash"]
@@ -75,13 +75,16 @@ function padTo6Strings(positions) {
   return positions.slice(-6); // trim if too many
 }
 
-function drawChordDiagram(container, chord) {
+// options.color: stroke/fill colour (white on the dark teleprompter by default)
+// options.prefs: { isLefty, instrument } instead of window.userPreferences
+function drawChordDiagram(container, chord, options = {}) {
   if (!container) {
     console.error("❌ drawChordDiagram called with no container");
     return;
   }
 
-  const prefs = window.userPreferences || {};
+  const prefs = options.prefs || window.userPreferences || {};
+  const color = options.color || "white";
   console.log("📦 Preferences in JS:", prefs);
 
   // 🎸 Extract positions + baseFret from chord (support both schemas)
@@ -149,7 +152,7 @@ function drawChordDiagram(container, chord) {
   title.setAttribute("font-family", "Helvetica");
   title.setAttribute("font-size", "28");
   title.setAttribute("font-weight", "bold");
-  title.setAttribute("fill", "white");
+  title.setAttribute("fill", color);
   title.textContent = name;
   svg.appendChild(title);
 
@@ -161,7 +164,7 @@ function drawChordDiagram(container, chord) {
     line.setAttribute("y1", 40);
     line.setAttribute("x2", x);
     line.setAttribute("y2", 40 + fretCount * fretSpacing);
-    line.setAttribute("stroke", "white");
+    line.setAttribute("stroke", color);
     line.setAttribute("stroke-width", "2");
     svg.appendChild(line);
   }
@@ -174,7 +177,7 @@ function drawChordDiagram(container, chord) {
     fretLine.setAttribute("y1", y);
     fretLine.setAttribute("x2", 20 + (stringCount - 1) * stringSpacing);
     fretLine.setAttribute("y2", y);
-    fretLine.setAttribute("stroke", "white");
+    fretLine.setAttribute("stroke", color);
     fretLine.setAttribute("stroke-width", j === 0 && baseFret === 1 ? 4 : 2);
     svg.appendChild(fretLine);
   }
@@ -186,7 +189,7 @@ function drawChordDiagram(container, chord) {
     fretLabel.setAttribute("y", 55);
     fretLabel.setAttribute("font-family", "Helvetica");
     fretLabel.setAttribute("font-size", "30px");
-    fretLabel.setAttribute("fill", "white");
+    fretLabel.setAttribute("fill", color);
     fretLabel.textContent = `${baseFret}`;
     svg.appendChild(fretLabel);
   }
@@ -204,7 +207,7 @@ function drawChordDiagram(container, chord) {
       rect.setAttribute("width", x2 - x1 + 2 * radius);
       rect.setAttribute("height", 2 * radius);
       rect.setAttribute("rx", 4);
-      rect.setAttribute("fill", "white");
+      rect.setAttribute("fill", color);
       svg.appendChild(rect);
     }
   }
@@ -220,7 +223,7 @@ function drawChordDiagram(container, chord) {
       circle.setAttribute("cx", x);
       circle.setAttribute("cy", y);
       circle.setAttribute("r", radius);
-      circle.setAttribute("fill", "white");
+      circle.setAttribute("fill", color);
       svg.appendChild(circle);
     } else if (instrument === "guitar") {
       // ✅ Only guitar shows open/muted markers
@@ -230,7 +233,7 @@ function drawChordDiagram(container, chord) {
         o.setAttribute("y", 30);
         o.setAttribute("text-anchor", "middle");
         o.setAttribute("font-size", "12");
-        o.setAttribute("fill", "white");
+        o.setAttribute("fill", color);
         o.textContent = "O";
         svg.appendChild(o);
       } else if (fret === -1) {
@@ -239,7 +242,7 @@ function drawChordDiagram(container, chord) {
         xMark.setAttribute("y", 30);
         xMark.setAttribute("text-anchor", "middle");
         xMark.setAttribute("font-size", "12");
-        xMark.setAttribute("fill", "white");
+        xMark.setAttribute("fill", color);
         xMark.textContent = "X";
         svg.appendChild(xMark);
       }
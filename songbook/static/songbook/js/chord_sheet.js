@@ -0,0 +1,179 @@
+/* chord_sheet.js
+   HTML chord sheet (song page): transposes the rendered song in the browser
+   and draws the chord footer, without a round trip to the PDF renderer.
+
+   - Chords are <b class="chord" data-chord="Am"> elements rendered by
+     songbook/utils/chord_sheet_html.py; only their .chord-name text changes.
+   - Transposition mirrors songbook/utils/transposer.py (transpose_chord).
+   - Footer diagrams follow load_relevant_chords: variation 0, variations
+     forced by the song ([C(1)], suggested_alternate), or every alternate
+     when the user asked for them; known chords are left out if the
+     known-chord filter is on.
+   - The chord library is the versioned chord JSON (cached by the browser).
+   Needs chord_diagrams.js (drawChordDiagram, cleanChordName).
+*/
+
+(function () {
+  "use strict";
+
+  const NOTES_SHARP = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"];
+  const NOTES_FLAT = ["C", "Db", "D", "Eb", "E", "F", "Gb", "G", "Ab", "A", "Bb", "B"];
+  const ENHARMONIC_EQUIVALENTS = {
+    "B#": "C", "E#": "F", "Cb": "B", "Fb": "E",
+    "A#": "Bb", "D#": "Eb", "G#": "G#",
+    "Bb": "A#", "Eb": "D#", "Ab": "G#",
+  };
+  const REQUESTED_VARIATION = /^([A-G][#b]?m?(?:add\d+)?)(?:\((\d+)\))?$/;
+
+  // -----------------------------
+  // Transposition (transposer.py)
+  // -----------------------------
+  function normalizeChord(chord) {
+    return ENHARMONIC_EQUIVALENTS[chord] || chord;
+  }
+
+  function cleanChord(chord) {
+    if (!chord) return "";
+    chord = chord.trim();
+    if (chord.toUpperCase() === "[N.C.]") return chord;
+    chord = chord.replace(/\/+$/, "");
+    chord = chord.replace(/\/[A-G][#b]?$/, "");
+    chord = chord.replace(/maj7/gi, "M7").replace(/Δ7/g, "M7");
+    return chord.replace(/^[\[\s]+|[\]\s]+$/g, "");
+  }
+
+  function transposeChord(chord, semitones) {
+    if (!semitones || chord.trim().toUpperCase() === "[N.C.]") return chord;
+
+    const split = chord.length > 1 && "#b".includes(chord[1]) ? 2 : 1;
+    let root = chord.slice(0, split);
+    const suffix = chord.slice(split);
+    if (!NOTES_SHARP.includes(root) && !NOTES_FLAT.includes(root)) return chord;
+
+    root = ENHARMONIC_EQUIVALENTS[root] || root;
+    const notes = NOTES_SHARP.includes(root) ? NOTES_SHARP : NOTES_FLAT;
+    const index = (((notes.indexOf(root) + semitones) % 12) + 12) % 12;
+    return normalizeChord(notes[index]) + suffix;
+  }
+
+  function baseName(chord) {
+    const match = chord.match(REQUESTED_VARIATION);
+    return match ? match[1] : chord;
+  }
+
+  // -----------------------------
+  // Footer selection (load_relevant_chords)
+  // -----------------------------
+  function selectVariations(base, variations, config, requested) {
+    const result = variations.length ? [variations[0]] : [];
+    const forced = requested[base];
+    if (forced) {
+      forced.forEach((index) => {
+        if (index !== 0 && index < variations.length && !result.includes(variations[index])) {
+          result.push(variations[index]);
+        }
+      });
+      return result;
+    }
+    if (config.showAlternates) {
+      variations.slice(1).forEach((variation) => result.push(variation));
+    }
+    return result;
+  }
+
+  function footerChords(usedChords, semitones, config, library) {
+    // Variations the song forces follow the chord when it is transposed
+    const requested = {};
+    Object.entries(config.requestedVariations || {}).forEach(([base, indexes]) => {
+      requested[transposeChord(base, semitones)] = indexes;
+    });
+    const known = new Set(config.knownChords || []);
+    const explicitlyRequested = new Set(
+      (config.explicitlyRequested || []).map((chord) => normalizeChord(transposeChord(chord, semitones)).toLowerCase())
+    );
+
+    const transposed = new Set(
+      usedChords.map((chord) => transposeChord(cleanChord(normalizeChord(cleanChord(chord))).trim(), semitones).trim())
+    );
+
+    const chords = [];
+    const added = new Set();
+    transposed.forEach((chord) => {
+      if (!chord) return;
+      const base = baseName(chord);
+      const entry = library.get(cleanChordName(base));
+      if (!entry || added.has(entry.name.toLowerCase())) return;
+
+      const normalized = normalizeChord(entry.name).toLowerCase();
+      if (known.has(normalized) && !explicitlyRequested.has(normalized)) return;
+
+      added.add(entry.name.toLowerCase());
+      chords.push({ name: entry.name, variations: selectVariations(base, entry.variations || [], config, requested) });
+    });
+    return chords;
+  }
+
+  // -----------------------------
+  // Chord sheet
+  // -----------------------------
+  function ChordSheet(root, config) {
+    const chordEls = Array.from(root.querySelectorAll(".chord[data-chord]"));
+    const usedChords = [...new Set(chordEls.map((el) => el.dataset.chord))];
+    const footer = document.getElementById("chord-sheet-footer");
+    const printLinks = document.querySelectorAll("[data-pdf-url]");
+    let library = null;
+    let semitones = 0;
+
+    function drawFooter() {
+      if (!footer || !library) return;
+      footer.innerHTML = "";
+      const prefs = { isLefty: config.isLefty, instrument: config.instrument };
+      footerChords(usedChords, semitones, config, library).forEach((chord) => {
+        chord.variations.forEach((variation) => {
+          const wrap = document.createElement("div");
+          wrap.className = "chord-sheet-diagram";
+          drawChordDiagram(
+            wrap,
+            { name: chord.name, variations: [variation], barre: variation.barre },
+            { color: "black", prefs }
+          );
+          footer.appendChild(wrap);
+        });
+      });
+    }
+
+    function transpose(value) {
+      semitones = parseInt(value, 10) || 0;
+      chordEls.forEach((el) => {
+        el.querySelector(".chord-name").textContent = transposeChord(el.dataset.chord, semitones);
+      });
+      printLinks.forEach((link) => {
+        const url = new URL(link.dataset.pdfUrl, window.location.origin);
+        url.searchParams.set("transpose", semitones);
+        link.href = url.pathname + url.search;
+      });
+      drawFooter();
+    }
+
+    fetch(config.chordLibraryUrl)
+      .then((res) => res.json())
+      .then((chords) => {
+        library = new Map();
+        chords.forEach((chord) => {
+          const key = cleanChordName(chord.name);
+          if (!library.has(key)) library.set(key, chord);
+        });
+        drawFooter();
+      })
+      .catch((err) => console.error("❌ Could not load the chord library:", err));
+
+    return { transpose };
+  }
+
+  document.addEventListener("DOMContentLoaded", () => {
+    const root = document.getElementById("chord-sheet");
+    const configEl = document.getElementById("chord-sheet-config");
+    if (!root || !configEl) return;
+    window.ChordSheet = ChordSheet(root, JSON.parse(configEl.textContent));
+  });
+})();
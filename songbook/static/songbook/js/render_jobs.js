@@ -0,0 +1,32 @@
+/* render_jobs.js
+   Client side of the background PDF renders (songbook/utils/render_queue.py).
+
+   startRenderJob(url, options) sends the request (fetch options: method,
+   body...), expects the 202 answer of a queuing view, polls status_url until
+   the job is done, then navigates to download_url so the browser saves the
+   file. onStatus(status) is called on each poll, for progress messages.
+*/
+
+(function () {
+  "use strict";
+
+  const POLL_MS = 1000;
+
+  async function readJob(response) {
+    const data = await response.json().catch(() => ({}));
+    if (!response.ok) throw new Error(data.error || `HTTP ${response.status}`);
+    return data;
+  }
+
+  window.startRenderJob = async function (url, options = {}, onStatus = () => {}) {
+    let job = await readJob(await fetch(url, { credentials: "same-origin", ...options }));
+    while (job.status === "queued" || job.status === "running") {
+      onStatus(job.status);
+      await new Promise((resolve) => setTimeout(resolve, POLL_MS));
+      job = await readJob(await fetch(job.status_url, { credentials: "same-origin" }));
+    }
+    onStatus(job.status);
+    if (job.status !== "done") throw new Error(job.error || "The PDF could not be generated.");
+    window.location.href = job.download_url;
+  };
+})();
@@ -0,0 +1,1010 @@
+import gzip
+import html
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+from PIL import ImageChops
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+from songbook.models import (
+    Artist, PdfCacheStat, RenderedPdf, RenderJob, Song, SongChangeLog, SongFormatting, SongImportRecord, SongLintIssue,
+)
+from songbook.parsers import parse_song_data, promoted_metadata_fields, source_hash
+from songbook.utils import (
+    chord_index, chordpro_export, chordpro_lint, markup, metrics, pdf_cache, pdf_import, render_queue, search, sync,
+)
+from songbook.utils.chord_sheet_html import render_lyrics_html
+from songbook.utils.chordpro_import import ChordProImporter, collect_files
+from songbook.utils.http_cache import chord_json_url
+from songbook.utils import pdf_generator
+from songbook.utils.pdf_generator import SectionFlowable, build_lyrics_elements, get_paragraph_styles
+from songbook.utils import render_ir
+from songbook.utils.render_ir import build_render_ir, localize_ir
+from songbook.views.song_display_views import SongListView
+
+CHORUS_HEAVY_SONG = "\n\n".join(
+    [
+        "{soi}\n{instruction: Fingerpicking}\n[C]Intro <r>line</r> [G]here\n{eoi}",
+        "{sov}\nQuand le [C]so-[G]leil ri[Am]sing\n-[F]dash and [C]more\n{eov}",
+    ]
+    + [
+        f"{{soc}}\n{{instruction: x{n}}}\n<h>[F]Refrain</h> [G7]line {n}\n[C]second <blue>line</blue>\n"
+        f"[Am]third line that is long enough to wrap in the lyrics column of the section table\n{{eoc}}"
+        for n in range(1, 13)
+    ]
+    + [
+        "{page}",
+        "{sob}\n[D/F#]Bridge [Em]line\n{eob}",
+        "{sos}\nCentered [C]text\n{eos}",
+    ]
+)
+
+
+def table_section(section):
+    """The one-row Table build_lyrics_elements used before SectionFlowable."""
+    table = Table([[section.label, section.lyrics]], colWidths=[60, 500], hAlign="CENTER")
+    table.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 2),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    return table
+
+
+class SectionFlowableRasterTests(SimpleTestCase):
+    """SectionFlowable must draw pixel for pixel what the section Tables drew."""
+
+    def lyrics_elements(self, site_name):
+        ir = localize_ir(build_render_ir(parse_song_data(CHORUS_HEAVY_SONG)), site_name)
+        styles = getSampleStyleSheet()
+        return build_lyrics_elements(ir, get_paragraph_styles(None), styles["BodyText"], chord_color="red")
+
+    def render_pages(self, elements):
+        import pdfplumber
+
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=2, bottomMargin=80, leftMargin=20, rightMargin=20)
+        doc.build(elements + [PageBreak()])
+        buffer.seek(0)
+        with pdfplumber.open(buffer) as pdf:
+            return [page.to_image(resolution=100).original.convert("RGB") for page in pdf.pages]
+
+    def test_matches_table_layout(self):
+        for site_name in ("FrancoUke", "StrumSphere"):
+            with self.subTest(site_name=site_name):
+                elements = self.lyrics_elements(site_name)
+                self.assertTrue(any(isinstance(e, SectionFlowable) for e in elements))
+                reference = [
+                    table_section(e) if isinstance(e, SectionFlowable) else e
+                    for e in self.lyrics_elements(site_name)
+                ]
+
+                pages = self.render_pages(elements)
+                reference_pages = self.render_pages(reference)
+                self.assertGreater(len(pages), 2)
+                self.assertEqual(len(pages), len(reference_pages))
+                for number, (page, expected) in enumerate(zip(pages, reference_pages), start=1):
+                    self.assertIsNone(
+                        ImageChops.difference(page, expected).getbbox(),
+                        f"page {number} differs from the Table layout",
+                    )
+
+    def test_splits_section_taller_than_a_page(self):
+        lines = "\n".join(f"[C]line {n}" for n in range(120))
+        ir = localize_ir(build_render_ir(parse_song_data(f"{{soc}}\n{lines}\n{{eoc}}")), "StrumSphere")
+        styles = getSampleStyleSheet()
+        elements = build_lyrics_elements(ir, get_paragraph_styles(None), styles["BodyText"])
+        # A one-row Table raised LayoutError here
+        self.assertGreater(len(self.render_pages(elements)), 2)
+
+
+# Stacks only the renderers need: loaded on first render, never at startup
+HEAVY_PACKAGES = ("reportlab", "PIL", "pdfplumber", "pdfminer", "pypdfium2")
+# Whole startup (django.setup() + URLconf) measured at ~0.6 s; fail well above it
+IMPORT_TIME_BUDGET_MS = 1500
+
+
+class ImportTimeBudgetTests(SimpleTestCase):
+    """Startup of every manage.py command, test run and worker, per `python -X importtime`."""
+
+    def import_times(self):
+        code = f"import django; django.setup(); import {settings.ROOT_URLCONF}"
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "FrancoUke.settings"))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, _, module = line[len("import time:"):].split("|")
+            times[module.strip()] = int(self_us)
+        return times
+
+    def test_startup_skips_rendering_stacks(self):
+        times = self.import_times()
+        heavy = sorted(module for module in times if module.split(".")[0] in HEAVY_PACKAGES)
+        self.assertEqual(heavy, [], "imported at startup; import them where they are first used")
+        self.assertLess(sum(times.values()) / 1000, IMPORT_TIME_BUDGET_MS)
+
+
+class PrometheusExportTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_span_histogram(self):
+        with metrics.span("layout"):
+            pass
+        metrics.observe("songbook_span_seconds", 0.3, span="layout")
+        metrics.inc("songbook_requests_total", view='a"b', status="2xx")
+
+        lines = metrics.render_prometheus().splitlines()
+        self.assertIn("# TYPE songbook_span_seconds histogram", lines)
+        self.assertIn('songbook_span_seconds_bucket{span="layout",le="0.25"} 1', lines)
+        self.assertIn('songbook_span_seconds_bucket{span="layout",le="0.5"} 2', lines)
+        self.assertIn('songbook_span_seconds_bucket{span="layout",le="+Inf"} 2', lines)
+        self.assertIn('songbook_span_seconds_count{span="layout"} 2', lines)
+        self.assertIn('songbook_requests_total{status="2xx",view="a\\"b"} 1', lines)
+
+
+@override_settings(PDF_RENDER_CONCURRENCY=2, PDF_PREWARM_PER_MINUTE=20, PDF_RENDER_JOB_LEASE_SECONDS=60)
+class RenderQueueTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, True)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        render_queue.renderer("test")(lambda job: (f"{job.params['n']}.txt", b"done"))
+        self.addCleanup(render_queue.RENDERERS.pop, "test")
+        self.user = get_user_model().objects.create_user("queue", email="queue@example.com")
+
+    def enqueue(self, n, **kwargs):
+        return render_queue.enqueue_render("test", {"n": n}, **kwargs)
+
+    def test_identical_requests_share_a_job(self):
+        job = self.enqueue(1)
+        self.assertEqual(self.enqueue(1).pk, job.pk)
+        self.assertNotEqual(self.enqueue(1, user=self.user).pk, job.pk)
+        self.assertNotEqual(self.enqueue(2).pk, job.pk)
+
+        render_queue.run_job(render_queue.claim_job())
+        self.assertNotEqual(self.enqueue(1).pk, job.pk)  # done: a new request renders again
+
+    def test_claim_order_and_not_before(self):
+        later = self.enqueue(1, priority=10)
+        held = self.enqueue(2, delay=timedelta(minutes=5))
+        first = self.enqueue(3)
+
+        self.assertEqual(render_queue.claim_job().pk, first.pk)
+        self.assertEqual(render_queue.claim_job().pk, later.pk)
+        held.refresh_from_db()
+        self.assertEqual(held.status, RenderJob.QUEUED)
+
+    def test_running_jobs_never_exceed_concurrency(self):
+        for n in range(4):
+            self.enqueue(n)
+        claimed = [render_queue.claim_job(), render_queue.claim_job()]
+        self.assertEqual({job.slot for job in claimed}, {0, 1})
+        self.assertIsNone(render_queue.claim_job())
+
+        render_queue.run_job(claimed[0])
+        self.assertEqual(render_queue.claim_job().slot, claimed[0].slot)
+
+    def test_running_slot_is_exclusive(self):
+        self.enqueue(1)
+        self.enqueue(2)
+        job = render_queue.claim_job()
+        other = RenderJob.objects.get(status=RenderJob.QUEUED)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RenderJob.objects.filter(pk=other.pk).update(status=RenderJob.RUNNING, slot=job.slot)
+
+    @override_settings(PDF_PREWARM_PER_MINUTE=1)
+    def test_rate_limit(self):
+        song = Song.objects.create(songTitle="Rate", songChordPro="[C]la", site_name="FrancoUke", contributor=self.user)
+        RenderJob.objects.all().delete()  # the save's own pre-warm job
+        render_queue.enqueue_render("prewarm", {"song_id": song.pk, "site_name": "FrancoUke", "n": 1})
+        render_queue.enqueue_render("prewarm", {"song_id": song.pk, "site_name": "FrancoUke", "n": 2})
+        test_job = self.enqueue(1, priority=5)
+
+        self.assertEqual(render_queue.claim_job().kind, "prewarm")
+        self.assertEqual(render_queue.claim_job().pk, test_job.pk)  # second pre-warm waits a minute
+        self.assertIsNone(render_queue.claim_job())
+
+    def test_expired_lease_is_requeued_and_old_claim_dropped(self):
+        self.enqueue(1)
+        stalled = render_queue.claim_job()
+        self.assertEqual(render_queue.requeue_stale_jobs(), 0)  # lease still running
+
+        RenderJob.objects.filter(pk=stalled.pk).update(lease_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(render_queue.requeue_stale_jobs(), 1)
+        reclaimed = render_queue.claim_job()
+        self.assertEqual(reclaimed.pk, stalled.pk)
+
+        with self.assertLogs("songbook.utils.render_queue", "WARNING"):
+            render_queue.run_job(stalled)  # the stalled worker finishes late
+        job = RenderJob.objects.get(pk=stalled.pk)
+        self.assertEqual(job.status, RenderJob.RUNNING)
+        self.assertFalse(job.result)
+
+        render_queue.run_job(reclaimed)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.slot, job.result.read()), (RenderJob.DONE, None, b"done"))
+
+    def test_failed_job_keeps_error(self):
+        render_queue.renderer("broken")(lambda job: 1 / 0)
+        self.addCleanup(render_queue.RENDERERS.pop, "broken")
+        render_queue.enqueue_render("broken", {})
+        with self.assertLogs("songbook.utils.render_queue", "ERROR"):
+            render_queue.run_job(render_queue.claim_job())
+        job = RenderJob.objects.get(kind="broken")
+        self.assertEqual((job.status, job.error, job.slot), (RenderJob.FAILED, "division by zero", None))
+
+    @override_settings(PDF_RENDER_JOB_TTL_HOURS=24)
+    def test_prune_deletes_expired_jobs_and_files(self):
+        self.enqueue(1)
+        self.enqueue(2)
+        old, recent = render_queue.claim_job(), render_queue.claim_job()
+        render_queue.run_job(old)
+        render_queue.run_job(recent)
+        RenderJob.objects.filter(pk=old.pk).update(finished_at=timezone.now() - timedelta(hours=25))
+        old_file = RenderJob.objects.get(pk=old.pk).result
+
+        self.assertEqual(render_queue.prune_jobs(), 1)
+        self.assertFalse(RenderJob.objects.filter(pk=old.pk).exists())
+        self.assertFalse(old_file.storage.exists(old_file.name))
+        self.assertTrue(RenderJob.objects.filter(pk=recent.pk).exists())
+
+
+class SongSearchTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.owner = users.create_user("searcher", email="searcher@example.com")
+        self.other = users.create_user("private", email="private@example.com")
+
+    def song(self, title, chordpro="", contributor=None, is_public=True, site_name="FrancoUke"):
+        return Song.objects.create(
+            songTitle=title, songChordPro=chordpro or f"{{title: {title}}}\n[C]la la",
+            contributor=contributor or self.owner, is_public=is_public, site_name=site_name,
+        )
+
+    def test_fold_text(self):
+        self.assertEqual(search.fold_text("  Été à CHANÇON "), "ete a chancon")
+        self.assertEqual(search.query_tokens("L'été, déjà!"), ["l", "ete", "deja"])
+
+    def test_accent_insensitive_ranked_prefix_search(self):
+        in_lyrics = self.song("Chanson", "{title: Chanson}\n[C]Tout l'été [G]ici")
+        in_title = self.song("L'Été indien")
+        self.song("Hiver")
+
+        for fts in (True, False):
+            with self.subTest(fts=fts), mock.patch.object(search, "fts_available", return_value=fts):
+                self.assertEqual(search.search_song_ids("ete"), [in_title.pk, in_lyrics.pk])
+                self.assertEqual(search.search_song_ids("ÉTÉ IND"), [in_title.pk])
+                self.assertEqual(search.search_song_ids("  "), [])
+
+    def test_limit_counts_only_the_songs_shown(self):
+        for n in range(3):
+            self.song(f"Soleil {n}", contributor=self.other, is_public=False)
+        other_site = self.song("Soleil", site_name="StrumSphere")
+        shown = self.song("Soleil levant")
+        visible = Song.objects.filter(site_name="FrancoUke", is_public=True)
+
+        for fts in (True, False):
+            with self.subTest(fts=fts), mock.patch.object(search, "fts_available", return_value=fts):
+                self.assertEqual(len(search.search_song_ids("soleil", limit=1)), 1)
+                self.assertEqual(search.search_song_ids("soleil", limit=1, songs=visible), [shown.pk])
+        self.assertNotIn(other_site.pk, search.search_song_ids("soleil", songs=visible))
+
+    def test_song_list_search_applies_site_and_privacy_first(self):
+        for n in range(3):
+            self.song(f"Soleil {n}", contributor=self.other, is_public=False)
+        shown = self.song("Soleil levant")
+
+        response = self.client.get(reverse("francouke:song_list"), {"q": "soleil"})
+        self.assertEqual([song.pk for song in response.context["songs"]], [shown.pk])
+
+    def test_song_list_pages_reach_every_match(self):
+        matches = [self.song(f"Lune {n}") for n in range(3)]
+
+        with mock.patch.object(SongListView, "paginate_by", 1), mock.patch(
+            "songbook.views.song_display_views.search_song_ids", wraps=search.search_song_ids
+        ) as search_song_ids:
+            pages = [
+                self.client.get(reverse("francouke:song_list"), {"q": "lune", "page": page}).context["songs"]
+                for page in (1, 2, 3)
+            ]
+        self.assertEqual(sorted(song.pk for songs in pages for song in songs), [song.pk for song in matches])
+        self.assertIsNone(search_song_ids.call_args.kwargs.get("limit"))
+
+
+class ChordUsageTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        owner = users.create_user("chords", email="chords@example.com")
+        other = users.create_user("chords2", email="chords2@example.com")
+        for title, chordpro, kwargs in [
+            ("B song", "[Bb7]one\n[C]two [Bb7///]three", {}),
+            ("A song", "[A#7]only", {}),
+            ("C song", "[Bb7]private", {"contributor": other, "is_public": False}),
+            ("D song", "[Bb7]other site", {"site_name": "StrumSphere"}),
+            ("E song", "[C]none", {}),
+        ]:
+            Song.objects.create(songTitle=title, songChordPro=chordpro, **{
+                "contributor": owner, "is_public": True, "site_name": "FrancoUke", **kwargs,
+            })
+
+    def test_matches_are_limited_in_sql_and_load_few_song_columns(self):
+        songs = Song.objects.filter(site_name="FrancoUke", is_public=True)
+        with self.assertNumQueries(2):
+            matches = chord_index.chord_matches("Bb7", songs=songs, limit=1)
+        self.assertEqual([match["song"].songTitle for match in matches], ["A song"])
+        self.assertIn("lyrics_with_chords", matches[0]["song"].get_deferred_fields())
+
+        matches = chord_index.chord_matches("A#7", songs=songs)
+        self.assertEqual([match["song"].songTitle for match in matches], ["A song", "B song"])
+        self.assertEqual([line["columns"] for line in matches[1]["lines"]], [[0], [7]])
+
+    def test_api_counts_visible_songs_and_applies_limit(self):
+        response = self.client.get(reverse("francouke:chord_usage_api"), {"chord": "Bb7", "limit": 1})
+        payload = response.json()
+        self.assertEqual((payload["normalized"], payload["count"]), ("A#7", 2))
+        self.assertEqual([song["title"] for song in payload["songs"]], ["A song"])
+        self.assertEqual(payload["songs"][0]["lines"][0]["html"], "<mark>[A#7]</mark>only")
+
+        exact = self.client.get(reverse("francouke:chord_usage_api"), {"chord": "Bb7", "exact": "1"}).json()
+        self.assertEqual([song["title"] for song in exact["songs"]], ["B song"])
+
+
+class ChordProExportSelectionTests(TestCase):
+    def test_changed_since_follows_edits_not_creation(self):
+        owner = get_user_model().objects.create_user("exporter", email="exporter@example.com")
+        tagged, edited, untouched = [
+            Song.objects.create(songTitle=title, songChordPro="[C]la", contributor=owner, site_name="FrancoUke")
+            for title in ("Tagged", "Edited", "Untouched")
+        ]
+        long_ago = timezone.now() - timedelta(days=30)
+        Song.objects.update(date_posted=long_ago.date(), updated_at=long_ago)
+        SongChangeLog.objects.update(changed_at=long_ago)
+        today = timezone.localdate()
+
+        self.assertEqual(list(chordpro_export.select_songs(changed_since=today)), [])
+        tagged.tags.add("rehearsal")
+        edited.refresh_from_db()
+        edited.is_public = not edited.is_public
+        edited.save()
+
+        selected = chordpro_export.select_songs(changed_since=today)
+        self.assertEqual([song.pk for song in selected], [tagged.pk, edited.pk])
+        self.assertEqual(len(chordpro_export.select_songs(changed_since=today - timedelta(days=31))), 3)
+        self.assertNotIn(untouched.pk, [song.pk for song in selected])
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.owner = users.create_user("tablet", email="tablet@example.com")
+        self.songs = [
+            Song.objects.create(songTitle=title, songChordPro="[C]la", contributor=self.owner, site_name="FrancoUke")
+            for title in ("One", "Two", "Three")
+        ]
+
+    def fetch(self, token=None, page_size=2):
+        params = {"instrument": "ukulele", "page_size": page_size}
+        if token:
+            params["token"] = token
+        response = self.client.get(reverse("francouke:sync_songs"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_snapshot_hands_off_to_deltas(self):
+        first = self.fetch()
+        self.assertTrue(first["snapshot"] and first["has_more"])
+        self.assertEqual([song["id"] for song in first["songs"]], [song.pk for song in self.songs[:2]])
+
+        # Edited after the snapshot started, on a page that was already sent
+        one = self.songs[0]
+        one.songTitle = "One (edited)"
+        one.save()
+
+        second = self.fetch(first["token"])
+        self.assertFalse(second["has_more"])
+        self.assertEqual([song["id"] for song in second["songs"]], [self.songs[2].pk])
+        self.assertNotIn(".", second["token"])
+
+        delta = self.fetch(second["token"])
+        self.assertFalse(delta["snapshot"])
+        self.assertEqual([song["title"] for song in delta["songs"]], ["One (edited)"])
+        self.assertEqual(self.fetch(delta["token"])["songs"], [])
+
+    def test_song_recreated_under_same_pk_between_pages_comes_back_in_deltas(self):
+        first = self.fetch()
+        one = self.songs[0]
+        pk = one.pk
+        one.delete()
+        Song.objects.create(pk=pk, songTitle="One again", songChordPro="[G]la", contributor=self.owner,
+                            site_name="FrancoUke")
+
+        token = first["token"]
+        while True:
+            page = self.fetch(token)
+            token = page["token"]
+            if not page["has_more"]:
+                break
+        delta = self.fetch(token, page_size=100)
+        self.assertEqual([song["title"] for song in delta["songs"]], ["One again"])
+        self.assertEqual(delta["removed"], [])
+
+    def test_privacy_flip_and_delete_are_removed(self):
+        token = self.fetch(page_size=100)["token"]
+        private, deleted = self.songs[:2]
+        private.is_public = False
+        private.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+
+        anonymous = self.fetch(token, page_size=100)
+        self.assertEqual(anonymous["songs"], [])
+        self.assertEqual(sorted(anonymous["removed"]), sorted([private.pk, deleted_pk]))
+
+        # The owner still sees their private song
+        page = sync.sync_page(self.owner, "FrancoUke", "ukulele", token=token)
+        self.assertEqual([song["id"] for song in page["songs"]], [private.pk])
+        self.assertEqual(page["removed"], [deleted_pk])
+
+    def test_invalid_tokens(self):
+        self.assertEqual(sync.parse_sync_token(None), (None, None))
+        self.assertEqual(sync.parse_sync_token("12"), (12, None))
+        self.assertEqual(sync.parse_sync_token("12.40"), (12, 40))
+        ahead = str(sync.current_change_id() + 1)
+        for token in ("abc", "12.x", ".3", ahead):
+            with self.subTest(token=token):
+                with self.assertRaises(sync.InvalidSyncToken):
+                    sync.sync_page(None, "FrancoUke", "ukulele", token=token)
+                response = self.client.get(reverse("francouke:sync_songs"), {"token": token})
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.json()["success"])
+
+
+class PdfCacheTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, True)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        render = mock.patch.object(
+            pdf_cache, "_render", side_effect=lambda song, *args: f"v{song.content_version}".encode()
+        )
+        self.render = render.start()
+        self.addCleanup(render.stop)
+        owner = get_user_model().objects.create_user("cache", email="cache@example.com")
+        self.song = Song.objects.create(songTitle="Cached", songChordPro="[C]la", contributor=owner,
+                                        site_name="FrancoUke")
+
+    def test_hit_miss_and_stale_version_eviction(self):
+        self.assertEqual(pdf_cache.cached_song_pdf(self.song), b"v1")
+        self.assertEqual(pdf_cache.cached_song_pdf(self.song), b"v1")
+        self.assertEqual(self.render.call_count, 1)
+
+        self.song.songChordPro = "[G]la"
+        self.song.save()
+        self.assertEqual(pdf_cache.cached_song_pdf(self.song), b"v2")
+        self.assertEqual(self.render.call_count, 2)
+        self.assertEqual(list(RenderedPdf.objects.values_list("content_version", flat=True)), [2])
+
+        stats = PdfCacheStat.objects.get()
+        self.assertEqual((stats.hits, stats.misses), (1, 2))
+
+    def test_preview_transpose_is_validated_and_bounded(self):
+        url = reverse("francouke:preview_pdf", args=[self.song.pk])
+        self.assertEqual(self.client.get(url, {"transpose": "up"}).status_code, 400)
+
+        for transpose in (1, 13, 25, -11):
+            self.assertEqual(self.client.get(url, {"transpose": transpose}).status_code, 200)
+        self.assertEqual(RenderedPdf.objects.count(), 2)  # 13 and 25 reuse the entry of 1
+        self.assertEqual([call.args[2] for call in self.render.call_args_list], [1, -11])
+
+        pdf_cache.cached_song_pdf(self.song, transpose_value=40)
+        self.assertEqual(RenderedPdf.objects.count(), 2)
+
+    def test_key_follows_chord_library_and_parser(self):
+        args = (self.song, "FrancoUke", 0, {"primary_instrument": "ukulele"}, None)
+        key = pdf_cache.pdf_cache_key(*args)
+        self.assertEqual(pdf_cache.pdf_cache_key(*args), key)
+        with mock.patch.object(pdf_cache, "library_version", return_value="edited"):
+            self.assertNotEqual(pdf_cache.pdf_cache_key(*args), key)
+        with mock.patch.object(pdf_cache, "PARSER_VERSION", pdf_cache.PARSER_VERSION + 1):
+            self.assertNotEqual(pdf_cache.pdf_cache_key(*args), key)
+
+    def test_prewarm_follows_song_versions(self):
+        queued = RenderJob.objects.get(kind="prewarm")
+        self.song.save()
+        self.assertEqual(
+            list(RenderJob.objects.values_list("pk", "params__content_version")), [(queued.pk, 2)]
+        )
+
+        RenderJob.objects.filter(pk=queued.pk).update(status=RenderJob.RUNNING, slot=0)
+        self.song.save()  # saved while the version 2 pre-warm renders
+        self.assertEqual(
+            list(RenderJob.objects.filter(status=RenderJob.QUEUED).values_list("params__content_version", flat=True)),
+            [3],
+        )
+
+
+class PromotedMetadataTests(SimpleTestCase):
+    def test_text_and_non_text_values(self):
+        fields = promoted_metadata_fields({"year": " 1971 (live)", "tempo": "96 bpm", "artist": "  Harmonium "})
+        self.assertEqual((fields["year"], fields["tempo"], fields["artist"]), (1971, 96, "Harmonium"))
+
+        fields = promoted_metadata_fields({"year": 1971, "tempo": [120, 90], "artist": ["A", "B"], "capo": 2})
+        self.assertEqual(
+            (fields["year"], fields["tempo"], fields["artist"], fields["capo"]), (1971, 120, "A, B", "2")
+        )
+        self.assertEqual(promoted_metadata_fields({"year": 20250, "tempo": None})["year"], None)
+        self.assertEqual(promoted_metadata_fields(None)["key"], "")
+
+
+class ChordProImportTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.user = get_user_model().objects.create_user("importer", email="importer@example.com")
+        for title in ("Alpha", "Bad", "Gamma"):
+            with open(os.path.join(self.directory, f"{title}.chordpro"), "w", encoding="utf-8") as f:
+                f.write(f"{{title: {title}}}\n{{artist: Band}}\n[C]la la")
+        self.paths = collect_files(self.directory, [".chordpro"])
+
+    def importer(self, **kwargs):
+        return ChordProImporter("chordpro", contributor=self.user, workers=1, **kwargs)
+
+    def failing_bulk_create(self):
+        # The "Bad" song fails to insert, as a database constraint would make it
+        real_bulk_create = Song.objects.bulk_create
+
+        def bulk_create(songs, *args, **kwargs):
+            if any(song.songTitle == "Bad" for song in songs):
+                raise IntegrityError("bad row")
+            return real_bulk_create(songs, *args, **kwargs)
+
+        return mock.patch.object(Song.objects, "bulk_create", side_effect=bulk_create)
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        with self.failing_bulk_create():
+            report = self.importer(batch_size=10).run(self.paths)
+
+        self.assertEqual(sorted(report.created), ["Alpha", "Gamma"])
+        self.assertEqual([(os.path.basename(path), message) for path, message in report.errors],
+                         [("Bad.chordpro", "IntegrityError: bad row")])
+        self.assertEqual(sorted(Song.objects.values_list("songTitle", flat=True)), ["Alpha", "Gamma"])
+        self.assertEqual(Song.objects.get(songTitle="Alpha").artist, "Band")
+
+    def test_ledger_resumes_where_an_interrupted_run_stopped(self):
+        def interrupt(done, total):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.importer(ledger=True, round_size=1).run(self.paths, progress=interrupt)
+        self.assertEqual(list(Song.objects.values_list("songTitle", flat=True)), ["Alpha"])
+
+        with self.failing_bulk_create():
+            report = self.importer(ledger=True).run(self.paths)
+        self.assertEqual([os.path.basename(path) for path in report.already_imported], ["Alpha.chordpro"])
+        self.assertEqual(report.created, ["Gamma"])
+        self.assertEqual(SongImportRecord.objects.count(), 2)  # the failed file is not recorded
+
+        report = self.importer(ledger=True).run(self.paths)
+        self.assertEqual((len(report.already_imported), report.created), (2, ["Bad"]))
+        self.assertEqual(Song.objects.count(), 3)
+
+    def test_command_contributor(self):
+        out = io.StringIO()
+        call_command("import_chordpro", self.directory, contributor="importer", stdout=out, stderr=io.StringIO())
+        self.assertIn("3 new", out.getvalue())
+        self.assertEqual(set(Song.objects.values_list("contributor__username", flat=True)), {"importer"})
+
+        err = io.StringIO()
+        call_command("import_chordpro", self.directory, contributor="nobody", stdout=io.StringIO(), stderr=err)
+        self.assertIn("'nobody' does not exist", err.getvalue())
+
+
+class SongbookPdfImportTests(TestCase):
+    def test_section_headers_become_directives(self):
+        text = "Verse 1:\nIn this (C)universe of (G)ours\nChorus\nverse after verse\nBridge [Am]la la"
+        lines = pdf_import.convert_pdf_text(text).splitlines()[len(pdf_import.EMPTY_METADATA_LINES):]
+        self.assertEqual(lines, [
+            "{sov}",
+            "In this [C]universe of [G]ours",
+            "{soc}",
+            "verse after verse",
+            "{sob}",
+            "[Am]la la",
+        ])
+
+    def test_rerun_skips_imported_files(self):
+        from reportlab.pdfgen import canvas
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        user = get_user_model().objects.create_user("pdfimporter", email="pdfimporter@example.com")
+        for title in ("Alpha (September 3, 2025)", "Beta"):
+            pdf = canvas.Canvas(os.path.join(directory, f"{title}.pdf"))
+            pdf.drawString(72, 720, "Verse 1:")
+            pdf.drawString(72, 700, f"(C){title} la la")
+            pdf.save()
+
+        def run():
+            out = io.StringIO()
+            call_command("import_songbook_pdf", directory, to_db=True, contributor_id=user.pk, workers=1,
+                         stdout=out, stderr=io.StringIO())
+            return out.getvalue()
+
+        self.assertIn("2 new", run())
+        alpha = Song.objects.get(songTitle="Alpha (September 3, 2025)")
+        self.assertEqual(str(alpha.revised_on), "2025-09-03")
+        self.assertIn("{sov}\n[C]Alpha", alpha.songChordPro)
+        self.assertEqual(SongImportRecord.objects.count(), 2)
+
+        output = run()
+        self.assertIn("0 new", output)
+        self.assertIn("2 already imported", output)
+        self.assertEqual(Song.objects.count(), 2)
+
+
+class ArtistIndexTests(TestCase):
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user("artists", email="artists@example.com")
+
+    def song(self, title, artist, site_name="FrancoUke"):
+        return Song.objects.create(songTitle=title, songChordPro=f"{{title: {title}}}\n{{artist: {artist}}}\n[C]la",
+                                   contributor=self.owner, site_name=site_name)
+
+    def counts(self):
+        return {(artist.site_name, artist.sort_key): (artist.name, artist.first_letter, artist.song_count)
+                for artist in Artist.objects.all()}
+
+    def test_counts_follow_song_changes(self):
+        first = self.song("Un", "Éric Lapointe")
+        second = self.song("Deux", "Éric Lapointe")
+        self.song("Trois", "eric lapointe")
+        self.assertEqual(self.counts(), {("FrancoUke", "eric lapointe"): ("Éric Lapointe", "E", 3)})
+        self.assertEqual(first.artist_key, "eric lapointe")
+
+        first.songChordPro = "{title: Un}\n{artist: Zachary Richard}\n[C]la"
+        first.save()
+        self.assertEqual(self.counts(), {
+            ("FrancoUke", "eric lapointe"): ("Éric Lapointe", "E", 2),
+            ("FrancoUke", "zachary richard"): ("Zachary Richard", "Z", 1),
+        })
+
+        first.site_name = "StrumSphere"
+        first.save()
+        second.site_name = None  # hidden
+        second.save()
+        self.assertEqual(self.counts(), {
+            ("FrancoUke", "eric lapointe"): ("eric lapointe", "E", 1),
+            (None, "eric lapointe"): ("Éric Lapointe", "E", 1),
+            ("StrumSphere", "zachary richard"): ("Zachary Richard", "Z", 1),
+        })
+
+        second.delete()
+        first.is_public = False
+        first.save()
+        self.assertEqual(self.counts(), {
+            ("FrancoUke", "eric lapointe"): ("eric lapointe", "E", 1),
+            ("StrumSphere", "zachary richard"): ("Zachary Richard", "Z", 1),
+        })
+
+    def test_artist_pages_use_the_index(self):
+        self.song("Un", "Éric Lapointe")
+        self.song("Deux", "Eric Lapointe")
+        self.song("Trois", "Beau Dommage")
+        self.song("Quatre", "Éric Lapointe", site_name="StrumSphere")
+        Artist.objects.filter(sort_key="beau dommage").update(name="Beau Dommage (index)")
+
+        response = self.client.get(reverse("francouke:artist_list"))
+        self.assertEqual([(artist.name, artist.song_count) for artist in response.context["artists"]],
+                         [("Beau Dommage (index)", 1), ("Éric Lapointe", 2)])
+        self.assertEqual(response.context["first_letters"], ["B", "E"])
+
+        response = self.client.get(reverse("francouke:artist_by_letter", args=["e"]))
+        self.assertEqual([artist.name for artist in response.context["artists"]], ["Éric Lapointe"])
+
+        response = self.client.get(reverse("francouke:songs_by_artist", args=["ERIC LAPOINTE"]))
+        self.assertEqual(sorted(song.songTitle for song in response.context["songs"]), ["Deux", "Un"])
+
+
+class HttpCacheTests(TestCase):
+    def setUp(self):
+        owner = get_user_model().objects.create_user("etag", email="etag@example.com")
+        self.song = Song.objects.create(songTitle="Cached page", songChordPro="{title: Cached page}\n[C]la [G]la",
+                                        contributor=owner, site_name="FrancoUke")
+        self.url = reverse("francouke:chord_sheet", args=[self.song.pk])
+
+    def test_song_page_is_not_modified_until_the_song_changes(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+        etag = response["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.content), (304, b""))
+        self.assertEqual(response["ETag"], etag)
+
+        self.song.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_chord_json_etag_per_encoding(self):
+        url = chord_json_url("ukulele")
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual((response.status_code, response["Content-Encoding"]), (200, "gzip"))
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertTrue(json.loads(gzip.decompress(response.content)))
+
+        not_modified = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        plain = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(plain.status_code, 200)
+        self.assertNotEqual(plain["ETag"], response["ETag"])
+
+
+MARKUP_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def visible_text(markup):
+    """What a reader sees of PDF paragraph or chord sheet markup."""
+    return html.unescape(MARKUP_TAG_RE.sub("", re.sub(r"<br/?>", "\n", markup)))
+
+
+class ChordSheetHtmlTests(SimpleTestCase):
+    """The HTML chord sheet shows what the PDF shows."""
+
+    def test_sections_match_the_pdf(self):
+        for site_name in ("FrancoUke", "StrumSphere"):
+            with self.subTest(site_name=site_name):
+                ir = localize_ir(build_render_ir(parse_song_data(CHORUS_HEAVY_SONG)), site_name)
+                elements = build_lyrics_elements(ir, get_paragraph_styles(None), getSampleStyleSheet()["BodyText"])
+                pdf_lyrics = [
+                    element.lyrics.text if isinstance(element, SectionFlowable) else element.text
+                    for element in elements if isinstance(element, (SectionFlowable, Paragraph))
+                ]
+                html_lyrics = re.findall(r'<div class="cs-lyrics[^"]*">(.*?)</div>', render_lyrics_html(ir))
+
+                self.assertGreater(len(pdf_lyrics), 10)
+                self.assertEqual(len(html_lyrics), len(pdf_lyrics))
+                for pdf_text, html_text in zip(pdf_lyrics, html_lyrics):
+                    self.assertEqual(visible_text(html_text), visible_text(pdf_text))
+                    self.assertEqual(
+                        re.findall(r"style='(?:background-)?color:(\w+)'", html_text),
+                        re.findall(r"<font (?:backColor|color)='(\w+)'>", pdf_text),
+                    )
+
+    def test_chords_are_tagged_and_lyrics_escaped(self):
+        ir = localize_ir(build_render_ir(parse_song_data("[Am]<script>x</script> <r>red</r>")), "FrancoUke")
+        sheet = render_lyrics_html(ir, bracket_style="parentheses")
+        self.assertIn('<b class="chord" data-chord="Am">(<span class="chord-name">Am</span>)</b>', sheet)
+        self.assertIn(escape("<script>"), sheet)
+        self.assertNotIn("<script>", sheet)
+        self.assertIn("<span style='color:red'>red</span>", sheet)
+
+
+class MarkupTests(SimpleTestCase):
+    CASES = {
+        "<r>red</r> plain": "<span style='color:red'>red</span> plain",
+        # A closing tag closes the tags opened inside it and reopens them after
+        "<r>a<h>b</r>c</h>": (
+            "<span style='color:red'>a<span style='background-color:yellow'>b</span></span>"
+            "<span style='background-color:yellow'>c</span>"
+        ),
+        "stray</blue> <YELLOW>open": "stray <span style='color:gold'>open</span>",
+        '<highlight color="blue">x</highlight><b>bold</b>': "<span style='background-color:blue'>x</span><b>bold</b>",
+        "no tags": "no tags",
+    }
+
+    def test_html_output(self):
+        for text, expected in self.CASES.items():
+            with self.subTest(text=text):
+                self.assertEqual(markup.apply_html_color_markup(text), expected)
+
+    def test_pdf_and_html_backends_match(self):
+        for text in self.CASES:
+            with self.subTest(text=text):
+                pdf = markup.apply_color_markup(text)
+                as_html = re.sub(r"<font (backColor|color)='([#\w]+)'>", lambda m: "<span style='{}:{}'>".format(
+                    "background-color" if m.group(1) == "backColor" else "color", m.group(2)), pdf)
+                self.assertEqual(as_html.replace("</font>", "</span>"), markup.apply_html_color_markup(text))
+
+    def test_escaped_text(self):
+        # The chord sheet escapes lyrics first: colour tags still apply, other HTML stays text
+        for text, expected in self.CASES.items():
+            with self.subTest(text=text):
+                self.assertEqual(
+                    markup.render_markup(escape(text), escaped=True),
+                    expected.replace("<b>", "&lt;b&gt;").replace("</b>", "&lt;/b&gt;"),
+                )
+        self.assertEqual(
+            markup.render_markup(escape("<r>a & b</r>"), escaped=True), "<span style='color:red'>a &amp; b</span>"
+        )
+
+
+class RenderIrCacheTests(TestCase):
+    def setUp(self):
+        render_ir._cache.clear()
+        self.addCleanup(render_ir._cache.clear)
+        owner = get_user_model().objects.create_user("ir", email="ir@example.com")
+        self.song = Song.objects.create(songTitle="IR", songChordPro="{soc}\n[C]first\n{eoc}", contributor=owner,
+                                        site_name="FrancoUke")
+
+    def chords(self, ir):
+        return [block["lines"][0]["spans"][0][0] for block in ir["blocks"] if block["kind"] == "section"]
+
+    def test_cached_per_version_and_site(self):
+        ir = render_ir.song_render_ir(self.song, "FrancoUke")
+        with self.assertNumQueries(0):
+            self.assertIs(render_ir.song_render_ir(self.song, "FrancoUke"), ir)
+        self.assertEqual(ir["blocks"][0]["label"], "Refrain")
+        self.assertEqual(render_ir.song_render_ir(self.song, "StrumSphere")["blocks"][0]["label"], "Chorus")
+
+        self.song.songChordPro = "{soc}\n[G]second\n{eoc}"
+        self.song.save()
+        updated = render_ir.song_render_ir(self.song, "FrancoUke")
+        self.assertEqual((self.chords(ir), self.chords(updated)), (["C"], ["G"]))
+
+    def test_stale_stored_ir_is_rebuilt(self):
+        Song.objects.filter(pk=self.song.pk).update(render_ir={"v": render_ir.IR_VERSION - 1})
+        song = Song.objects.get(pk=self.song.pk)
+        self.assertEqual(self.chords(render_ir.song_render_ir(song, "FrancoUke")), ["C"])
+        self.assertEqual(Song.objects.get(pk=song.pk).render_ir["v"], render_ir.IR_VERSION)
+
+
+class ParagraphStyleCacheTests(TestCase):
+    def setUp(self):
+        pdf_generator._style_sets.clear()
+        self.addCleanup(pdf_generator._style_sets.clear)
+        owner = get_user_model().objects.create_user("styles", email="styles@example.com")
+        song = Song.objects.create(songTitle="Styled", songChordPro="[C]la", contributor=owner, site_name="FrancoUke")
+        self.formatting = SongFormatting.objects.create(user=owner, song=song, chorus={"font_size": 16})
+
+    def test_styles_are_shared_until_the_formatting_changes(self):
+        styles = get_paragraph_styles(self.formatting)
+        self.assertEqual(styles["chorus"].fontSize, 16)
+        self.assertIs(get_paragraph_styles(SongFormatting.objects.get(pk=self.formatting.pk)), styles)
+        self.assertIs(get_paragraph_styles(None), get_paragraph_styles(None))
+
+        self.formatting.chorus = {"font_size": 20}
+        self.formatting.save()
+        updated = get_paragraph_styles(self.formatting)
+        self.assertIsNot(updated, styles)
+        self.assertEqual((styles["chorus"].fontSize, updated["chorus"].fontSize), (16, 20))
+
+    def test_unsaved_formatting_is_not_cached(self):
+        preview = SongFormatting(chorus={"font_size": 30})
+        self.assertEqual(get_paragraph_styles(preview)["chorus"].fontSize, 30)
+        self.assertEqual(len(pdf_generator._style_sets), 0)
+
+
+class ChordProLintTests(TestCase):
+    def codes(self, chordpro, instruments=("ukulele",)):
+        return [(issue.code, issue.token, issue.line_number)
+                for issue in chordpro_lint.lint_chordpro(chordpro, list(instruments))]
+
+    def test_issue_codes(self):
+        self.assertEqual(self.codes("{title: Clean}\n{soc}\n[C]la [G7]la [Am]la\n{eoc}"), [])
+        self.assertEqual(self.codes("[C13b9#11]la"), [("missing_diagram", "C13b9#11", 1)])
+        self.assertEqual(self.codes("[C]la\n[C(99)]la"), [("variation_out_of_range", "C(99)", 2)])
+        self.assertEqual(self.codes("[C]la\n{eoc}"), [("unmatched_section_end", "eoc", 2)])
+        self.assertEqual(self.codes("{soc}\n[C]la\n{sov}\n[G]la\n{eov}\n{sob}"), [
+            ("unclosed_section", "soc", 1), ("unclosed_section", "sob", 6),
+        ])
+        self.assertEqual(self.codes("{strum: DDU}\n[C]la"), [("unknown_directive", "strum", 1)])
+        self.assertEqual(self.codes("[x2]la [N.C.]"), [("unrecognized_token", "x2", 1)])
+
+    def test_missing_chord_is_reported_once_per_instrument(self):
+        issues = chordpro_lint.lint_chordpro("[C13b9#11]la\n[C13b9#11]la", ["ukulele", "guitar"])
+        self.assertEqual([(issue.instrument, issue.severity) for issue in issues],
+                         [("ukulele", "error"), ("guitar", "error")])
+
+    def test_library_edits_are_picked_up(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "ukulele.json")
+
+        def write_library(chords, mtime_ns):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([{"name": name, "variations": [{}]} for name in chords], f)
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+        with mock.patch.object(chordpro_lint, "CHORDS_DIR", Path(directory)):
+            write_library(["C"], 10**18)
+            self.assertEqual(self.codes("[D]la"), [("missing_diagram", "D", 1)])
+            write_library(["C", "D"], 10**18 + 1)
+            self.assertEqual(self.codes("[D]la"), [])
+
+    def test_song_save_rebuilds_lint_issues(self):
+        owner = get_user_model().objects.create_user("lint", email="lint@example.com")
+        song = Song.objects.create(songTitle="Lint", songChordPro="{soc}\n[C]la", contributor=owner,
+                                   site_name="FrancoUke")
+        self.assertEqual(list(song.lint_issues.values_list("code", flat=True)), ["unclosed_section"])
+
+        song.songChordPro = "{soc}\n[C]la\n{eoc}\n{strum: D}"
+        song.save()
+        self.assertEqual(list(SongLintIssue.objects.filter(song=song).values_list("code", flat=True)),
+                         ["unknown_directive"])
+
+
+class ReparseSongsTests(TestCase):
+    def setUp(self):
+        owner = get_user_model().objects.create_user("reparse", email="reparse@example.com")
+        self.current, self.stale, self.hash_only = [
+            Song.objects.create(songTitle=title, songChordPro=f"{{title: {title}}}\n[C]la [G]la", contributor=owner,
+                                site_name="FrancoUke")
+            for title in ("Current", "Stale", "Hash only")
+        ]
+        # An older parser left different derived data / only a different hash
+        Song.objects.filter(pk=self.stale.pk).update(chords_used="Am", parsed_hash="old")
+        Song.objects.filter(pk=self.hash_only.pk).update(parsed_hash="old")
+
+    def reparse(self, **options):
+        out = io.StringIO()
+        call_command("reparse_songs", workers=1, stdout=out, **options)
+        return out.getvalue()
+
+    def state(self):
+        return {
+            song.pk: (song.chords_used, song.parsed_hash, song.content_version, song.updated_at)
+            for song in Song.objects.all()
+        }
+
+    def test_dry_run_writes_nothing(self):
+        before = self.state()
+        output = self.reparse(dry_run=True)
+        self.assertIn("2 of 3 songs to reparse (dry run)", output)
+        self.assertIn("Would update 1 of 2", output)
+        self.assertEqual(self.state(), before)
+
+    def test_only_stale_songs_are_rewritten(self):
+        before = self.state()
+        output = self.reparse()
+        self.assertIn("chords_used: 1 songs", output)
+        after = self.state()
+
+        self.assertEqual(after[self.current.pk], before[self.current.pk])
+
+        chords_used, parsed_hash, version, updated_at = after[self.stale.pk]
+        self.assertEqual((chords_used, parsed_hash), ("C,G", source_hash(self.stale.songChordPro)))
+        self.assertEqual(version, before[self.stale.pk][2] + 1)
+        self.assertGreater(updated_at, before[self.stale.pk][3])
+
+        # Same derived fields: only the hash is written, no new version
+        self.assertEqual(after[self.hash_only.pk][1], source_hash(self.hash_only.songChordPro))
+        self.assertEqual(after[self.hash_only.pk][2:], before[self.hash_only.pk][2:])
+
+        self.assertIn("0 of 3 songs to reparse", self.reparse())
@@ -3,18 +3,22 @@ from django.urls import path
 from songbook.views.formatting_views import edit_song_formatting
 from songbook.views.misc_views import about, whats_new, save_scroll_speed
 from songbook.views.artist_views import ArtistListView
+from songbook.views.export_views import export_chordpro_archive
+from songbook.views.sync_views import sync_songs
+from songbook.views.render_job_views import render_job_download, render_job_status
 
 from songbook.views.pdf_views import (
     generate_pdf_response,    # if you expose it
     generate_multi_song_pdf,
     generate_single_song_pdf,
+    pdf_cache_dashboard,
     preview_pdf,
     
 )
 
 from songbook.views.song_crud_views import (SongCreateView, SongUpdateView, SongDeleteView, toggle_privacy, clone_song, make_public, make_private,)
 from songbook.views.song_display_views import (LandingView, UserSongListView, ChordSheetView, SongListView,)
-from songbook.views.chord_views import (chord_dictionary, serve_chords_json, get_chord_definition,)
+from songbook.views.chord_views import (chord_dictionary, serve_chords_json, get_chord_definition, chord_usage_api,)
 
 app_name = "songbook"
 
@@ -38,6 +42,7 @@ urlpatterns = [
     path("chords/", chord_dictionary, name="chord_dictionary"),
     path("chords/<str:instrument>.json", serve_chords_json, name="serve_chords_json"),
     path("api/chord/<str:chord_name>/", get_chord_definition, name="get_chord_definition"),
+    path("api/chord-usage/", chord_usage_api, name="chord_usage_api"),
 
     # 🔹 Tags
     path("tags/<str:tag_name>/", SongListView.as_view(), name="songs_by_tag"),
@@ -49,6 +54,15 @@ urlpatterns = [
     path("preview_pdf/<int:song_id>/", preview_pdf, name="preview_pdf"),
     path("generate-song-pdf/<int:song_id>/", generate_single_song_pdf, name="generate_single_song_pdf"),
     path("generate_multi_song_pdf/", generate_multi_song_pdf, name="generate_multi_song_pdf"),
+    path("render-jobs/<uuid:token>/", render_job_status, name="render_job_status"),
+    path("render-jobs/<uuid:token>/download/", render_job_download, name="render_job_download"),
+    path("pdf-cache/", pdf_cache_dashboard, name="pdf_cache_dashboard"),
+
+    # 🔹 ChordPro archive export (staff)
+    path("export/chordpro/", export_chordpro_archive, name="export_chordpro_archive"),
+
+    # 🔹 Offline sync (tablets)
+    path("api/sync/", sync_songs, name="sync_songs"),
 
     # 🔹 AJAX scroll speed
     path("song/<int:song_id>/save_scroll_speed/", save_scroll_speed, name="save_scroll_speed"),
@@ -0,0 +1,113 @@
+# songbook/utils/artists.py
+"""
+Materialized artist index.
+
+Song.artist_key holds the accent-folded artist name, and the Artist table
+keeps one row per (site_name, artist_key) with a display name, a folded sort
+key, a first-letter bucket and the number of songs. Both are maintained on
+Song save/delete so artist browsing never scans Song.metadata.
+"""
+from collections import Counter, defaultdict
+
+from songbook.utils.search import fold_text
+
+
+def artist_sort_key(name):
+    """Folded key used for matching and ordering artists ('Éric' -> 'eric')."""
+    return fold_text(name)[:200]
+
+
+def artist_first_letter(sort_key):
+    """Bucket for the A-Z navigation: first character of the folded key."""
+    return sort_key[:1].upper()
+
+
+def summarize_artists(rows):
+    """
+    rows: iterable of (site_name, artist_name) for songs with an artist.
+    Returns {(site_name, sort_key): (display_name, song_count)}, where the
+    display name is the most common spelling among the songs.
+    """
+    spellings = defaultdict(Counter)
+    for site_name, name in rows:
+        name = (name or "").strip()
+        key = artist_sort_key(name)
+        if key:
+            spellings[(site_name, key)][name] += 1
+
+    return {
+        slot: (counter.most_common(1)[0][0], sum(counter.values()))
+        for slot, counter in spellings.items()
+    }
+
+
+def song_artist_slot(song):
+    return (song.site_name, song.artist_key or "")
+
+
+def refresh_artists(slots, chunk_size=200):
+    """Recount the given (site_name, artist_key) slots and update the Artist table."""
+    from django.db.models import Q
+    from songbook.models import Artist, Song
+
+    slots = sorted({(site, key) for site, key in slots if key}, key=lambda slot: (slot[0] or "", slot[1]))
+
+    # Chunked so bulk imports don't build one huge OR expression
+    for start in range(0, len(slots), chunk_size):
+        chunk = slots[start:start + chunk_size]
+        slot_filter = Q()
+        for site_name, key in chunk:
+            slot_filter |= Q(site_name=site_name, artist_key=key)
+
+        rows = Song.objects.filter(slot_filter).values_list("site_name", "metadata__artist")
+        summary = summarize_artists(rows)
+
+        for site_name, key in chunk:
+            if (site_name, key) not in summary:
+                Artist.objects.filter(site_name=site_name, sort_key=key).delete()
+                continue
+            name, count = summary[(site_name, key)]
+            Artist.objects.update_or_create(
+                site_name=site_name,
+                sort_key=key,
+                defaults={
+                    "name": name,
+                    "first_letter": artist_first_letter(key),
+                    "song_count": count,
+                },
+            )
+
+
+def rebuild_artists():
+    """Recompute Song.artist_key and the whole Artist table. Returns the artist count."""
+    from django.db import transaction
+    from songbook.models import Artist, Song
+
+    with transaction.atomic():
+        changed = []
+        rows = []
+        songs = Song.objects.only("pk", "site_name", "metadata", "artist_key")
+        for song in songs.iterator(chunk_size=500):
+            name = (song.metadata or {}).get("artist")
+            key = artist_sort_key(name)
+            if key != song.artist_key:
+                song.artist_key = key
+                changed.append(song)
+            rows.append((song.site_name, name))
+        Song.objects.bulk_update(changed, ["artist_key"], batch_size=500)
+
+        Artist.objects.all().delete()
+        Artist.objects.bulk_create(
+            [
+                Artist(
+                    site_name=site_name,
+                    sort_key=key,
+                    name=name,
+                    first_letter=artist_first_letter(key),
+                    song_count=count,
+                )
+                for (site_name, key), (name, count) in summarize_artists(rows).items()
+            ],
+            batch_size=500,
+        )
+        return Artist.objects.count()
@@ -0,0 +1,225 @@
+# songbook/utils/chord_index.py
+"""
+Inverted index of the bracketed chord tokens in every song.
+
+Each [token] in songChordPro becomes a ChordOccurrence row holding the raw
+token, a normalized form, the 1-based line number, the column of the "["
+and the text of the line. The normalized form folds spelling variants so one
+lookup finds them all: trailing strum slashes are dropped, ♯/♭ become #/b and
+flat roots/bass notes are written as sharps ("Bbdim7" and "A#dim7" both
+index as "A#dim7").
+
+Rows are rebuilt on Song save (see refresh_song_indexes in models.py); the
+scan_chords / search_chord commands, the admin "Chord usage" page and the
+chord-usage JSON API all read from it.
+"""
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+TOKEN_RE = re.compile(r"\[([^\[\]\n]{1,50})\]")
+ROOT_RE = re.compile(r"^([A-G])([#b]?)(.*?)(?:/([A-G])([#b]?))?$")
+
+FLAT_TO_SHARP = {
+    "Cb": "B", "Db": "C#", "Eb": "D#", "Fb": "E", "Gb": "F#", "Ab": "G#", "Bb": "A#",
+    "E#": "F", "B#": "C",
+}
+
+MAX_LINE_TEXT = 300
+
+
+def _sharp(root, accidental):
+    note = root + accidental
+    return FLAT_TO_SHARP.get(note, note)
+
+
+def normalize_chord_token(token):
+    """Canonical index key for a bracketed token ('Bb7///' -> 'A#7', 'Feb' stays 'Feb')."""
+    token = token.strip().replace("♯", "#").replace("♭", "b").rstrip("/").strip()
+    match = ROOT_RE.match(token)
+    if not match:
+        return token
+    root, accidental, quality, bass, bass_accidental = match.groups()
+    normalized = _sharp(root, accidental) + quality
+    if bass:
+        normalized += "/" + _sharp(bass, bass_accidental)
+    return normalized
+
+
+def chord_occurrences(chordpro_text):
+    """(token, normalized, line_number, column, line_text) for every bracketed token."""
+    occurrences = []
+    for line_number, line in enumerate((chordpro_text or "").splitlines(), 1):
+        if "[" not in line:
+            continue
+        for match in TOKEN_RE.finditer(line):
+            token = match.group(1).strip()
+            if not token:
+                continue
+            occurrences.append((
+                token[:50],
+                normalize_chord_token(token)[:50],
+                line_number,
+                match.start(),
+                line[:MAX_LINE_TEXT],
+            ))
+    return occurrences
+
+
+# -------------------------------------------------------------
+# Index maintenance
+# -------------------------------------------------------------
+def index_song_chords(songs):
+    """Replace the ChordOccurrence rows of the given saved songs."""
+    from django.db import transaction
+    from songbook.models import ChordOccurrence
+
+    songs = [song for song in songs if song.pk]
+    if not songs:
+        return 0
+
+    rows = [
+        ChordOccurrence(
+            song_id=song.pk,
+            token=token,
+            normalized=normalized,
+            line_number=line_number,
+            column=column,
+            line_text=line_text,
+        )
+        for song in songs
+        for token, normalized, line_number, column, line_text in chord_occurrences(song.songChordPro)
+    ]
+    with transaction.atomic():
+        ChordOccurrence.objects.filter(song_id__in=[song.pk for song in songs]).delete()
+        ChordOccurrence.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_chord_index(batch_size=500):
+    """Rebuild the whole index. Returns the number of occurrences."""
+    from songbook.models import ChordOccurrence, Song
+
+    ChordOccurrence.objects.all().delete()
+    total = 0
+    batch = []
+    for song in Song.objects.only("pk", "songChordPro").iterator(chunk_size=batch_size):
+        batch.append(song)
+        if len(batch) >= batch_size:
+            total += index_song_chords(batch)
+            batch = []
+    return total + index_song_chords(batch)
+
+
+# -------------------------------------------------------------
+# Querying
+# -------------------------------------------------------------
+# Song columns the matches show; the lyrics JSON, render IR etc. are not loaded
+MATCH_SONG_FIELDS = ("song__id", "song__songTitle", "song__site_name")
+
+
+def find_chord(token, exact=False, songs=None):
+    """
+    ChordOccurrence rows for `token`, with their song, in song/line order.
+    exact=True matches the token as written instead of its normalized form.
+    songs: optional Song queryset restricting the search.
+    """
+    from songbook.models import ChordOccurrence
+
+    token = token.strip().strip("[]")
+    lookup = {"token": token} if exact else {"normalized": normalize_chord_token(token)}
+    occurrences = ChordOccurrence.objects.filter(**lookup)
+    if songs is not None:
+        occurrences = occurrences.filter(song__in=songs)
+    return (
+        occurrences.select_related("song")
+        .only("song", "line_number", "column", "line_text", *MATCH_SONG_FIELDS)
+        .order_by("song__songTitle", "song_id", "line_number", "column")
+    )
+
+
+def chord_song_ids(token, exact=False, songs=None):
+    """Ids of the songs using `token`, in the order chord_matches lists them (a queryset: slice it)."""
+    return (
+        find_chord(token, exact=exact, songs=songs)
+        .order_by("song__songTitle", "song_id")
+        .values_list("song_id", flat=True)
+        .distinct()
+    )
+
+
+def group_by_song(occurrences):
+    """[(song, [occurrence, ...]), ...] preserving order."""
+    grouped = {}
+    for occurrence in occurrences:
+        grouped.setdefault(occurrence.song_id, (occurrence.song, []))[1].append(occurrence)
+    return list(grouped.values())
+
+
+def split_line(text, columns):
+    """
+    Cut a line into [(segment, is_token), ...] where the tokens are the
+    bracketed chords starting at `columns`.
+    """
+    segments = []
+    position = 0
+    for start in sorted(set(columns)):
+        if start < position:
+            continue
+        end = text.find("]", start) + 1 or len(text)
+        segments.append((text[position:start], False))
+        segments.append((text[start:end], True))
+        position = end
+    segments.append((text[position:], False))
+    return [(segment, is_token) for segment, is_token in segments if segment]
+
+
+def highlight_line(text, columns):
+    """The line as HTML with the tokens at `columns` wrapped in <mark>."""
+    return mark_safe("".join(
+        f"<mark>{escape(segment)}</mark>" if is_token else escape(segment)
+        for segment, is_token in split_line(text, columns)
+    ))
+
+
+def chord_matches(token, exact=False, songs=None, limit=None):
+    """
+    Songs using `token` with their highlighted lines (one entry per line):
+    [{"song": Song, "lines": [{"line_number", "columns", "text", "html"}]}].
+    songs: optional Song queryset restricting the search.
+    limit: at most this many songs, picked in SQL before any row is loaded.
+    The songs carry only id, songTitle and site_name.
+    """
+    occurrences = find_chord(token, exact=exact, songs=songs)
+    if limit is not None:
+        song_ids = list(chord_song_ids(token, exact=exact, songs=songs)[:limit])
+        occurrences = occurrences.filter(song_id__in=song_ids)
+
+    matches = []
+    for song, song_occurrences in group_by_song(occurrences):
+        lines = {}
+        for occurrence in song_occurrences:
+            line = lines.setdefault(occurrence.line_number, {
+                "line_number": occurrence.line_number,
+                "columns": [],
+                "text": occurrence.line_text,
+            })
+            line["columns"].append(occurrence.column)
+        for line in lines.values():
+            line["html"] = highlight_line(line["text"], line["columns"])
+        matches.append({"song": song, "lines": list(lines.values())})
+    return matches
+
+
+def chord_usage_counts():
+    """[(token, occurrences, songs)] for every distinct raw token, most used first."""
+    from django.db.models import Count
+    from songbook.models import ChordOccurrence
+
+    rows = (
+        ChordOccurrence.objects.values("token")
+        .annotate(occurrences=Count("id"), songs=Count("song", distinct=True))
+        .order_by("-songs", "token")
+    )
+    return [(row["token"], row["occurrences"], row["songs"]) for row in rows]
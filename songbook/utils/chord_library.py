@@ -1,3 +1,4 @@
+import hashlib
 import json
 import re
 from pathlib import Path
@@ -6,6 +7,18 @@ from pathlib import Path
 CHORDS_DIR = Path(__file__).resolve().parent.parent / "chords"
 
 
+def library_version() -> str:
+    """
+    Short digest of the chord JSON files' names, sizes and modification
+    times: it changes whenever a diagram file is edited, added or removed.
+    """
+    stats = [
+        (path.name, path.stat().st_size, path.stat().st_mtime_ns)
+        for path in sorted(CHORDS_DIR.glob("*.json"))
+    ]
+    return hashlib.sha256(json.dumps(stats).encode("utf-8")).hexdigest()[:16]
+
+
 def load_chords(instrument: str = "ukulele") -> list[dict]:
     """
     Load chord definitions for a specific instrument.
@@ -44,13 +57,13 @@ def load_all_chords() -> dict[str, list[dict]]:
     return all_chords
 
 
-def extract_relevant_chords(lyrics_with_chords, instrument: str = "ukulele") -> list[dict]:
+def extract_relevant_chords(render_ir, instrument: str = "ukulele") -> list[dict]:
     """
-    Extract unique chords from a song's lyrics_with_chords and
+    Extract unique chords from a song's render IR and
     return only the chords found in the instrument's chord library.
     
     Args:
-        lyrics_with_chords (list): Parsed lyrics with chord/lyric blocks.
+        render_ir (dict): Song render IR (see utils/render_ir.py).
         instrument (str): Instrument name, defaults to "ukulele".
     
     Returns:
@@ -58,22 +71,9 @@ def extract_relevant_chords(lyrics_with_chords, instrument: str = "ukulele") ->
     """
     chord_library = load_chord_dict(instrument)
 
-    # Flatten lyrics into raw text with [CHORD] markup
-    raw_lines = []
-    for block in lyrics_with_chords:
-        if isinstance(block, list):
-            for item in block:
-                if "chord" in item:
-                    raw_lines.append(f"[{item['chord']}]")
-                if "lyric" in item:
-                    raw_lines.append(item["lyric"])
-            raw_lines.append("\n")
-    raw_lyrics = "".join(raw_lines)
-
-    # Extract chords inside [ ... ]
-    chord_pattern = re.compile(r"\[([A-G][#b]?(?:m|min|maj7|sus4|dim|aug|\d)*)\]")
-    found_chords = chord_pattern.findall(raw_lyrics)
-    unique_chords = sorted(set(found_chords))
+    # Keep the chord names the library can hold
+    chord_pattern = re.compile(r"[A-G][#b]?(?:m|min|maj7|sus4|dim|aug|\d)*")
+    unique_chords = sorted({chord for chord in render_ir["chords"] if chord_pattern.fullmatch(chord)})
 
     # Match against library
     return [
@@ -0,0 +1,234 @@
+# songbook/utils/chord_sheet_html.py
+"""
+HTML chord sheet: the song page's counterpart of generate_songs_pdf.
+
+It follows the PDF layout rules (header table, labelled sections, the
+SongFormatting section styles, the user's chord bracket style and colour)
+but needs no ReportLab, so the song page renders in milliseconds and the
+PDF is only built when someone prints or downloads it.
+
+Chords are written as <b class="chord" data-chord="Am">, so
+chord_sheet.js can transpose the page in the browser and rebuild the chord
+footer from the versioned chord library JSON, applying the same
+selection rules as load_relevant_chords (variation 0, forced variations,
+alternates preference, known-chord filter).
+"""
+import re
+
+from django.db.models import Case, Q, Value, When
+from django.utils.html import escape
+
+from songbook.utils.markup import HTML, render_markup
+from songbook.utils.render_ir import is_labelled, layout_blocks, lines_markup, song_render_ir
+from songbook.utils.transposer import clean_chord, normalize_chord
+
+SECTIONS = ["intro", "verse", "chorus", "bridge", "interlude", "outro", "centered"]
+
+FONT_FAMILIES = {
+    "Helvetica": "Helvetica, Arial, sans-serif",
+    "Times-Roman": "'Times New Roman', Times, serif",
+    "Courier": "'Courier New', Courier, monospace",
+}
+
+CHORD_BRACKETS = {
+    "square": ("[", "]"),
+    "parentheses": ("(", ")"),
+    "curly": ("{", "}"),
+}
+
+# Whose formatting applies when the user has none for a song
+HOUSE_FORMATTING_USER = "Gaulind"
+
+REQUESTED_VARIATION_RE = re.compile(r"^([A-G][#b]?m?(?:add\d+)?)(?:\((\d+)\))?$")
+
+
+# =======================
+# SECTION STYLES
+# =======================
+def section_style(formatting, section):
+    """A SongFormatting section with the PDF defaults filled in."""
+    config = getattr(formatting, section, {}) or {}
+    font_size = config.get("font_size", 13)
+    font_family = config.get("font_family", "Helvetica")
+    return {
+        "font_size": font_size,
+        "font_color": config.get("font_color", "#000000"),
+        "font_family": font_family if font_family in FONT_FAMILIES else "Helvetica",
+        "leading": config.get("line_spacing", 1.2) * font_size,
+        "space_before": config.get("spaceBefore", 12),
+        "space_after": config.get("spaceAfter", 12),
+        "alignment": config.get("alignment", "left" if section == "verse" else "center"),
+    }
+
+
+def section_css(formatting):
+    """{section: CSS declarations} for the chord sheet's <style> block."""
+    css = {}
+    for section in SECTIONS:
+        style = section_style(formatting, section)
+        alignment = style["alignment"] if style["alignment"] in ("left", "center", "right") else "center"
+        css[section] = (
+            f"font-size:{style['font_size']}pt;"
+            f"color:{escape(style['font_color'])};"
+            f"font-family:{FONT_FAMILIES[style['font_family']]};"
+            f"line-height:{style['leading']}pt;"
+            f"margin:{style['space_before']}pt 0 {style['space_after']}pt;"
+            f"text-align:{alignment};"
+        )
+    return css
+
+
+def get_song_formatting(user, song):
+    """
+    The user's SongFormatting for the song, else the house (Gaulind) one,
+    else None. One query: both rows are fetched, the user's sorted first.
+    """
+    from songbook.models import SongFormatting
+
+    formattings = SongFormatting.objects.filter(song=song)
+    if user is None or not user.is_authenticated:
+        return formattings.filter(user__username=HOUSE_FORMATTING_USER).first()
+    return (
+        formattings.filter(Q(user=user) | Q(user__username=HOUSE_FORMATTING_USER))
+        .order_by(Case(When(user=user, then=Value(0)), default=Value(1)))
+        .first()
+    )
+
+
+# =======================
+# HEADER
+# =======================
+def recording_line(metadata):
+    """'Capo (2) to match the recording by X (1975)' line of the song header."""
+    capo_value = metadata.get("capo")
+    artist = metadata.get("artist") or "Unknown Artist"
+    year = metadata.get("year")
+
+    if isinstance(capo_value, str) and capo_value.lower() == "based":
+        text = f"Based on clip by {artist}"
+    else:
+        try:
+            capo_value = int(capo_value)
+        except (TypeError, ValueError):
+            capo_value = 0
+        if capo_value > 0:
+            text = f"Capo ({capo_value}) to match the recording by {artist}"
+        else:
+            text = f"Matches the recording by {artist}"
+    if year:
+        text += f" ({year})"
+    return text
+
+
+def header_context(song, render_ir):
+    metadata = {key: value or "" for key, value in (song.metadata or {}).items()}
+    return {
+        "title": song.songTitle or "Untitled Song",
+        "time_signature": metadata.get("timeSignature", ""),
+        "songwriter": metadata.get("songwriter", ""),
+        "first_note": metadata.get("1stnote", ""),
+        "count_in": metadata.get("count_in", ""),
+        "instruction_1": metadata.get("short_instruction_1", ""),
+        "instruction_2": metadata.get("short_instruction_2", ""),
+        "recording": recording_line(metadata),
+        "has_slash_chord": any("/" in chord for chord in render_ir["chords"]),
+    }
+
+
+# =======================
+# LYRICS
+# =======================
+STYLE_TAG_RE = re.compile(r"&lt;(/?)(b|i|u)&gt;", re.IGNORECASE)
+
+
+def apply_color_markup(text):
+    """
+    Markup of already-escaped lyrics: the songbook's colour tags become
+    <span>s (utils/markup.py) and <b>/<i>/<u> are restored.
+    """
+    text = STYLE_TAG_RE.sub(lambda m: f"<{m.group(1)}{m.group(2).lower()}>", text)
+    return render_markup(text, HTML, escaped=True)
+
+
+def chord_html(chord, bracket_style="square"):
+    open_b, close_b = CHORD_BRACKETS.get(bracket_style, CHORD_BRACKETS["square"])
+    chord = escape(chord)
+    return f'<b class="chord" data-chord="{chord}">{open_b}<span class="chord-name">{chord}</span>{close_b}</b>'
+
+
+def render_lyrics_html(render_ir, bracket_style="square"):
+    """Sections of the song's localized render IR as HTML, laid out like build_lyrics_elements."""
+    html = []
+    for block in layout_blocks(render_ir):
+        if block["kind"] == "page_break":
+            html.append('<hr class="cs-page-break">')
+            continue
+
+        text = apply_color_markup(lines_markup(
+            block["lines"], lambda chord: chord_html(chord, bracket_style), escape, br="<br>"
+        ))
+        style_key = block["type"] or "verse"
+
+        if is_labelled(block):
+            # Labelled section: label column + lyrics, as the PDF's section table
+            label_html = ""
+            if style_key != "centered":
+                label_html = f"<b>{escape(block['label'])}:</b>"
+                if block["instruction"]:
+                    label_html += f'<br><i class="section-instruction">{escape(block["instruction"])}</i>'
+            html.append(
+                f'<div class="cs-section cs-{style_key}">'
+                f'<div class="cs-label">{label_html}</div>'
+                f'<div class="cs-lyrics cs-style-{style_key}">{text}</div></div>'
+            )
+        else:
+            html.append(f'<div class="cs-lyrics cs-style-verse">{text}</div>')
+    return "".join(html)
+
+
+# =======================
+# CHORD FOOTER
+# =======================
+def footer_config(song, render_ir, user_prefs):
+    """
+    Inputs chord_sheet.js needs to pick the footer diagrams the way
+    load_relevant_chords / generate_songs_pdf do, for any transposition.
+    """
+    requested = {}
+    suggested_alternate = (song.metadata or {}).get("suggested_alternate") or ""
+    explicitly_requested = []
+    for alternate in filter(None, (alt.strip() for alt in suggested_alternate.split(","))):
+        match = REQUESTED_VARIATION_RE.match(alternate)
+        if match:
+            explicitly_requested.append(match.group(1))
+            if match.group(2) is not None:
+                requested.setdefault(match.group(1), []).append(int(match.group(2)))
+    for chord in sorted(render_ir["chords"]):
+        match = REQUESTED_VARIATION_RE.match(normalize_chord(clean_chord(chord)))
+        if match and match.group(2) is not None:
+            variations = requested.setdefault(match.group(1), [])
+            if int(match.group(2)) not in variations:
+                variations.append(int(match.group(2)))
+
+    use_known = bool(user_prefs.get("use_known_chord_filter"))
+    return {
+        "instrument": user_prefs.get("primary_instrument") or "ukulele",
+        "isLefty": bool(user_prefs.get("is_lefty")),
+        "showAlternates": bool(user_prefs.get("show_alternate_chords")),
+        "requestedVariations": requested,
+        "knownChords": sorted({normalize_chord(ch).lower() for ch in user_prefs.get("known_chords", [])}) if use_known else [],
+        "explicitlyRequested": explicitly_requested,
+    }
+
+
+def chord_sheet_context(song, user, site_name, user_prefs):
+    """Everything song_chord_sheet.html needs to render the sheet without ReportLab."""
+    formatting = get_song_formatting(user, song)
+    render_ir = song_render_ir(song, site_name)
+    return {
+        "sheet_header": header_context(song, render_ir),
+        "sheet_html": render_lyrics_html(render_ir, user_prefs.get("chord_bracket_style", "square")),
+        "sheet_css": section_css(formatting),
+        "sheet_chord_color": user_prefs.get("chord_color") or "black",
+        "sheet_footer": footer_config(song, render_ir, user_prefs),
+    }
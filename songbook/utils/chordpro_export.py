@@ -0,0 +1,207 @@
+# songbook/utils/chordpro_export.py
+"""
+Streaming ChordPro export into a zip / tar.zst / tar.gz archive.
+
+Songs are read with iterator(chunk_size=...) and written straight into the
+archive, one member per song, plus a manifest.json listing every selected
+song with the SHA-256 of its exported file:
+
+    {"version": 1, "generated_at": "...", "filters": {...},
+     "songs": {"<id>": {"path": "...", "sha256": "...", "title": "..."}},
+     "changed": [ids written to this archive], "removed": [ids gone since the previous manifest]}
+
+Pass the manifest of an earlier export as `previous_manifest` and only songs
+whose content changed (or that are new) are written to the archive.
+
+Used by the export_chordpro command (archive on disk) and by the staff
+export view (archive streamed as the HTTP response).
+"""
+import hashlib
+import io
+import json
+import tarfile
+import time
+import zipfile
+
+from django.utils import timezone
+
+ARCHIVE_FORMATS = {
+    "zip": ".zip",
+    "tar.zst": ".tar.zst",
+    "tar.gz": ".tar.gz",
+}
+
+CONTENT_TYPES = {
+    "zip": "application/zip",
+    "tar.zst": "application/zstd",
+    "tar.gz": "application/gzip",
+}
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+# -------------------------------------------------------------
+# Selecting and rendering songs
+# -------------------------------------------------------------
+def select_songs(site_name=None, tags=None, changed_since=None):
+    """
+    Songs to export, with the contributor joined in.
+    changed_since: a date; songs changed on or after it: edits, tag and
+    privacy changes, admin bulk actions (SongChangeLog, see utils/sync.py)
+    or, for songs last edited before that log existed, updated_at.
+    """
+    from django.db.models import Q
+    from songbook.models import Song, SongChangeLog
+
+    songs = Song.objects.select_related("contributor").only(
+        "pk", "songTitle", "songChordPro", "site_name", "date_posted", "contributor__username"
+    )
+    if site_name:
+        songs = songs.filter(site_name=site_name)
+    if tags:
+        songs = songs.filter(tags__name__in=tags).distinct()
+    if changed_since:
+        changed = SongChangeLog.objects.filter(changed_at__date__gte=changed_since).values("song_id")
+        songs = songs.filter(Q(pk__in=changed) | Q(updated_at__date__gte=changed_since))
+    return songs.order_by("pk")
+
+
+def song_to_chordpro(song):
+    """ChordPro text of an exported song: title/contributor header, then the song."""
+    title = song.songTitle if song.songTitle else "Untitled"
+    contributor = song.contributor.username if song.contributor else "Unknown"
+    return f"{{title: {title}}}\n{{artist: {contributor}}}\n\n{song.songChordPro}"
+
+
+def song_archive_path(song):
+    # The id keeps paths unique when two songs share a title
+    filename = f"{song.songTitle or 'Untitled'} [{song.pk}].chordpro"
+    return "".join(c for c in filename if c.isalnum() or c in " ._-[]").strip()
+
+
+def load_manifest(path):
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version: {manifest.get('version')}")
+    return manifest
+
+
+# -------------------------------------------------------------
+# Archive writers
+# -------------------------------------------------------------
+class ChunkBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink whose contents are drained with pop()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def pop(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ArchiveWriter:
+    """Adds in-memory files to a zip or tar archive written to `fileobj`."""
+
+    def __init__(self, fileobj, archive_format="zip"):
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format '{archive_format}'")
+        self.archive_format = archive_format
+        self._zstd_stream = None
+
+        if archive_format == "zip":
+            self._archive = zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED)
+        elif archive_format == "tar.gz":
+            self._archive = tarfile.open(fileobj=fileobj, mode="w|gz")
+        else:
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("tar.zst archives need the 'zstandard' package (pip install zstandard)")
+            self._zstd_stream = zstandard.ZstdCompressor(level=10).stream_writer(fileobj, closefd=False)
+            self._archive = tarfile.open(fileobj=self._zstd_stream, mode="w|")
+
+    def add(self, name, data):
+        if self.archive_format == "zip":
+            self._archive.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self._archive.close()
+        if self._zstd_stream is not None:
+            self._zstd_stream.close()
+
+
+# -------------------------------------------------------------
+# Export
+# -------------------------------------------------------------
+def _export(writer, songs, previous_manifest, filters, chunk_size):
+    """Write songs into `writer`, yielding after each member. Returns the manifest."""
+    previous = (previous_manifest or {}).get("songs", {})
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "generated_at": timezone.now().isoformat(),
+        "filters": filters or {},
+        "songs": {},
+        "changed": [],
+        "removed": [],
+    }
+
+    for song in songs.iterator(chunk_size=chunk_size):
+        data = song_to_chordpro(song).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = song_archive_path(song)
+        key = str(song.pk)
+        manifest["songs"][key] = {"path": path, "sha256": digest, "title": song.songTitle or ""}
+
+        if previous.get(key, {}).get("sha256") == digest:
+            continue
+        writer.add(path, data)
+        manifest["changed"].append(song.pk)
+        yield
+
+    if not manifest["filters"].get("changed_since"):
+        # Only meaningful when the selection isn't limited to recent changes
+        manifest["removed"] = sorted(int(key) for key in set(previous) - set(manifest["songs"]))
+    writer.add(MANIFEST_NAME, json.dumps(manifest, indent=2).encode("utf-8"))
+    writer.close()
+    yield
+    return manifest
+
+
+def export_archive(fileobj, songs, archive_format="zip", previous_manifest=None, filters=None, chunk_size=200):
+    """Write the archive into an open binary file. Returns the manifest."""
+    steps = _export(ArchiveWriter(fileobj, archive_format), songs, previous_manifest, filters, chunk_size)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+
+
+def stream_archive(songs, archive_format="zip", previous_manifest=None, filters=None, chunk_size=200):
+    """Yield the archive as byte chunks, e.g. for a StreamingHttpResponse."""
+    buffer = ChunkBuffer()
+    for _ in _export(ArchiveWriter(buffer, archive_format), songs, previous_manifest, filters, chunk_size):
+        data = buffer.pop()
+        if data:
+            yield data
@@ -0,0 +1,533 @@
+# songbook/utils/chordpro_import.py
+"""
+Bulk ChordPro import engine shared by the import commands.
+
+    importer = ChordProImporter("chordpro", contributor_from_artist=True)
+    report = importer.run(paths)
+
+1. Files are read and parsed in a process pool. Each source format has a
+   `prepare` function turning raw file text into (title or None, ChordPro,
+   extra Song fields); parsing itself is parsers.derive_song_fields, the same
+   code Song.save() runs.
+2. Contributors and already-imported titles are resolved with one query each.
+3. Songs are written with bulk_create / bulk_update, one transaction per batch.
+   If a batch fails it is retried row by row so the error lands on the right file.
+4. Search and artist indexes are refreshed once for everything written, since
+   bulk writes don't send post_save.
+
+With ledger=True every imported file is recorded in SongImportRecord (keyed by
+its SHA-256) in the same transaction as its song, files already recorded are
+skipped, and work is done in rounds of `round_size` files, so an interrupted
+run can simply be started again.
+"""
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from songbook.parsers import DERIVED_SONG_FIELDS, derive_song_fields
+
+# Below this many files the pool start-up costs more than it saves
+MIN_FILES_FOR_POOL = 50
+
+
+# -------------------------------------------------------------
+# Source formats
+# -------------------------------------------------------------
+OZBCOZ_METADATA_TEMPLATE = """\
+{album: }
+{youtube: }
+{capo: }
+{songwriter: }
+{key: }
+{recording: }
+{year: }
+{1stnote: }
+{tempo: }
+{timeSignature: }
+"""
+
+CONVERTED_METADATA_TEMPLATE = """{{title: {title}}}
+{{artist: {artist}}}
+{{album: }}
+{{youtube:}}
+{{capo: }}
+{{composer: }}
+{{lyricist: }}
+{{key: }}
+{{recording: }}
+{{year: }}
+{{1stnote: }}
+{{tempo: }}
+{{timeSignature: }}"""
+
+DOUBLE_BRACE_CHORD_RE = re.compile(r"\{\{(.*?)\}\}")
+
+
+def prepare_chordpro(path, text):
+    """Plain ChordPro: title and artist come from the directives."""
+    return None, text.strip(), {}
+
+
+def prepare_filename_title(path, text):
+    """ChordPro whose song title is the file name."""
+    return os.path.splitext(os.path.basename(path))[0], text, {}
+
+
+def prepare_ozbcoz(path, text):
+    """Ozbcoz .pro files: title from the file name, empty metadata directives prepended."""
+    title, text, extra = prepare_filename_title(path, text)
+    text = text.replace("{t:", "{title:")
+    return title, f"{OZBCOZ_METADATA_TEMPLATE}\n{text}", extra
+
+
+def prepare_converted(path, text):
+    """Artist on line 1, title on line 2, chords written as {{C}}."""
+    lines = text.splitlines(keepends=True)
+    if len(lines) < 2:
+        raise ValueError("Input file must have at least two lines for artist and title.")
+    artist, title = lines[0].strip(), lines[1].strip()
+    content = DOUBLE_BRACE_CHORD_RE.sub(r"[\1]", "".join(lines[2:]))
+    header = CONVERTED_METADATA_TEMPLATE.format(title=title, artist=artist)
+    return title, header + "\n\n" + content, {}
+
+
+def prepare_songbook_pdf(path, text):
+    """Club songbook PDFs: title from the file name, revision date from its "(Month D, YYYY)" suffix."""
+    from songbook.utils.pdf_import import ACKNOWLEDGEMENT_TEXT, convert_pdf_text, extract_revision_date_from_filename
+
+    title = os.path.splitext(os.path.basename(path))[0]
+    extra = {
+        "revised_on": extract_revision_date_from_filename(path),
+        "acknowledgement": ACKNOWLEDGEMENT_TEXT,
+    }
+    return title, convert_pdf_text(text), extra
+
+
+def read_text_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def read_pdf_file(path):
+    from songbook.utils.pdf_import import extract_pdf_text
+    return extract_pdf_text(path)
+
+
+SOURCE_FORMATS = {
+    "chordpro": prepare_chordpro,
+    "filename_title": prepare_filename_title,
+    "ozbcoz": prepare_ozbcoz,
+    "converted": prepare_converted,
+    "songbook_pdf": prepare_songbook_pdf,
+}
+
+# How each format's files are read (plain UTF-8 text unless listed)
+SOURCE_READERS = {
+    "songbook_pdf": read_pdf_file,
+}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# -------------------------------------------------------------
+# Worker side (must stay picklable: plain functions and data)
+# -------------------------------------------------------------
+@dataclass
+class ParsedFile:
+    path: str
+    chordpro: str = ""
+    fields: dict = field(default_factory=dict)
+    extra: dict = field(default_factory=dict)
+    error: str = ""
+
+    @property
+    def title(self):
+        return (self.fields.get("songTitle") or "").strip()
+
+
+def parse_file(path, source_format="chordpro"):
+    """Read and parse one file. Never raises: failures are returned on the result."""
+    try:
+        text = SOURCE_READERS.get(source_format, read_text_file)(path)
+        title, chordpro, extra = SOURCE_FORMATS[source_format](path, text)
+        fields = derive_song_fields(chordpro, title)
+        fields["songTitle"] = (fields["songTitle"] or "").strip()[:100]
+        return ParsedFile(path=path, chordpro=chordpro, fields=fields, extra=extra)
+    except Exception as e:
+        return ParsedFile(path=path, error=f"{type(e).__name__}: {e}")
+
+
+def _parse_files(paths, source_format, pool, workers):
+    if pool is None:
+        return [parse_file(path, source_format) for path in paths]
+    chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+    return list(pool.map(parse_file, paths, [source_format] * len(paths), chunksize=chunksize))
+
+
+# -------------------------------------------------------------
+# Report
+# -------------------------------------------------------------
+@dataclass
+class ImportReport:
+    dry_run: bool = False
+    created: list = field(default_factory=list)    # titles
+    updated: list = field(default_factory=list)    # titles
+    unchanged: list = field(default_factory=list)  # titles
+    already_imported: list = field(default_factory=list)  # paths found in the ledger
+    skipped: list = field(default_factory=list)    # (path, reason)
+    errors: list = field(default_factory=list)     # (path, message)
+    new_contributors: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def summary(self):
+        verb = "Would import" if self.dry_run else "Imported"
+        parts = [
+            f"{verb} {len(self.created) + len(self.updated)} songs "
+            f"({len(self.created)} new, {len(self.updated)} updated)",
+            f"{len(self.unchanged)} unchanged",
+        ]
+        if self.already_imported:
+            parts.append(f"{len(self.already_imported)} already imported")
+        parts.append(f"{len(self.skipped)} skipped")
+        parts.append(f"{len(self.errors)} errors in {self.elapsed:.1f}s")
+        return ", ".join(parts)
+
+
+# -------------------------------------------------------------
+# Engine
+# -------------------------------------------------------------
+class ChordProImporter:
+    """
+    source_format: key of SOURCE_FORMATS.
+    contributor: User credited for every song, or
+    contributor_from_artist: credit a user named after the song's artist
+        (created when missing); files without an artist are skipped.
+    update_existing: update songs whose title already exists instead of adding a new one.
+    ledger: record imported files by hash and skip the ones already recorded.
+    """
+
+    def __init__(self, source_format="chordpro", contributor=None, contributor_from_artist=False,
+                 update_existing=True, site_name=None, batch_size=200, workers=None, dry_run=False,
+                 ledger=False, round_size=1000):
+        if source_format not in SOURCE_FORMATS:
+            raise ValueError(f"Unknown source format '{source_format}'")
+        if contributor is None and not contributor_from_artist:
+            raise ValueError("Give a contributor or set contributor_from_artist")
+        self.source_format = source_format
+        self.contributor = contributor
+        self.contributor_from_artist = contributor_from_artist
+        self.update_existing = update_existing
+        self.site_name = site_name
+        self.batch_size = batch_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.ledger = ledger
+        self.round_size = round_size
+        self._hashes = {}
+
+    def run(self, paths, progress=None):
+        """
+        Import `paths` and return an ImportReport.
+        progress: optional callable(done, total) called after each round.
+        """
+        start = time.monotonic()
+        report = ImportReport(dry_run=self.dry_run)
+        paths = list(paths)
+        if self.ledger:
+            paths = self._skip_recorded(paths, report)
+
+        pool = None
+        if self.workers != 1 and len(paths) >= MIN_FILES_FOR_POOL:
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            for offset in range(0, len(paths), self.round_size):
+                self._run_round(paths[offset:offset + self.round_size], pool, report)
+                if progress:
+                    progress(min(offset + self.round_size, len(paths)), len(paths))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        report.elapsed = time.monotonic() - start
+        return report
+
+    def _run_round(self, paths, pool, report):
+        parsed = []
+        for item in _parse_files(paths, self.source_format, pool, self.workers):
+            if item.error:
+                report.errors.append((item.path, item.error))
+            elif not item.title:
+                report.skipped.append((item.path, "no title"))
+            else:
+                parsed.append(item)
+
+        if self.update_existing:
+            parsed = self._drop_duplicate_titles(parsed, report)
+        contributors = self._resolve_contributors(parsed, report)
+        parsed = [item for item in parsed if self._contributor_for(item, contributors)]
+        existing = self._existing_songs([item.title for item in parsed]) if self.update_existing else {}
+
+        new_songs, changed_songs, unchanged = [], [], []
+        for item in parsed:
+            song = existing.get(item.title)
+            if song is None:
+                new_songs.append((item.path, self._new_song(item, contributors)))
+            elif self._is_unchanged(song, item, contributors):
+                unchanged.append((item.path, song))
+                report.unchanged.append(song.songTitle)
+            else:
+                changed_songs.append((item.path, self._updated_song(song, item, contributors)))
+
+        if self.dry_run:
+            report.created += [song.songTitle for _, song in new_songs]
+            report.updated += [song.songTitle for _, song in changed_songs]
+        else:
+            self._write(new_songs, changed_songs, report)
+            if self.ledger and unchanged:
+                from django.db import transaction
+                with transaction.atomic():
+                    self._record(unchanged)
+
+    # --- ledger -------------------------------------------------------
+    def _skip_recorded(self, paths, report):
+        from songbook.models import SongImportRecord
+
+        self._hashes = {path: file_sha256(path) for path in paths}
+        recorded = set()
+        hashes = list(set(self._hashes.values()))
+        for start in range(0, len(hashes), 500):
+            recorded.update(
+                SongImportRecord.objects.filter(file_hash__in=hashes[start:start + 500])
+                .values_list("file_hash", flat=True)
+            )
+
+        pending = []
+        for path in paths:
+            if self._hashes[path] in recorded:
+                report.already_imported.append(path)
+            else:
+                pending.append(path)
+        return pending
+
+    def _record(self, written):
+        """Ledger rows for (path, song) pairs; runs inside the batch transaction."""
+        if not self.ledger:
+            return
+        from songbook.models import SongImportRecord
+
+        SongImportRecord.objects.bulk_create(
+            [
+                SongImportRecord(
+                    file_hash=self._hashes[path],
+                    file_name=os.path.basename(path)[:255],
+                    source_format=self.source_format,
+                    song=song if song.pk else None,
+                )
+                for path, song in written
+            ],
+            ignore_conflicts=True,
+        )
+
+    # --- resolution -------------------------------------------------
+    def _drop_duplicate_titles(self, parsed, report):
+        # Two files with the same title in one archive: the last one wins, as it
+        # would have with one-at-a-time imports
+        by_title = {}
+        for item in parsed:
+            if item.title in by_title:
+                report.skipped.append((by_title[item.title].path, f"superseded by {item.path}"))
+            by_title[item.title] = item
+        return list(by_title.values())
+
+    def _resolve_contributors(self, parsed, report):
+        if not self.contributor_from_artist:
+            return {}
+
+        from django.contrib.auth import get_user_model
+        from django.db import transaction
+        from django.utils.text import slugify
+        User = get_user_model()
+
+        paths_by_name = {}
+        for item in parsed:
+            name = self._artist_username(item)
+            if name:
+                paths_by_name.setdefault(name, []).append(item.path)
+            else:
+                report.skipped.append((item.path, "no artist"))
+
+        users = {user.username: user for user in User.objects.filter(username__in=list(paths_by_name))}
+        for name in sorted(set(paths_by_name) - set(users)):
+            # Email is unique on CustomUser, so artist accounts get a placeholder address
+            user = User(username=name, email=f"artist-{slugify(name) or 'unknown'}@import.invalid")
+            if not self.dry_run:
+                try:
+                    # Saved one by one so the post_save hook gives them preferences
+                    with transaction.atomic():
+                        user.save()
+                except Exception as e:
+                    report.errors += [(path, f"Contributor '{name}': {e}") for path in paths_by_name[name]]
+                    continue
+            users[name] = user
+            report.new_contributors.append(name)
+        return users
+
+    @staticmethod
+    def _artist_username(item):
+        return (item.fields["metadata"].get("artist") or "").strip()[:150]
+
+    def _contributor_for(self, item, contributors):
+        if not self.contributor_from_artist:
+            return self.contributor
+        return contributors.get(self._artist_username(item))
+
+    def _existing_songs(self, titles):
+        from songbook.models import Song
+
+        existing = {}
+        for start in range(0, len(titles), 500):
+            # Highest pk first so the lowest pk wins, like filter(songTitle=...).first()
+            songs = Song.objects.filter(songTitle__in=titles[start:start + 500]).order_by("-pk")
+            for song in songs:
+                existing[song.songTitle] = song
+        return existing
+
+    # --- building rows ------------------------------------------------
+    def _new_song(self, item, contributors):
+        from songbook.models import Song
+
+        song = Song(songChordPro=item.chordpro, contributor=self._contributor_for(item, contributors),
+                    **item.fields, **item.extra)
+        if self.site_name:
+            song.site_name = self.site_name
+        return song
+
+    def _is_unchanged(self, song, item, contributors):
+        # Re-importing the same archive shouldn't rewrite every row
+        return (
+            song.songChordPro == item.chordpro
+            and all(getattr(song, name) == value for name, value in item.extra.items())
+            and (
+                not self.contributor_from_artist
+                or song.contributor_id == self._contributor_for(item, contributors).pk
+            )
+        )
+
+    def _updated_song(self, song, item, contributors):
+        from django.utils import timezone
+
+        song._previous_artist_slot = (song.site_name, song.artist_key)
+        if song.songChordPro != item.chordpro:
+            song.date_posted = timezone.now().date()
+        song.songChordPro = item.chordpro
+        if self.contributor_from_artist:
+            song.contributor = self._contributor_for(item, contributors)
+        for name, value in {**item.fields, **item.extra}.items():
+            setattr(song, name, value)
+        song._extra_fields = list(item.extra)
+        song.mark_changed()
+        return song
+
+    # --- writing --------------------------------------------------------
+    UPDATE_FIELDS = ["songChordPro", "contributor", "date_posted", *DERIVED_SONG_FIELDS, "content_version", "updated_at"]
+
+    def _update_fields(self, songs):
+        extra = {name for song in songs for name in getattr(song, "_extra_fields", [])}
+        return self.UPDATE_FIELDS + sorted(extra)
+
+    def _write(self, new_songs, changed_songs, report):
+        from django.db import transaction
+        from songbook.models import Song, refresh_song_indexes
+
+        written = []
+        for start in range(0, max(len(new_songs), len(changed_songs)), self.batch_size):
+            creates = new_songs[start:start + self.batch_size]
+            updates = changed_songs[start:start + self.batch_size]
+            try:
+                with transaction.atomic():
+                    Song.objects.bulk_create([song for _, song in creates])
+                    songs = [song for _, song in updates]
+                    Song.objects.bulk_update(songs, self._update_fields(songs))
+                    self._record(creates + updates)
+            except Exception:
+                for _, song in creates:
+                    song.pk = None  # ids handed out inside the rolled-back transaction
+                self._write_one_by_one(creates, updates, report, written)
+                continue
+            report.created += [song.songTitle for _, song in creates]
+            report.updated += [song.songTitle for _, song in updates]
+            written += [song for _, song in creates + updates]
+
+        # Backends that don't return ids from bulk_create (MySQL) need a lookup
+        missing_ids = [song.songTitle for song in written if song.pk is None]
+        if missing_ids:
+            written = [song for song in written if song.pk] + list(Song.objects.filter(songTitle__in=missing_ids))
+
+        refresh_song_indexes(written, [getattr(song, "_previous_artist_slot", None) for song in written])
+
+    def _write_one_by_one(self, creates, updates, report, written):
+        from django.db import transaction
+        from songbook.models import Song
+
+        for path, song in creates:
+            try:
+                with transaction.atomic():
+                    Song.objects.bulk_create([song])
+                    self._record([(path, song)])
+            except Exception as e:
+                report.errors.append((path, f"{type(e).__name__}: {e}"))
+                continue
+            report.created.append(song.songTitle)
+            written.append(song)
+
+        for path, song in updates:
+            try:
+                with transaction.atomic():
+                    Song.objects.bulk_update([song], self._update_fields([song]))
+                    self._record([(path, song)])
+            except Exception as e:
+                report.errors.append((path, f"{type(e).__name__}: {e}"))
+                continue
+            report.updated.append(song.songTitle)
+            written.append(song)
+
+
+def collect_files(directory, extensions):
+    """Sorted paths of the files in `directory` ending in one of `extensions`."""
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(tuple(extensions))
+    )
+
+
+def write_report(report, stdout, stderr, style, verbose=True):
+    """Print an ImportReport from a management command."""
+    if verbose:
+        for title in report.created:
+            stdout.write(f"Created new song: {title}")
+        for title in report.updated:
+            stdout.write(f"Updated song: {title}")
+    for name in report.new_contributors:
+        stdout.write(f"New contributor: {name}")
+    if verbose:
+        for path in report.already_imported:
+            stdout.write(f"Already imported: {path}")
+    for path, reason in report.skipped:
+        stderr.write(f"Skipped {path}: {reason}")
+    for path, message in report.errors:
+        stderr.write(style.ERROR(f"Error in {path}: {message}"))
+    stdout.write((style.SUCCESS if report.ok else style.WARNING)(report.summary()))
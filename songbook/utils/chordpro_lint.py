@@ -0,0 +1,297 @@
+# songbook/utils/chordpro_lint.py
+"""
+ChordPro lint: problems in a song that the renderers silently paper over.
+
+    missing_diagram         a chord with no diagram in an instrument's library
+                            (load_relevant_chords drops it from the footer)
+    variation_out_of_range  [C(3)] or {suggested_alternate: C(3)} asking for a
+                            variation the instrument's library doesn't have
+    unmatched_section_end   {eoc} without an open {soc}, or closing another section
+    unclosed_section        {soc} still open when the next section starts / the song ends
+    unknown_directive       a {directive} none of the renderers understand
+    unrecognized_token      a [bracketed] token that isn't a chord ([x2], [Verse])
+
+lint_chordpro() is a pure function of the ChordPro text, so the lint_songs
+command can run it in worker processes. Chords are found with the chord
+index tokenizer and matched against the libraries the way
+load_relevant_chords matches them (slashes and bass notes dropped, maj/min
+and flats folded).
+
+SongLintIssue rows are rebuilt on Song save (see refresh_song_indexes in
+models.py); lint_songs rebuilds all of them and prints the report.
+"""
+import json
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from songbook.parsers import METADATA_PATTERNS
+from songbook.utils.chord_index import chord_occurrences
+from songbook.utils.chord_library import CHORDS_DIR
+from songbook.utils.chords.comparison import canonicalize_enharmonic, normalize_maj_tokens
+
+LintIssue = namedtuple("LintIssue", "code severity instrument token line_number message")
+
+SEVERITIES = {
+    "missing_diagram": "error",
+    "variation_out_of_range": "error",
+    "unmatched_section_end": "error",
+    "unclosed_section": "warning",
+    "unknown_directive": "warning",
+    "unrecognized_token": "warning",
+}
+
+SECTION_DIRECTIVES = {
+    "soc": "eoc", "sov": "eov", "sob": "eob", "soi": "eoi",
+    "soo": "eoo", "sos": "eos", "sod": "eod",
+    "start_of_tab": "end_of_tab",
+}
+SECTION_ENDS = {end: start for start, end in SECTION_DIRECTIVES.items()}
+
+KNOWN_DIRECTIVES = (
+    {name.lower() for name in METADATA_PATTERNS}
+    | {"t", "c", "recording", "page", "instruction"}
+    | set(SECTION_DIRECTIVES) | set(SECTION_ENDS)
+)
+
+DIRECTIVE_RE = re.compile(r"^\{\s*([^}:\s]+)\s*(?::[^}]*)?\}")
+CHORD_SHAPE_RE = re.compile(r"^[A-G][#b]?[A-Za-z0-9#+°ø()\-]*(?:/[A-G][#b]?)?/*$")
+FORCED_VARIATION_RE = re.compile(r"^(.+?)\((\d+)\)$")
+NO_CHORD = {"N.C.", "NC", "N.C"}
+
+
+# -------------------------------------------------------------
+# Chord libraries
+# -------------------------------------------------------------
+def library_key(name):
+    """Lookup key shared by a song's chord and its library entry ('Bbmaj7//' -> 'A#M7')."""
+    name = re.sub(r"/+$", "", name.strip().replace("♯", "#").replace("♭", "b"))
+    name = re.sub(r"/[A-G][#b]?$", "", name)
+    return canonicalize_enharmonic(normalize_maj_tokens(name))
+
+
+def available_instruments():
+    return sorted(path.stem for path in CHORDS_DIR.glob("*.json"))
+
+
+@lru_cache(maxsize=32)
+def _chord_library(instrument, mtime_ns):
+    with open(CHORDS_DIR / f"{instrument}.json", "r", encoding="utf-8") as f:
+        chords = json.load(f)
+    library = {}
+    for chord in chords:
+        key = library_key(chord.get("name", ""))
+        library[key] = max(library.get(key, 0), len(chord.get("variations", [])))
+    return library
+
+
+def chord_library(instrument):
+    """{library_key: number of variations} for an instrument, reloaded when its JSON file changes."""
+    return _chord_library(instrument, (CHORDS_DIR / f"{instrument}.json").stat().st_mtime_ns)
+
+
+# -------------------------------------------------------------
+# Lint
+# -------------------------------------------------------------
+def _issue(code, instrument="", token="", line_number=None, message=""):
+    return LintIssue(code, SEVERITIES[code], instrument, token, line_number, message)
+
+
+def _lint_sections(lines):
+    issues = []
+    open_section = None  # (directive, line_number)
+    for line_number, line in enumerate(lines, 1):
+        match = DIRECTIVE_RE.match(line.strip())
+        if not match:
+            continue
+        name = match.group(1).lower()
+
+        if name in SECTION_DIRECTIVES:
+            if open_section:
+                issues.append(_issue(
+                    "unclosed_section", token=open_section[0], line_number=open_section[1],
+                    message=f"{{{open_section[0]}}} is not closed before {{{name}}} on line {line_number}",
+                ))
+            open_section = (name, line_number)
+        elif name in SECTION_ENDS:
+            if open_section is None or open_section[0] != SECTION_ENDS[name]:
+                opened = f"{{{open_section[0]}}} is open" if open_section else "no section is open"
+                issues.append(_issue(
+                    "unmatched_section_end", token=name, line_number=line_number,
+                    message=f"{{{name}}} but {opened}",
+                ))
+            else:
+                open_section = None
+        elif name not in KNOWN_DIRECTIVES:
+            issues.append(_issue(
+                "unknown_directive", token=name, line_number=line_number,
+                message=f"Unknown directive {{{name}}}",
+            ))
+
+    if open_section:
+        issues.append(_issue(
+            "unclosed_section", token=open_section[0], line_number=open_section[1],
+            message=f"{{{open_section[0]}}} is never closed",
+        ))
+    return issues
+
+
+def _requested_chords(chordpro_text):
+    """(token, base chord, forced variation or None, line_number) for every chord asked for."""
+    requested = []
+    for token, _normalized, line_number, _column, _line in chord_occurrences(chordpro_text):
+        forced = FORCED_VARIATION_RE.match(token)
+        if forced:
+            requested.append((token, forced.group(1), int(forced.group(2)), line_number))
+        else:
+            requested.append((token, token, None, line_number))
+
+    alternates = METADATA_PATTERNS["suggested_alternate"].search(chordpro_text)
+    if alternates:
+        line_number = chordpro_text.count("\n", 0, alternates.start()) + 1
+        for alternate in alternates.group(1).split(","):
+            forced = FORCED_VARIATION_RE.match(alternate.strip())
+            if forced:
+                requested.append((alternate.strip(), forced.group(1), int(forced.group(2)), line_number))
+    return requested
+
+
+def lint_chordpro(chordpro_text, instruments=None):
+    """
+    LintIssues for one song's ChordPro, checked against every instrument
+    library (or just `instruments`). Each missing chord is reported once per
+    instrument, at its first line.
+    """
+    chordpro_text = chordpro_text or ""
+    instruments = instruments or available_instruments()
+    issues = _lint_sections(chordpro_text.splitlines())
+
+    seen = set()
+    for token, base, forced, line_number in _requested_chords(chordpro_text):
+        if base.strip().upper() in NO_CHORD:
+            continue
+        if not CHORD_SHAPE_RE.match(base.strip().replace("♯", "#").replace("♭", "b")):
+            if ("token", token) not in seen:
+                seen.add(("token", token))
+                issues.append(_issue(
+                    "unrecognized_token", token=token, line_number=line_number,
+                    message=f"[{token}] is not a chord",
+                ))
+            continue
+
+        key = library_key(base)
+        for instrument in instruments:
+            variations = chord_library(instrument).get(key)
+            if variations is None:
+                if (instrument, key) not in seen:
+                    seen.add((instrument, key))
+                    issues.append(_issue(
+                        "missing_diagram", instrument, key, line_number,
+                        f"No {instrument} diagram for {base}",
+                    ))
+            elif forced is not None and forced >= variations and (instrument, token) not in seen:
+                seen.add((instrument, token))
+                issues.append(_issue(
+                    "variation_out_of_range", instrument, token, line_number,
+                    f"{base} has {variations} {instrument} variation(s); {token} asks for #{forced}",
+                ))
+    return issues
+
+
+# -------------------------------------------------------------
+# Stored issues
+# -------------------------------------------------------------
+def issue_rows(song_id, issues):
+    from songbook.models import SongLintIssue
+
+    return [
+        SongLintIssue(
+            song_id=song_id,
+            code=issue.code,
+            severity=issue.severity,
+            instrument=issue.instrument,
+            token=issue.token[:50],
+            line_number=issue.line_number,
+            message=issue.message[:255],
+        )
+        for issue in issues
+    ]
+
+
+def store_song_issues(results):
+    """Replace the SongLintIssue rows of songs from {song_id: [LintIssue, ...]}."""
+    from django.db import transaction
+    from songbook.models import SongLintIssue
+
+    rows = [row for song_id, issues in results.items() for row in issue_rows(song_id, issues)]
+    with transaction.atomic():
+        SongLintIssue.objects.filter(song_id__in=list(results)).delete()
+        SongLintIssue.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def lint_songs(songs):
+    """Re-lint saved songs and store their issues. Returns the number of issues."""
+    results = {song.pk: lint_chordpro(song.songChordPro) for song in songs if song.pk}
+    if not results:
+        return 0
+    return store_song_issues(results)
+
+
+def impact_report(issues=None):
+    """
+    Stored issues grouped by (code, instrument, token), most songs affected first:
+    [{"code", "severity", "instrument", "token", "songs", "occurrences"}].
+    issues: optional SongLintIssue queryset to report on.
+    """
+    from django.db.models import Count
+    from songbook.models import SongLintIssue
+
+    issues = SongLintIssue.objects.all() if issues is None else issues
+    return list(
+        issues.values("code", "severity", "instrument", "token")
+        .annotate(songs=Count("song", distinct=True), occurrences=Count("id"))
+        .order_by("-songs", "severity", "code", "instrument", "token")
+    )
+
+
+def diagram_coverage(instruments=None):
+    """
+    Per instrument: distinct chords used in the catalogue, how many have no
+    diagram and how many songs those affect, worst coverage first.
+    """
+    from django.db.models import Count
+    from songbook.models import SongLintIssue
+
+    missing = {
+        row["instrument"]: row
+        for row in SongLintIssue.objects.filter(code="missing_diagram")
+        .values("instrument")
+        .annotate(chords=Count("token", distinct=True), songs=Count("song", distinct=True))
+    }
+    used = _catalogue_chord_keys()
+    coverage = []
+    for instrument in instruments or available_instruments():
+        library = chord_library(instrument)
+        absent = sum(1 for key in used if key not in library)
+        row = missing.get(instrument, {})
+        coverage.append({
+            "instrument": instrument,
+            "chords_used": len(used),
+            "missing": absent,
+            "songs_affected": row.get("songs", 0),
+        })
+    return sorted(coverage, key=lambda row: (-row["songs_affected"], -row["missing"], row["instrument"]))
+
+
+def _catalogue_chord_keys():
+    """Library keys of the chord-shaped tokens in the chord index."""
+    from songbook.models import ChordOccurrence
+
+    keys = set()
+    for token in ChordOccurrence.objects.values_list("token", flat=True).distinct():
+        forced = FORCED_VARIATION_RE.match(token)
+        base = (forced.group(1) if forced else token).strip().replace("♯", "#").replace("♭", "b")
+        if base.upper() not in NO_CHORD and CHORD_SHAPE_RE.match(base):
+            keys.add(library_key(base))
+    return keys
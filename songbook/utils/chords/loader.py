@@ -8,6 +8,7 @@ from django.conf import settings
 from songbook.utils.transposer import normalize_chord, clean_chord, transpose_chord
 from songbook.utils.chords.comparison import chord_equivalent
 from songbook.utils.chords.normalize import normalize_variation
+from songbook.utils.metrics import span
 
 
 logger = logging.getLogger(__name__)
@@ -103,7 +104,8 @@ def extract_used_chords(lyrics_with_chords: Any) -> list[str]:
 # =======================
 # LOAD RELEVANT CHORDS
 # =======================
-def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate=None):
+@span("chord_resolution")
+def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate=None, chords=None):
     """
     Load chords for the primary instrument ONLY, including requested alternates
     from chordpro syntax such as [C(1)], and optionally showing default alternates
@@ -114,17 +116,13 @@ def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate
     - If chordpro requests a variation N via [C(N)], ALWAYS include it.
     - If suggested_alternate is specified, ALWAYS include that variation.
     - If user preference for alternates is ON, include v1 unless overridden.
+
+    `chords` is the instrument's load_chords() list, for callers that
+    already loaded it (rehearsal packs); it is read, never modified.
     """
 
     import re
 
-    # 🐛 DEBUG
-    print("=" * 60)
-    print("LOAD_RELEVANT_CHORDS DEBUG:")
-    print(f"  suggested_alternate input: {suggested_alternate}")
-    print(f"  show_alternate_chords pref: {user_prefs.get('show_alternate_chords', False)}")
-    print("=" * 60)
-
     # ------------------------------------------------------------
     # Helper: parse chordpro forced variation, e.g. "C(1)" -> ("C", 1)
     # ------------------------------------------------------------
@@ -153,23 +151,13 @@ def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate
 
         # SONG FORCES VARIATION(S) (from suggested_alternate OR inline [C(1)])
         if forced_list is not None:
-            print(f"    - FORCED variations detected: {forced_list}")
             for forced in forced_list:
                 if forced < len(all_variations) and forced != 0:
                     if all_variations[forced] not in result:
                         result.append(all_variations[forced])
-                        print(f"    - Added variation {forced}")
-                    else:
-                        print(f"    - Variation {forced} already in result (skipped)")
                 else:
-                    print(f"    - Forced variation {forced} is invalid or is 0")
-            
-            # 🐛 NEW DEBUG: Show what's actually in result
-            print(f"    - Result list has {len(result)} items:")
-            for idx, var in enumerate(result):
-                print(f"      [{idx}] = {var}")
-            
-            print(f"    - Final variations: {len(result)} variations")
+                    logger.debug("%s: forced variation %s is invalid or 0", base_name, forced)
+            logger.debug("%s: forced variations %s -> %d variations", base_name, forced_list, len(result))
             return result
 
         # USER PREF: INCLUDE DEFAULT ALTERNATE v1
@@ -177,9 +165,7 @@ def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate
             for idx in range(1, len(all_variations)):
                 if all_variations[idx] not in result:
                     result.append(all_variations[idx])
-                    print(f"    - Added v{idx} due to user preference")
 
-        print(f"    - Final variations: {len(result)} variations")
         return result
     # ------------------------------------------------------------
     # Load primary instrument dictionary
@@ -187,25 +173,18 @@ def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate
     primary_inst = user_prefs.get("primary_instrument") or "ukulele"
     show_alternates = user_prefs.get("show_alternate_chords", False)
 
-    chords_primary = load_chords(primary_inst)
-
-    for c in chords_primary:
-        c["instrument"] = primary_inst
+    chords_primary = chords if chords is not None else load_chords(primary_inst)
 
     # ------------------------------------------------------------
     # Extract raw chords from the song
     # ------------------------------------------------------------
     raw_used = extract_used_chords(songs[0].lyrics_with_chords)
-    
-    # 🐛 DEBUG
-    print(f"Raw chords extracted: {raw_used}")
 
     # MAP: {base_name -> LIST of forced_variation_indices}
     requested_variations = {}
 
     # 🆕 Process suggested_alternate from metadata FIRST (global override)
     if suggested_alternate:
-        print(f"Processing suggested_alternate: '{suggested_alternate}'")
         # Split by comma to support multiple alternates
         alternates = [alt.strip() for alt in suggested_alternate.split(',')]
         
@@ -214,15 +193,13 @@ def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate
             if match:
                 base = match.group(1)
                 forced = match.group(2)
-                print(f"  Parsed: base='{base}', forced='{forced}'")
                 if forced is not None:
                     # Store as a list to allow multiple variations per chord
                     if base not in requested_variations:
                         requested_variations[base] = []
                     requested_variations[base].append(int(forced))
-                    print(f"  Added to requested_variations: {base} -> {requested_variations[base]}")
             else:
-                print(f"  FAILED to parse alternate: '{alt}'")
+                logger.debug("Could not parse suggested alternate %r", alt)
 
     # Build request map from inline chords (can override suggested_alternate)
     for ch in raw_used:
@@ -234,9 +211,6 @@ def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate
             if forced not in requested_variations[base]:
                 requested_variations[base].append(forced)
 
-    # 🐛 DEBUG
-    print(f"Final requested_variations map: {requested_variations}")
-
     # ------------------------------------------------------------
     # Normalize + transpose the chords
     # ------------------------------------------------------------
@@ -246,9 +220,6 @@ def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate
         for ch in used_cleaned
     }
 
-    # 🐛 DEBUG
-    print(f"Transposed chords: {transposed_chords}")
-
     # ------------------------------------------------------------
     # Build final relevant chord list
     # ------------------------------------------------------------
@@ -286,6 +257,8 @@ def load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate
                 added_keys.add(key)
                 break
 
-    print(f"Final relevant_chords count: {len(relevant_chords)}")
-    print("=" * 60)
+    logger.debug(
+        "load_relevant_chords: %s, transpose %s, suggested_alternate %r, requested %s -> %d chords",
+        primary_inst, transpose_value, suggested_alternate, requested_variations, len(relevant_chords),
+    )
     return relevant_chords
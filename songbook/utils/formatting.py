@@ -4,53 +4,11 @@ from pathlib import Path
 from django.shortcuts import render, get_object_or_404
 from songbook.models import Song
 from songbook.utils.teleprompter_renderer import render_lyrics_with_chords_html
+from songbook.utils.render_ir import song_render_ir
 from songbook.utils.chord_library import load_chord_dict
 from songbook.context_processors import site_context
-
-# -----------------------------
-# 🎨 Color Markup Helper
-# -----------------------------
-def apply_html_color_markup(text):
-    """
-    Convert custom color tags to HTML for web display.
-    Similar to PDF apply_color_markup but outputs span tags.
-    """
-    if not text:
-        return text
-    
-    color_map = {
-        'red': 'red',
-        'blue': 'blue',
-        'green': 'green',
-        'yellow': 'gold',
-        'orange': 'orange',
-        'pink': 'hotpink',
-        'purple': 'purple',
-    }
-    
-    # Full color names: <red>text</red> → <span style='color:red'>text</span>
-    for tag, color in color_map.items():
-        pattern = re.compile(rf'<{tag}>(.*?)</{tag}>', re.IGNORECASE | re.DOTALL)
-        text = pattern.sub(lambda m: f"<span style='color:{color}'>{m.group(1)}</span>", text)
-    
-    # Short color codes: <r>text</r> → <span style='color:red'>text</span>
-    short_map = {'r': 'red', 'g': 'green', 'y': 'gold'}
-    for tag, color in short_map.items():
-        pattern = re.compile(rf'<{tag}>(.*?)</{tag}>', re.IGNORECASE | re.DOTALL)
-        text = pattern.sub(lambda m: f"<span style='color:{color}'>{m.group(1)}</span>", text)
-    
-    # Custom highlight: <highlight color="blue">text</highlight>
-    pattern = re.compile(r'<highlight\s+color="(.*?)">(.*?)</highlight>', re.IGNORECASE | re.DOTALL)
-    text = pattern.sub(lambda m: f"<span style='background-color:{m.group(1)}'>{m.group(2)}</span>", text)
-    
-    # Simple highlight: <h>text</h> → yellow background
-    text = re.sub(r'<h>(.*?)</h>', r"<span style='background-color:yellow'>\1</span>", text, flags=re.IGNORECASE | re.DOTALL)
-    
-    # Clean up any nested closing tags
-    text = re.sub(r'</span>\s*</span>', '</span>', text)
-    
-    return text
-
+from users.context import get_user_context
+from songbook.utils.markup import apply_html_color_markup
 
 # -----------------------------
 # 🧠 Helper: normalize chord names
@@ -94,7 +52,7 @@ def teleprompter_view(request, song_id):
     # -----------------------------
     # 👤 User preference (get first!)
     # -----------------------------
-    user_pref = getattr(request.user, "userpreference", None)
+    user_pref = get_user_context(request).preferences
 
     # -----------------------------
     # 🎸 Determine instrument
@@ -108,27 +66,19 @@ def teleprompter_view(request, song_id):
     chord_library = load_chord_dict(instrument)
 
     # -----------------------------
-    # 📝 Convert lyrics_with_chords JSON to raw lyric-text with [chords]
+    # 🌐 Site context + render IR (cached per song version and site)
     # -----------------------------
-    raw_lines = []
-    for block in song.lyrics_with_chords:
-        if isinstance(block, list):
-            for item in block:
-                if "chord" in item:
-                    raw_lines.append(f"[{item['chord']}]")
-                if "lyric" in item:
-                    raw_lines.append(item["lyric"])
-            raw_lines.append("\n")
-
-    raw_lyrics = "".join(raw_lines)
+    context_data = site_context(request)
+    site_name = context_data["site_name"]
+    render_ir = song_render_ir(song, site_name)
 
     # -----------------------------
     # 🎸 Extract chords
     # -----------------------------
     chord_pattern = re.compile(
-        r"\[([A-G][#b]?(?:m|min|maj7|maj9|maj|sus2|sus4|dim|aug|\d)*(?:/[A-G#b]*)*/*)\]"
+        r"[A-G][#b]?(?:m|min|maj7|maj9|maj|sus2|sus4|dim|aug|\d)*(?:/[A-G#b]*)*/*"
     )
-    found_chords = chord_pattern.findall(raw_lyrics)
+    found_chords = [chord for chord in render_ir["chords"] if chord_pattern.fullmatch(chord)]
 
     # Normalize BEFORE deduplication
     normalized_map = {raw: clean_chord_name(raw) for raw in found_chords}
@@ -149,27 +99,17 @@ def teleprompter_view(request, song_id):
     # 🎯 Known-chord filtering
     # -----------------------------
     if user_pref and getattr(user_pref, "use_known_chord_filter", False):
-        known_chords = getattr(user_pref, "known_chords", []) or []
-        known_clean = set(clean_chord_name(ch).lower() for ch in known_chords)
+        known_clean = get_user_context(request).known_chords
 
         relevant_chords = [
             chord for chord in relevant_chords
             if clean_chord_name(chord["name"]).lower() not in known_clean
         ]
 
-    # -----------------------------
-    # 🌐 Site context
-    # -----------------------------
-    context_data = site_context(request)
-    site_name = context_data["site_name"]
-
     # -----------------------------
     # 🧾 Render lyrics HTML
     # -----------------------------
-    lyrics_html, metadata = render_lyrics_with_chords_html(
-        song.lyrics_with_chords,
-        site_name
-    )
+    lyrics_html, metadata = render_lyrics_with_chords_html(render_ir)
 
     # -----------------------------
     # 🎨 Apply color markup transformations
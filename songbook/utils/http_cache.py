@@ -0,0 +1,156 @@
+# songbook/utils/http_cache.py
+"""
+HTTP caching for song pages and chord JSON.
+
+Song pages (chord sheet, teleprompter) get a strong ETag built from the
+song's content_version, the user's context version (users/context.py: it
+changes with preferences and groups), the site and the query string, plus
+Last-Modified from Song.updated_at. conditional_song_view() answers
+If-None-Match / If-Modified-Since with a 304 after a single
+(content_version, updated_at) lookup, before the view runs. Responses are
+"private, no-cache": browsers keep them but revalidate every time.
+
+Chord libraries are served as pre-serialized JSON, compressed once per
+process (gzip, and brotli when the 'brotli' package is installed). URLs
+carrying ?v=<digest> (chord_json_url) are cached as immutable.
+"""
+import gzip
+import hashlib
+import json
+from functools import lru_cache, wraps
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from songbook.utils.chord_library import CHORDS_DIR
+
+# Bump when templates/renderers change what a song page looks like
+RENDER_VERSION = 2
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+CHORD_JSON_MAX_AGE = 3600
+
+
+# -------------------------------------------------------------
+# Song pages
+# -------------------------------------------------------------
+def _song_version(request, song_id):
+    """(content_version, updated_at) of a song, looked up once per request."""
+    from songbook.models import Song
+
+    versions = request.__dict__.setdefault("_song_versions", {})
+    if song_id not in versions:
+        versions[song_id] = (
+            Song.objects.filter(pk=song_id).values_list("content_version", "updated_at").first()
+        )
+    return versions[song_id]
+
+
+def song_etag(request, song_id):
+    from users.context import context_version
+
+    version = _song_version(request, song_id)
+    if version is None:
+        return None  # let the view raise its 404
+    parts = [
+        RENDER_VERSION,
+        song_id,
+        version[0],
+        context_version(request.user),
+        request.path.strip("/").split("/")[0].lower(),
+        request.GET.urlencode(),
+    ]
+    return hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:32]
+
+
+def song_last_modified(request, song_id):
+    version = _song_version(request, song_id)
+    return version[1] if version else None
+
+
+def conditional_song_view(song_kwarg="pk"):
+    """
+    Decorator for function views (or dispatch() via method_decorator) showing one
+    song, identified by the `song_kwarg` URL kwarg.
+    """
+    def decorator(view_func):
+        conditional = condition(
+            etag_func=lambda request, *args, **kwargs: song_etag(request, kwargs[song_kwarg]),
+            last_modified_func=lambda request, *args, **kwargs: song_last_modified(request, kwargs[song_kwarg]),
+        )(view_func)
+
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+                patch_cache_control(response, private=True, no_cache=True)
+                patch_vary_headers(response, ["Cookie"])
+            return response
+        return wrapped
+    return decorator
+
+
+# -------------------------------------------------------------
+# Chord JSON
+# -------------------------------------------------------------
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+@lru_cache(maxsize=32)
+def _chord_json(instrument, mtime_ns):
+    with open(CHORDS_DIR / f"{instrument}.json", "r", encoding="utf-8") as f:
+        data = json.dumps(json.load(f), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    encodings = {"identity": data, "gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(data, quality=11)
+    return hashlib.sha256(data).hexdigest()[:16], encodings
+
+
+def chord_json_payload(instrument):
+    """(digest, {encoding: bytes}) for an instrument's chord library; FileNotFoundError if missing."""
+    path = CHORDS_DIR / f"{instrument}.json"
+    return _chord_json(instrument, path.stat().st_mtime_ns)
+
+
+def chord_json_url(instrument, namespace="francouke"):
+    """Versioned URL of an instrument's chord JSON, safe to cache forever."""
+    digest, _ = chord_json_payload(instrument)
+    return reverse(f"{namespace}:serve_chords_json", kwargs={"instrument": instrument}) + f"?v={digest}"
+
+
+def _accepted_encoding(request, available):
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("Accept-Encoding", "").split(",")
+    }
+    for encoding in ("br", "gzip"):
+        if encoding in accepted and encoding in available:
+            return encoding
+    return "identity"
+
+
+def chord_json_response(request, instrument):
+    digest, encodings = chord_json_payload(instrument)
+    encoding = _accepted_encoding(request, encodings)
+    # Each encoding is a different byte sequence, so it gets its own strong ETag
+    etag = f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+
+    if etag in [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(encodings[encoding], content_type="application/json")
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    if request.GET.get("v") == digest:
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=CHORD_JSON_MAX_AGE)
+    return response
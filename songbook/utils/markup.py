@@ -0,0 +1,134 @@
+# songbook/utils/markup.py
+"""
+Lyric colour markup, shared by the PDF and HTML renderers.
+
+    <red>..</red> <blue> <green> <yellow> <orange> <pink> <purple>
+    <r>..</r> <g> <y>                       short colour tags
+    <h>..</h>                               yellow highlight
+    <highlight color="blue">..</highlight>  highlight in any colour
+
+render_markup() makes one pass over the text with a single regex compiled
+at import, keeping a stack of open tags. The output is always balanced:
+- a closing tag also closes the tags opened inside it, and reopens them
+  after it;
+- stray closing tags are dropped;
+- tags still open at the end of the text are closed there.
+Backends turn a tag into output markup: REPORTLAB (<font>) for Paragraphs,
+HTML (<span>) for the web pages. Anything that isn't a markup tag (<b>,
+chord HTML, text) is copied as is.
+
+Pass escaped=True for text that was HTML-escaped first (the chord sheet
+escapes lyrics before rendering them): the tags are then matched as
+&lt;r&gt;...&lt;/r&gt;.
+"""
+import re
+
+COLORS = {
+    "red": "red",
+    "blue": "blue",
+    "green": "green",
+    "yellow": "gold",
+    "orange": "orange",
+    "pink": "hotpink",
+    "purple": "purple",
+    "r": "red",
+    "g": "green",
+    "y": "gold",
+}
+HIGHLIGHT_TAGS = {"h", "highlight"}
+DEFAULT_HIGHLIGHT = "yellow"
+
+_TAG_NAMES = "|".join(sorted([*COLORS, *HIGHLIGHT_TAGS], key=len, reverse=True))
+
+
+def _tag_pattern(lt, gt, quote):
+    # Colour values are restricted to [#\w], so they can't break out of an attribute
+    return re.compile(
+        rf"{lt}(/?)\s*({_TAG_NAMES})\b(?:\s+color\s*=\s*{quote}?([#\w]+){quote}?)?\s*{gt}",
+        re.IGNORECASE,
+    )
+
+
+TAG_RE = _tag_pattern("<", ">", "[\"']")
+ESCAPED_TAG_RE = _tag_pattern("&lt;", "&gt;", "(?:&quot;|&#x27;|&#39;)")
+
+
+# =======================
+# BACKENDS
+# =======================
+class ReportLabMarkup:
+    def open(self, kind, color):
+        if kind == "highlight":
+            return f"<font backColor='{color}'>"
+        return f"<font color='{color}'>"
+
+    def close(self, kind):
+        return "</font>"
+
+
+class HtmlMarkup:
+    def open(self, kind, color):
+        if kind == "highlight":
+            return f"<span style='background-color:{color}'>"
+        return f"<span style='color:{color}'>"
+
+    def close(self, kind):
+        return "</span>"
+
+
+REPORTLAB = ReportLabMarkup()
+HTML = HtmlMarkup()
+
+
+# =======================
+# RENDERING
+# =======================
+def render_markup(text, backend=HTML, escaped=False):
+    if not text or ("&lt;" if escaped else "<") not in text:
+        return text
+
+    out = []
+    stack = []  # (tag name, kind, color)
+    pos = 0
+    for match in (ESCAPED_TAG_RE if escaped else TAG_RE).finditer(text):
+        out.append(text[pos:match.start()])
+        pos = match.end()
+        closing, name, color = match.group(1), match.group(2).lower(), match.group(3)
+
+        if not closing:
+            if name in HIGHLIGHT_TAGS:
+                entry = (name, "highlight", color or DEFAULT_HIGHLIGHT)
+            else:
+                entry = (name, "color", COLORS[name])
+            stack.append(entry)
+            out.append(backend.open(entry[1], entry[2]))
+            continue
+
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index][0] == name:
+                break
+        else:
+            continue  # stray closing tag
+
+        inner = stack[index + 1:]
+        for entry in reversed(stack[index:]):
+            out.append(backend.close(entry[1]))
+        del stack[index:]
+        for entry in inner:
+            stack.append(entry)
+            out.append(backend.open(entry[1], entry[2]))
+
+    out.append(text[pos:])
+    for entry in reversed(stack):
+        out.append(backend.close(entry[1]))
+    return "".join(out)
+
+
+def apply_color_markup(text):
+    """Colour markup as ReportLab <font> tags (PDF paragraphs)."""
+    return render_markup(text, REPORTLAB)
+
+
+def apply_html_color_markup(text):
+    """Colour markup as <span> tags (teleprompter, setlist and web views)."""
+    return render_markup(text, HTML)
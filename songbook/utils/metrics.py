@@ -0,0 +1,180 @@
+# songbook/utils/metrics.py
+"""
+Timing and query counts for the hot paths, in place of print() debugging.
+
+    with span("layout"):
+        ...
+
+    @span("chord_resolution")
+    def load_relevant_chords(...):
+
+A span logs its duration at DEBUG on the "songbook.metrics" logger and adds
+it to the songbook_span_seconds histogram. The spans in use are parse,
+render_ir, chord_resolution, html_render, layout and pdf_build.
+
+RequestMetricsMiddleware (core/middleware/request_metrics.py) wraps each
+request in track_request(): queries and their database time are counted
+with an execute_wrapper, and one DEBUG line per request sums them up with
+the time spent in each span.
+
+The counters and histograms live in the process (each web worker, each
+run_render_jobs worker has its own) and are reset on restart;
+render_prometheus() writes them in the Prometheus text format for the staff
+/metrics/ endpoint.
+"""
+import contextvars
+import logging
+import threading
+import time
+from contextlib import ContextDecorator, contextmanager
+
+from django.db import connection
+
+logger = logging.getLogger("songbook.metrics")
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500)
+
+METRICS = {
+    "songbook_span_seconds": ("histogram", "Time spent in a named span (parse, layout, pdf_build, ...)."),
+    "songbook_requests_total": ("counter", "Requests handled, by view and status class."),
+    "songbook_request_seconds": ("histogram", "Request duration, by view."),
+    "songbook_request_queries": ("histogram", "Database queries per request, by view."),
+    "songbook_request_db_seconds": ("histogram", "Database time per request, by view."),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [buckets, bucket counts, sum, count]
+
+# RequestStats of the request being handled, if any
+_current = contextvars.ContextVar("songbook_request_stats", default=None)
+
+
+# =======================
+# REGISTRY
+# =======================
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, buckets=SECONDS_BUCKETS, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [buckets, [0] * len(buckets), 0.0, 0]
+        for i, bound in enumerate(histogram[0]):
+            if value <= bound:
+                histogram[1][i] += 1
+        histogram[2] += value
+        histogram[3] += 1
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# =======================
+# SPANS / REQUESTS
+# =======================
+class span(ContextDecorator):
+    """Time a block (or, as a decorator, every call) under `name`."""
+
+    def __init__(self, name):
+        self.name = name
+        # Start times per thread, stacked: a decorated function may recurse
+        self._starts = threading.local()
+
+    def __enter__(self):
+        self._starts.__dict__.setdefault("stack", []).append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._starts.stack.pop()
+        observe("songbook_span_seconds", elapsed, span=self.name)
+        stats = _current.get()
+        if stats is not None:
+            stats.spans[self.name] = stats.spans.get(self.name, 0.0) + elapsed
+        logger.debug("span %s: %.1f ms", self.name, elapsed * 1000)
+        return False
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.spans = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+@contextmanager
+def track_request():
+    """Count the queries and span times of the enclosed work; yields the RequestStats."""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        with connection.execute_wrapper(stats):
+            yield stats
+    finally:
+        _current.reset(token)
+
+
+# =======================
+# EXPORT
+# =======================
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Every counter and histogram in the Prometheus text exposition format (0.0.4)."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: (h[0], list(h[1]), h[2], h[3]) for key, h in _histograms.items()}
+
+    names = sorted({name for name, _ in counters} | {name for name, _ in histograms})
+    lines = []
+    for name in names:
+        kind, help_text = METRICS.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for (metric, labels), (buckets, bucket_counts, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, bucket_count in zip(buckets, bucket_counts):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {bucket_count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
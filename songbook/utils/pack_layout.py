@@ -0,0 +1,95 @@
+# songbook/utils/pack_layout.py
+"""
+Layout pass of the rehearsal packs (utils/rehearsal_pack.py): platypus runs
+once with a frame that records where each flowable lands instead of drawing
+it, so every instrument's PDF can replay the same pages.
+"""
+import io
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import BaseDocTemplate, Flowable, Frame, PageBreak, PageTemplate
+
+from songbook.utils.chord_sheet_html import get_song_formatting
+from songbook.utils.metrics import span
+from songbook.utils.pdf_generator import (
+    PAGE_MARGINS, build_song_elements, get_paragraph_styles, get_user_preferences, sample_styles,
+)
+
+
+class SongStart(Flowable):
+    """Zero-size marker: the pages from here on belong to `song`."""
+    _ZEROSIZE = True
+
+    def __init__(self, song):
+        super().__init__()
+        self.song = song
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        pass
+
+
+class _RecordingFrame(Frame):
+    """Frame that records (flowable, x, y, _sW) on the current page instead of drawing."""
+
+    def __init__(self, pages, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pages = pages
+
+    def _add(self, flowable, canv, trySplit=0):
+        def place(canv, x, y, _sW=0):
+            self._pages[-1].append((flowable, x, y, _sW))
+
+        flowable.drawOn = place
+        try:
+            return super()._add(flowable, canv, trySplit)
+        finally:
+            del flowable.drawOn
+
+    add = _add
+
+
+class _LayoutDocTemplate(BaseDocTemplate):
+    def __init__(self, pages, **kwargs):
+        super().__init__(io.BytesIO(), pagesize=letter, **PAGE_MARGINS, **kwargs)
+        self.pages = pages
+        frame = _RecordingFrame(pages, self.leftMargin, self.bottomMargin, self.width, self.height, id="normal")
+        self.addPageTemplates([PageTemplate(id="song", frames=[frame])])
+
+    def handle_pageBegin(self):
+        self.pages.append([])
+        super().handle_pageBegin()
+
+
+@span("layout")
+def layout_pages(songs, user, site_name="FrancoUke"):
+    """
+    Lay out the songs as generate_songs_pdf does (each song with its own
+    SongFormatting), returning [(song, placements)] for every non-empty page.
+    """
+    user_prefs = get_user_preferences(user)
+    styles = sample_styles()
+    elements = []
+    for song in songs:
+        elements.append(SongStart(song))
+        elements.extend(build_song_elements(
+            song, styles, get_paragraph_styles(get_song_formatting(user, song)), site_name,
+            chord_bracket_style=user_prefs.get("chord_bracket_style", "square"),
+            chord_color=user_prefs.get("chord_color", "black"),
+        ))
+        elements.append(PageBreak())
+
+    pages = []
+    _LayoutDocTemplate(pages).build(elements)
+
+    laid_out = []
+    song = None
+    for placements in pages:
+        for flowable, *_ in placements:
+            if isinstance(flowable, SongStart):
+                song = flowable.song
+        if placements:
+            laid_out.append((song, placements))
+    return laid_out
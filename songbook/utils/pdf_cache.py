@@ -0,0 +1,194 @@
+# songbook/utils/pdf_cache.py
+"""
+Rendered song PDFs, kept for reuse (RenderedPdf rows, files under
+MEDIA_ROOT/rendered_pdfs/).
+
+A PDF depends on the song version, the site, the transposition, the
+SongFormatting that applies, the viewer's chord preferences, the chord
+diagram files and the parser; the cache key covers exactly those, so
+members with the same instrument / lefty / bracket settings share one file.
+Entries of older song versions are dropped when a newer one is stored, and
+only transpositions within an octave (-11..11) are stored, so the entries
+per song stay bounded.
+
+The cache is pre-warmed so the first viewer after an edit does not pay the
+render: saving a Song, or adding songs to a setlist of an upcoming event,
+queues a "prewarm" render job (utils/render_queue.py) that renders every
+preference combination present among the Performers group members.
+Pre-warm jobs wait PDF_PREWARM_DELAY seconds (successive saves move the
+song's queued job to the new version), run after user exports and are
+limited to PDF_PREWARM_PER_MINUTE per minute. The job is keyed by the song
+version, so a save during a running pre-warm queues another one.
+
+Hits, misses and pre-warmed renders are counted per day in PdfCacheStat
+(staff dashboard: pdf_cache_dashboard).
+"""
+import hashlib
+import io
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from songbook.parsers import PARSER_VERSION
+from songbook.utils.chord_library import library_version
+from songbook.utils.render_ir import IR_VERSION
+from users.context import get_user_context
+
+logger = logging.getLogger(__name__)
+
+PREWARM_GROUP = "Performers"
+PREWARM_PRIORITY = 10  # after user exports (0)
+CACHED_TRANSPOSE_RANGE = range(-11, 12)
+
+
+def pdf_cache_key(song, site_name, transpose_value, user_prefs, formatting):
+    payload = json.dumps(
+        [
+            song.pk, song.content_version, site_name, transpose_value,
+            [formatting.pk, formatting.updated_at.isoformat()] if formatting else None,
+            user_prefs,
+            library_version(), PARSER_VERSION, IR_VERSION,
+        ],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def count(field, amount=1):
+    """Add to today's PdfCacheStat counter `field` (hits, misses, prewarmed)."""
+    from songbook.models import PdfCacheStat
+
+    today = timezone.localdate()
+    if PdfCacheStat.objects.filter(day=today).update(**{field: F(field) + amount}):
+        return
+    try:
+        with transaction.atomic():
+            PdfCacheStat.objects.create(day=today, **{field: amount})
+    except IntegrityError:
+        PdfCacheStat.objects.filter(day=today).update(**{field: F(field) + amount})
+
+
+# =======================
+# READ / STORE
+# =======================
+def _render(song, user, transpose_value, site_name, formatting):
+    from songbook.utils.pdf_generator import generate_songs_pdf
+
+    buffer = io.BytesIO()
+    generate_songs_pdf(buffer, [song], user, transpose_value=transpose_value, formatting=formatting, site_name=site_name)
+    return buffer.getvalue()
+
+
+def _read(key):
+    from songbook.models import RenderedPdf
+
+    entry = RenderedPdf.objects.filter(key=key).first()
+    if entry is None:
+        return None
+    try:
+        with entry.file.open("rb") as handle:
+            pdf = handle.read()
+    except (FileNotFoundError, ValueError):
+        entry.delete()
+        return None
+    RenderedPdf.objects.filter(pk=entry.pk).update(hits=F("hits") + 1)
+    return pdf
+
+
+def _store(key, song, pdf, source):
+    from songbook.models import RenderedPdf
+
+    entry = RenderedPdf(key=key, song=song, content_version=song.content_version, size=len(pdf), source=source)
+    entry.file.save(f"{key}.pdf", ContentFile(pdf), save=False)
+    try:
+        with transaction.atomic():
+            entry.save()
+    except IntegrityError:
+        # Rendered concurrently by another request or worker
+        entry.file.delete(save=False)
+        return
+    for stale in RenderedPdf.objects.filter(song=song, content_version__lt=song.content_version):
+        stale.delete()
+
+
+def cached_song_pdf(song, user=None, transpose_value=0, site_name="FrancoUke"):
+    """PDF bytes of one song for `user`, as generate_songs_pdf renders it, from the cache when possible."""
+    from songbook.utils.chord_sheet_html import get_song_formatting
+
+    formatting = get_song_formatting(user, song)
+    key = pdf_cache_key(song, site_name, transpose_value, get_user_context(user).preference_values, formatting)
+    pdf = _read(key)
+    if pdf is not None:
+        count("hits")
+        return pdf
+    pdf = _render(song, user, transpose_value, site_name, formatting)
+    if transpose_value in CACHED_TRANSPOSE_RANGE:
+        _store(key, song, pdf, "request")
+    count("misses")
+    return pdf
+
+
+# =======================
+# PRE-WARM
+# =======================
+def prewarm_song(song, site_name):
+    """Render the song for each preference combination of the Performers members. Returns how many were rendered."""
+    from django.contrib.auth import get_user_model
+    from songbook.models import RenderedPdf, SongFormatting
+    from songbook.utils.chord_sheet_html import HOUSE_FORMATTING_USER
+
+    members = get_user_model().objects.filter(groups__name=PREWARM_GROUP, is_active=True).distinct()
+    formattings = {f.user_id: f for f in SongFormatting.objects.filter(song=song).select_related("user")}
+    house = next((f for f in formattings.values() if f.user.username == HOUSE_FORMATTING_USER), None)
+
+    combinations = {}
+    for member in members:
+        formatting = formattings.get(member.pk, house)
+        key = pdf_cache_key(song, site_name, 0, get_user_context(member).preference_values, formatting)
+        combinations.setdefault(key, (member, formatting))
+
+    cached = set(RenderedPdf.objects.filter(key__in=combinations).values_list("key", flat=True))
+
+    rendered = 0
+    for key, (member, formatting) in combinations.items():
+        if key in cached:
+            continue
+        _store(key, song, _render(song, member, 0, site_name, formatting), "prewarm")
+        rendered += 1
+    if rendered:
+        count("prewarmed", rendered)
+    return rendered
+
+
+def prewarm_songs(songs, delay=None):
+    """
+    Queue a pre-warm job per song version (songs without a site are hidden:
+    skipped). A queued job of an older version is moved to the new one; a
+    running one is left to finish and a new job is queued after it.
+    """
+    from songbook.models import RenderJob
+    from songbook.utils.render_queue import enqueue_render, job_key
+
+    if delay is None:
+        delay = settings.PDF_PREWARM_DELAY
+    for song in songs:
+        if not (song.pk and song.site_name):
+            continue
+        params = {"song_id": song.pk, "site_name": song.site_name, "content_version": song.content_version}
+        key = job_key("prewarm", params)
+        older = RenderJob.objects.filter(
+            kind="prewarm", status=RenderJob.QUEUED, params__song_id=song.pk, params__site_name=song.site_name,
+        ).exclude(key=key)
+        try:
+            with transaction.atomic():
+                older.update(params=params, key=key)
+        except IntegrityError:
+            # The new version's job was queued concurrently
+            older.delete()
+        enqueue_render("prewarm", params, delay=timedelta(seconds=delay), priority=PREWARM_PRIORITY)
@@ -8,152 +8,56 @@ from django.conf import settings
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 from songbook.models import SongFormatting
 from songbook.utils.transposer import transpose_chord, normalize_chord
-from users.models import UserPreference
+from users.context import DEFAULT_PREFERENCES, get_user_context
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from songbook.utils.chords.loader import extract_used_chords, load_relevant_chords
+from songbook.utils.chords.loader import load_relevant_chords
 from songbook.utils.chords.drawer import draw_footer
+from songbook.utils.markup import apply_color_markup
+from songbook.utils.metrics import span
+from songbook.utils.chord_sheet_html import get_song_formatting, recording_line, section_style
+from songbook.utils.render_ir import is_labelled, layout_blocks, lines_markup, song_render_ir, transpose_ir
 
 
 import json
 import os
 import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 
 
 # =======================
 # USER PREFERENCES
 # =======================
 def get_user_preferences(user):
-    default_prefs = {
-        "primary_instrument": "ukulele",
-        "is_lefty": False,
-        "show_alternate_chords": False,
-        "use_known_chord_filter": False,
-        "known_chords": [],
-        "chord_bracket_style": "square",
-        "chord_color": "black",
-    }
-
-    if not user or not user.is_authenticated:
-        return default_prefs
-
+    """Preference dict for the PDF builder, from the request-scoped user context."""
     try:
-        prefs, _ = UserPreference.objects.get_or_create(
-            user=user,
-            defaults={
-                "primary_instrument": getattr(user, "primary_instrument", "ukulele"),
-            },
-        )
-        # Allow either attribute name on the model: is_lefty or is_left_handed
-        lefty_val = None
-        if hasattr(prefs, "is_lefty"):
-            lefty_val = getattr(prefs, "is_lefty", False)
-        elif hasattr(prefs, "is_left_handed"):
-            lefty_val = getattr(prefs, "is_left_handed", False)
-        else:
-            lefty_val = False
-
-        return {
-            "primary_instrument": prefs.primary_instrument,
-            "is_lefty": lefty_val,
-            "show_alternate_chords": getattr(prefs, "is_printing_alternate_chord", False),
-            "use_known_chord_filter": getattr(prefs, "use_known_chord_filter", False),
-            "known_chords": getattr(prefs, "known_chords", []),
-            "chord_bracket_style": getattr(prefs, "chord_bracket_style", "square"),
-            "chord_color": getattr(prefs, "chord_color", "black"),
-        }
+        return get_user_context(user).preference_values
     except Exception:
-        return default_prefs
+        return dict(DEFAULT_PREFERENCES)
 
 
 
-# =======================
-# COLOR MARKUP
-# =======================
-def apply_color_markup(text):
-    color_map = {
-        'red': 'red',
-        'blue': 'blue',
-        'green': 'green',
-        'yellow': 'gold',
-        'orange': 'orange',
-        'pink': 'hotpink',
-        'purple': 'purple',
-    }
-    for tag, color in color_map.items():
-        pattern = re.compile(rf'<{tag}>(.*?)</{tag}>', re.IGNORECASE | re.DOTALL)
-        text = pattern.sub(lambda m: f"<font color='{color}'>{m.group(1)}</font>", text)
-
-    short_map = {'r': 'red', 'g': 'green', 'y': 'gold'}
-    for tag, color in short_map.items():
-        pattern = re.compile(rf'<{tag}>(.*?)</{tag}>', re.IGNORECASE | re.DOTALL)
-        text = pattern.sub(lambda m: f"<font color='{color}'>{m.group(1)}</font>", text)
-
-    pattern = re.compile(r'<highlight\s+color="(.*?)">(.*?)</highlight>', re.IGNORECASE | re.DOTALL)
-    text = pattern.sub(lambda m: f"<font backColor='{m.group(1)}'>{m.group(2)}</font>", text)
-
-    text = re.sub(r'<h>(.*?)</h>', r"<font backColor='yellow'>\1</font>", text, flags=re.IGNORECASE | re.DOTALL)
-    text = re.sub(r"</font>\s*</font>", "</font>", text)
-    return text
-
-
 # =======================
 # PARAGRAPH STYLES
 # =======================
-def get_paragraph_styles(formatting):
-    styles = getSampleStyleSheet()
-    base_style = styles["BodyText"]
-
-    def create_style(section):
-        config = getattr(formatting, section, {}) or {}
-
-        # Default alignment logic
-        default_alignment = "left" if section.lower() == "verse" else "center"
-
-        return ParagraphStyle(
-            name=section,
-            parent=base_style,
-            fontSize=config.get("font_size", 13),
-            textColor=config.get("font_color", "#000000"),
-            fontName=(
-                config.get("font_family", "Helvetica")
-                if config.get("font_family", "Helvetica") in ["Helvetica", "Times-Roman", "Courier"]
-                else "Helvetica"
-            ),
-            leading=config.get("line_spacing", 1.2) * config.get("font_size", 13),
-            spaceBefore=config.get("spaceBefore", 12),
-            spaceAfter=config.get("spaceAfter", 12),
-            alignment={
-                "left": TA_LEFT,
-                "center": TA_CENTER,
-                "right": TA_RIGHT,
-            }.get(config.get("alignment", default_alignment), TA_CENTER),
-        )
-
-    # Return style dictionary
-    return {
-        "intro": create_style("intro"),
-        "verse": create_style("verse"),
-        "chorus": create_style("chorus"),
-        "bridge": create_style("bridge"),
-        "interlude": create_style("interlude"),
-        "outro": create_style("outro"),
-        "centered": create_style("centered"),
-    }
+# The style sets below are shared by every PDF built by this process:
+# treat them as read-only.
+@lru_cache(maxsize=None)
+def sample_styles():
+    """reportlab's getSampleStyleSheet(), built once."""
+    return getSampleStyleSheet()
 
 
-# =======================
-# SONG ELEMENTS
-# =======================
-def build_song_elements(song, styles, styles_dict, site_name,
-                        chord_bracket_style="square", chord_color="black"):
-    elements = []
-    metadata = song.metadata or {}
+@lru_cache(maxsize=None)
+def header_styles():
+    """Song header styles (songwriter, recording, 1st note, instructions, count-in), built once."""
+    normal = sample_styles()["Normal"]
 
-    # --- Styles ---
     songwriter_style = ParagraphStyle(
         'SongwriterStyle',
-        parent=styles['Normal'],
+        parent=normal,
         alignment=1,
         fontSize=12,
         spaceBefore=2,
@@ -162,7 +66,7 @@ def build_song_elements(song, styles, styles_dict, site_name,
 
     recording_style = ParagraphStyle(
         'RecordingStyle',
-        parent=styles['Normal'],
+        parent=normal,
         alignment=1,
         fontSize=11,
         spaceBefore=2,
@@ -171,7 +75,7 @@ def build_song_elements(song, styles, styles_dict, site_name,
 
     first_vocal_note_style = ParagraphStyle(
         'FirstVocalNoteStyle',
-        parent=styles['Normal'],
+        parent=normal,
         fontSize=9,
         spaceBefore=2,
         spaceAfter=2,
@@ -179,7 +83,7 @@ def build_song_elements(song, styles, styles_dict, site_name,
 
     header_instruction_style = ParagraphStyle(
         'HeaderInstructionStyle',
-        parent=styles['Normal'],
+        parent=normal,
         fontSize=9,
         alignment=2,  # right aligned
         spaceBefore=0,
@@ -188,42 +92,94 @@ def build_song_elements(song, styles, styles_dict, site_name,
 
     count_in_style = ParagraphStyle(
         'CountInStyle',
-        parent=styles['Normal'],
+        parent=normal,
         fontSize=9,
         textColor=colors.black,
         spaceBefore=2,
         spaceAfter=2,
     )
+    return songwriter_style, recording_style, first_vocal_note_style, header_instruction_style, count_in_style
 
-    # --- Capo & Recording Info ---
-    capo_value = metadata.get('capo')
-    artist = metadata.get('artist', 'Unknown Artist')
-    year = metadata.get('year')
-
-    if isinstance(capo_value, str) and capo_value.lower() == "based":
-        recorded_by_text = f"Based on clip by {artist}"
-        if year:
-            recorded_by_text += f" ({year})"
-    else:
-        try:
-            capo_value = int(capo_value)
-        except (TypeError, ValueError):
-            capo_value = 0
 
-        if capo_value > 0:
-            recorded_by_text = f"Capo ({capo_value}) to match the recording by {artist}"
-        else:
-            recorded_by_text = f"Matches the recording by {artist}"
+def build_paragraph_styles(formatting):
+    base_style = sample_styles()["BodyText"]
 
-        if year:
-            recorded_by_text += f" ({year})"
+    def create_style(section):
+        config = section_style(formatting, section)
+        return ParagraphStyle(
+            name=section,
+            parent=base_style,
+            fontSize=config["font_size"],
+            textColor=config["font_color"],
+            fontName=config["font_family"],
+            leading=config["leading"],
+            spaceBefore=config["space_before"],
+            spaceAfter=config["space_after"],
+            alignment={
+                "left": TA_LEFT,
+                "center": TA_CENTER,
+                "right": TA_RIGHT,
+            }.get(config["alignment"], TA_CENTER),
+        )
 
-    # --- Slash chord detection ---
-    def contains_slash_chord(lyrics_with_chords):
-        used_chords = extract_used_chords(lyrics_with_chords)
-        return any('/' in chord for chord in used_chords)
+    # Return style dictionary
+    return {
+        "intro": create_style("intro"),
+        "verse": create_style("verse"),
+        "chorus": create_style("chorus"),
+        "bridge": create_style("bridge"),
+        "interlude": create_style("interlude"),
+        "outro": create_style("outro"),
+        "centered": create_style("centered"),
+    }
+
+
+_STYLE_SETS_SIZE = 256
+_style_sets = OrderedDict()  # (formatting id, updated_at) -> section styles
+_style_sets_lock = threading.Lock()
+
+
+def get_paragraph_styles(formatting):
+    """
+    Section styles for a SongFormatting (None: the defaults), built once per
+    (formatting id, updated_at) and reused across songs and requests.
+    """
+    if formatting is not None and formatting.pk is None:
+        return build_paragraph_styles(formatting)
+
+    key = (formatting.pk, formatting.updated_at) if formatting is not None else None
+    with _style_sets_lock:
+        styles = _style_sets.get(key)
+        if styles is not None:
+            _style_sets.move_to_end(key)
+            return styles
+
+    styles = build_paragraph_styles(formatting)
+    with _style_sets_lock:
+        _style_sets[key] = styles
+        if len(_style_sets) > _STYLE_SETS_SIZE:
+            _style_sets.popitem(last=False)
+    return styles
+
+
+# =======================
+# SONG ELEMENTS
+# =======================
+def build_song_elements(song, styles, styles_dict, site_name,
+                        chord_bracket_style="square", chord_color="black", transpose_value=0):
+    elements = []
+    metadata = song.metadata or {}
+    render_ir = transpose_ir(song_render_ir(song, site_name), transpose_value)
 
-    has_slash_chord = contains_slash_chord(song.lyrics_with_chords)
+    # --- Styles ---
+    (songwriter_style, recording_style, first_vocal_note_style,
+     header_instruction_style, count_in_style) = header_styles()
+
+    # --- Capo & Recording Info ---
+    recorded_by_text = recording_line(metadata)
+
+    # --- Slash chord detection ---
+    has_slash_chord = any('/' in chord for chord in render_ir["chords"])
 
     # --- Normalize metadata ---
     for key, value in metadata.items():
@@ -273,7 +229,7 @@ def build_song_elements(song, styles, styles_dict, site_name,
 
     # --- Lyrics ---
     lyrics_elements = build_lyrics_elements(
-        song.lyrics_with_chords, styles_dict, styles['BodyText'], site_name,
+        render_ir, styles_dict, styles['BodyText'],
         chord_bracket_style=chord_bracket_style,
         chord_color=chord_color,
     )
@@ -299,100 +255,101 @@ def render_chord_html(chord, bracket_style="square", chord_color="black"):
     return f'<b><font color="{chord_color}">{open_b}{chord}{close_b}</font></b>'
 
 
+# =======================
+# SECTION FLOWABLE
+# =======================
+class SectionFlowable(Flowable):
+    """
+    A labelled section: label paragraph and lyrics paragraph side by side.
+
+    Draws exactly what the one-row Table it replaces did (columns of 60 and
+    500pt, 2pt side / 4pt top and bottom padding, cells top-aligned and
+    centred) without Table's size negotiation, which costs far more than
+    the two paragraphs themselves in chorus-heavy songs.
+
+    Like that Table, a section that doesn't fit moves to the next page
+    whole. A section taller than a full page is split between its lyric
+    lines instead, with the label on the first part.
+    """
+    LABEL_WIDTH = 60
+    LYRICS_WIDTH = 500
+    H_PADDING = 2
+    V_PADDING = 4
+
+    def __init__(self, label, lyrics):
+        super().__init__()
+        self.label = label
+        self.lyrics = lyrics
+        self.hAlign = "CENTER"
+        self.width = self.LABEL_WIDTH + self.LYRICS_WIDTH
+        self.height = 0
+        self._cells = []
+
+    def wrap(self, availWidth, availHeight):
+        self._cells = []
+        content_height = 0
+        for para, column_x, column_width in (
+            (self.label, 0, self.LABEL_WIDTH),
+            (self.lyrics, self.LABEL_WIDTH, self.LYRICS_WIDTH),
+        ):
+            if para is None:
+                continue
+            w, h = para.wrapOn(self.canv, column_width - 2 * self.H_PADDING, 72000)
+            self._cells.append((para, column_x + (column_width - w) / 2.0, h))
+            content_height = max(content_height, h)
+        self.height = content_height + 2 * self.V_PADDING
+        return self.width, self.height
+
+    def draw(self):
+        for para, x, h in self._cells:
+            para.drawOn(self.canv, x, self.height - self.V_PADDING - h)
+
+    def split(self, availWidth, availHeight):
+        frame = getattr(self, "_frame", None)
+        if frame is None or not frame._atTop:
+            return []
+        parts = self.lyrics.split(self.LYRICS_WIDTH - 2 * self.H_PADDING, availHeight - 2 * self.V_PADDING)
+        if len(parts) < 2:
+            return []
+        return [SectionFlowable(self.label, parts[0]), SectionFlowable(None, parts[1])]
+
+
 # =======================
 # LYRICS ELEMENTS
 # =======================
-def build_lyrics_elements(lyrics_with_chords, styles_dict, base_style, site_name,
+def build_lyrics_elements(render_ir, styles_dict, base_style,
                           chord_bracket_style="square", chord_color="black"):
     """
-    Build a list of reportlab elements (Paragraphs, Tables) from parsed lyrics/chords.
+    Build a list of reportlab elements (Paragraphs, SectionFlowables) from a song's
+    localized render IR.
     """
-    from reportlab.platypus import Paragraph, Table, TableStyle, Spacer
+    from reportlab.platypus import Paragraph, Spacer
 
     elements = []
-    paragraph_buffer = []
-    section_type = None
-    section_instruction = None
-
-    # Map directives per site
-    directive_map = {
-        "FrancoUke": {
-            "{soi}": "Intro",
-            "{soc}": "Refrain",
-            "{sov}": "Couplet",
-            "{sob}": "Pont",
-            "{soo}": "Outro",
-            "{sod}": "Interlude",
-            "{sos}": "Centered",
-            "{page}": "PAGEBREAK",
-            "{eoi}": None,
-            "{eoc}": None,
-            "{eov}": None,
-            "{eob}": None,
-            "{eoo}": None,
-            "{eod}": None,
-            "{eos}": None,
-        },
-        "StrumSphere": {
-            "{soi}": "Intro",
-            "{soc}": "Chorus",
-            "{sov}": "Verse",
-            "{sob}": "Bridge",
-            "{soo}": "Outro",
-            "{sod}": "Interlude",
-            "{sos}": "Centered",
-            "{page}": "PAGEBREAK",
-            "{eoi}": None,
-            "{eoc}": None,
-            "{eov}": None,
-            "{eob}": None,
-            "{eoo}": None,
-            "{eod}": None,
-            "{eos}": None,
-        },
-    }
-
-    selected_map = directive_map.get(site_name, directive_map["StrumSphere"])
 
-    def flush_buffer():
-        nonlocal paragraph_buffer, section_type, section_instruction
+    for block in layout_blocks(render_ir):
+        if block["kind"] == "page_break":
+            elements.append(PageBreak())
+            continue
 
-        if not paragraph_buffer:
-            return
-
-        paragraph_text = "".join(paragraph_buffer)
+        paragraph_text = lines_markup(
+            block["lines"], lambda chord: render_chord_html(chord, chord_bracket_style, chord_color)
+        )
         paragraph_text = apply_color_markup(paragraph_text)
-        style = styles_dict.get(section_type.lower(), styles_dict["verse"]) if section_type else styles_dict["verse"]
+        style = styles_dict.get(block["type"] or "verse", styles_dict["verse"])
 
         # Non-verse sections
-        if section_type and section_type.lower() != "verse":
+        if is_labelled(block):
             label_html = ""
-            if section_type.lower() != "centered":
-                label_html = f"<b>{section_type}:</b>"
-                if section_instruction:
-                    label_html += f"<br/><font size='9' color='gray'><i>{section_instruction}</i></font>"
-            else:
-                label_html = ""
-
-            label_para = Paragraph(label_html, base_style)
-            lyrics_para = Paragraph(paragraph_text, style)
-
-            section_table = Table(
-                [[label_para, lyrics_para]],
-                colWidths=[60, 500],
-                hAlign="CENTER",
-            )
-
-            section_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 2),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ]))
-
-            elements.append(section_table)
+            if block["type"] != "centered":
+                label_html = f"<b>{block['label']}:</b>"
+                if block["instruction"]:
+                    label_html += f"<br/><font size='9' color='gray'><i>{block['instruction']}</i></font>"
+
+            elements.append(SectionFlowable(
+                Paragraph(label_html, base_style),
+                Paragraph(paragraph_text, style),
+            ))
             elements.append(Spacer(1, 4))
 
         # Verse sections
@@ -400,176 +357,125 @@ def build_lyrics_elements(lyrics_with_chords, styles_dict, base_style, site_name
             elements.append(Paragraph(paragraph_text, style))
             elements.append(Spacer(1, 6))
 
-        paragraph_buffer = []
-        section_instruction = None
-
-    # Main parse loop
-    for group in lyrics_with_chords:
-        for item in group:
-            if "directive" in item:
-                directive = item["directive"].lower()
-
-                if directive in selected_map:
-                    flush_buffer()
-                    mapped = selected_map[directive]
-                    if mapped == "PAGEBREAK":
-                        elements.append(PageBreak())
-                        section_type = None
-                    else:
-                        section_type = mapped
-                    continue
-
-            elif "instruction" in item:
-                section_instruction = item["instruction"]
-                continue
-
-            elif "lyric" in item:
-                chord = item.get("chord", "")
-                lyric = item["lyric"]
-                if chord:
-                    chord_html = render_chord_html(chord, chord_bracket_style, chord_color)
-                    if lyric and lyric[0].isalpha():
-                        # Mid-word chord: no leading space (e.g. ri[Am]sing)
-                        line = f"{chord_html}{lyric}"
-                    elif lyric.startswith("-"):
-                        # Dash continuation: no leading space
-                        line = f"{chord_html}{lyric}"
-                    else:
-                        # Normal chord before a word or space
-                        line = f" {chord_html}{lyric}"
-                else:
-                    line = lyric
-                paragraph_buffer.append(line)
-
-            elif "format" in item and item["format"] == "LINEBREAK":
-                paragraph_buffer.append("<br/>")
-
-    flush_buffer()
-
     return elements
 
 
 # =======================
-# PDF GENERATION
+# CHORD FOOTER
 # =======================
-def generate_songs_pdf(response, songs, user, transpose_value=0, formatting=None, site_name="FrancoUke"):
-    """
-    Generate PDF for a list of songs for the given user.
-    Draws chords in the footer for the primary instrument.
-    """
-    from reportlab.platypus import SimpleDocTemplate, PageBreak
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib.styles import getSampleStyleSheet
-
-    # Build a PDF title from the song(s) being included, so that the browser's
-    # built-in "Save"/"Save to Drive" buttons use a sensible filename instead
-    # of falling back to a generic default.
-    if songs:
-        if len(songs) == 1:
-            pdf_title = songs[0].songTitle or "Untitled Song"
-        else:
-            pdf_title = f"{songs[0].songTitle} and {len(songs) - 1} more" if songs[0].songTitle else "Songbook"
-    else:
-        pdf_title = "Songbook"
-
-    # Prepare PDF document
-    doc = SimpleDocTemplate(
-        response,
-        pagesize=letter,
-        topMargin=2,
-        bottomMargin=80,
-        leftMargin=20,
-        rightMargin=20,
-        title=pdf_title,
-    )
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # Load user preferences and chords
-    # Load user preferences and chords
-    user_prefs = get_user_preferences(user)
-
-    # Get suggested_alternate from first song's metadata
-    suggested_alternate = None
-    if songs and songs[0].metadata:
-        suggested_alternate = songs[0].metadata.get('suggested_alternate')
-
-    relevant_chords = load_relevant_chords(songs, user_prefs, transpose_value, suggested_alternate)
+PAGE_MARGINS = {"topMargin": 2, "bottomMargin": 80, "leftMargin": 20, "rightMargin": 20}
+FOOTER_ROW_SPACING = 70
 
 
+def footer_chords(song, user_prefs, transpose_value=0, chords=None):
+    """
+    Footer chords of a song for user_prefs["primary_instrument"]:
+    load_relevant_chords, then the known-chord filter if the user has it on.
+    `chords` is that instrument's chord library, when the caller already has it.
+    """
+    suggested_alternate = (song.metadata or {}).get("suggested_alternate")
+    relevant_chords = load_relevant_chords([song], user_prefs, transpose_value, suggested_alternate, chords=chords)
 
     # Apply known-chord filter if enabled
     if user_prefs.get("use_known_chord_filter", False):
         known_set = {normalize_chord(ch).lower() for ch in user_prefs.get("known_chords", [])}
-        
+
         # Parse which chords have explicitly requested variations
         explicitly_requested = set()
         if suggested_alternate:
-            import re
             alternates = [alt.strip() for alt in suggested_alternate.split(',')]
             for alt in alternates:
                 match = re.match(r"^([A-G][#b]?m?(?:add\d+)?)(?:\((\d+)\))?$", alt)
                 if match:
                     explicitly_requested.add(normalize_chord(match.group(1)).lower())
-        
+
         # Filter out known chords UNLESS they were explicitly requested
         relevant_chords = [
             chord for chord in relevant_chords
             if (normalize_chord(chord["name"]).lower() not in known_set or
                 normalize_chord(chord["name"]).lower() in explicitly_requested)
         ]
+    return relevant_chords
+
 
-    # Determine spacing based on chord count
-    num_chords = len(relevant_chords)
+def footer_chord_spacing(num_chords):
+    """Horizontal distance between footer diagrams, tighter as the count grows."""
     max_per_row = 12  # Safe to avoid cutting off chords
     if num_chords <= 6:
-        chord_spacing = 60
+        return 60
     elif num_chords <= 10:
-        chord_spacing = 48
+        return 48
     elif num_chords <= max_per_row:
-        chord_spacing = 42
+        return 42
+    return 36
+
+
+def draw_song_footer(canvas, doc, relevant_chords, user_prefs, acknowledgement=""):
+    draw_footer(
+        canvas, doc,
+        relevant_chords,
+        chord_spacing=footer_chord_spacing(len(relevant_chords)),
+        row_spacing=FOOTER_ROW_SPACING,
+        is_lefty=user_prefs.get("is_lefty", False),
+        instrument=user_prefs["primary_instrument"],
+        secondary_instrument=None,
+        is_printing_alternate_chord=bool(user_prefs.get("show_alternate_chords", False)),
+        acknowledgement=acknowledgement,
+    )
+
+
+# =======================
+# PDF GENERATION
+# =======================
+def generate_songs_pdf(response, songs, user, transpose_value=0, formatting=None, site_name="FrancoUke"):
+    """
+    Generate PDF for a list of songs for the given user.
+    Draws chords in the footer for the primary instrument.
+    transpose_value moves the chords of the lyrics and of the footer.
+    """
+    from reportlab.platypus import SimpleDocTemplate, PageBreak
+    from reportlab.lib.pagesizes import letter
+
+    # Build a PDF title from the song(s) being included, so that the browser's
+    # built-in "Save"/"Save to Drive" buttons use a sensible filename instead
+    # of falling back to a generic default.
+    if songs:
+        if len(songs) == 1:
+            pdf_title = songs[0].songTitle or "Untitled Song"
+        else:
+            pdf_title = f"{songs[0].songTitle} and {len(songs) - 1} more" if songs[0].songTitle else "Songbook"
     else:
-        chord_spacing = 36
-    row_spacing = 70
+        pdf_title = "Songbook"
+
+    # Prepare PDF document
+    doc = SimpleDocTemplate(response, pagesize=letter, title=pdf_title, **PAGE_MARGINS)
+    styles = sample_styles()
+    elements = []
+
+    # Load user preferences and chords
+    user_prefs = get_user_preferences(user)
+    relevant_chords = footer_chords(songs[0], user_prefs, transpose_value)
 
     # Load formatting
-    formatting = formatting or SongFormatting.objects.filter(user=user, song=songs[0]).first()
-    if not formatting:
-        formatting = SongFormatting.objects.filter(user__username="Gaulind", song=songs[0]).first()
+    formatting = formatting or get_song_formatting(user, songs[0])
     styles_dict = get_paragraph_styles(formatting)
 
     # Build elements for all songs
-    for song in songs:
-        elements.extend(build_song_elements(
-            song, styles, styles_dict, site_name,
-            chord_bracket_style=user_prefs.get("chord_bracket_style", "square"),
-            chord_color=user_prefs.get("chord_color", "black"),
-        ))
-        elements.append(PageBreak())
-
-    # Build PDF with footer
-    doc.build(
-        elements,
-        onFirstPage=lambda c, d: draw_footer(
-            c, d,
-            relevant_chords,
-            chord_spacing=chord_spacing,
-            row_spacing=row_spacing,
-            is_lefty=user_prefs.get("is_lefty", False),
-            instrument=user_prefs["primary_instrument"],
-            secondary_instrument=None,
-            is_printing_alternate_chord=bool(user_prefs.get("show_alternate_chords", False)),
-            acknowledgement=getattr(songs[0], "acknowledgement", "")
-        ),
-        onLaterPages=lambda c, d: draw_footer(
-            c, d,
-            relevant_chords,
-            chord_spacing=chord_spacing,
-            row_spacing=row_spacing,
-            is_lefty=user_prefs.get("is_lefty", False),
-            instrument=user_prefs["primary_instrument"],
-            secondary_instrument=None,
-            is_printing_alternate_chord=bool(user_prefs.get("show_alternate_chords", False)),
-            acknowledgement=getattr(songs[0], "acknowledgement", "")
+    with span("layout"):
+        for song in songs:
+            elements.extend(build_song_elements(
+                song, styles, styles_dict, site_name,
+                chord_bracket_style=user_prefs.get("chord_bracket_style", "square"),
+                chord_color=user_prefs.get("chord_color", "black"),
+                transpose_value=transpose_value,
+            ))
+            elements.append(PageBreak())
+
+    # Build PDF with footer (platypus lays out and draws the pages)
+    acknowledgement = getattr(songs[0], "acknowledgement", "")
+    with span("pdf_build"):
+        doc.build(
+            elements,
+            onFirstPage=lambda c, d: draw_song_footer(c, d, relevant_chords, user_prefs, acknowledgement),
+            onLaterPages=lambda c, d: draw_song_footer(c, d, relevant_chords, user_prefs, acknowledgement),
         )
-    )
\ No newline at end of file
@@ -0,0 +1,92 @@
+# songbook/utils/pdf_import.py
+"""
+PDF songbook pages -> ChordPro text (used by import_songbook_pdf).
+Plain functions so they can run in the import engine's worker processes.
+"""
+import re
+from datetime import datetime
+from pathlib import Path
+
+ACKNOWLEDGEMENT_TEXT = "Contribution of Heather J. Topps of the North Bay Ukulele Club"
+
+EMPTY_METADATA_LINES = [
+    "{title:}",
+    "{artist:}",
+    "{youtube:}",
+    "{songwriter:}",
+    "{capo:}",
+    "{year:}",
+    "{1stnote:}",
+    "{timeSignature:}",
+    "",
+]
+
+PAREN_CHORD_RE = re.compile(r"\(([^)]+)\)")
+
+# Section headers only count at the start of a line and when followed by a
+# number, a colon/dash, a chord or the end of the line ("Verse 2", "CHORUS:",
+# "Intro [C]"),
+# so lyrics like "universe" or "Chorus girls sing" are left alone
+SECTION_HEADERS = {
+    "intro": "{soi}",
+    "verse": "{sov}",
+    "chorus": "{soc}",
+    "bridge": "{sob}",
+    "outro": "{soo}",
+}
+SECTION_HEADER_RE = re.compile(
+    r"^[^\S\n]*(intro|verse|chorus|bridge|outro)\b[^\S\n]*"
+    r"(?:\d+[^\S\n]*[:\-]?|[:\-]|(?=\[)|$)[^\S\n]*(?=(.?))",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+REVISION_DATE_RE = re.compile(r'\(([^)]+)\)\.pdf$')
+
+
+def _section_marker(match):
+    marker = SECTION_HEADERS[match.group(1).lower()]
+    # Anything after the header on the same line moves to its own line
+    return marker if not match.group(2) else marker + "\n"
+
+
+def convert_pdf_text(text):
+    """ChordPro from the raw text of a songbook PDF."""
+    text = PAREN_CHORD_RE.sub(r"[\1]", text)
+    text = SECTION_HEADER_RE.sub(_section_marker, text)
+    return "\n".join(EMPTY_METADATA_LINES + text.splitlines())
+
+
+def extract_pdf_text(pdf_path):
+    """Text of every page, joined with newlines."""
+    import pdfplumber
+
+    texts = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            content = page.extract_text()
+            if content:
+                texts.append(content)
+
+    if not texts:
+        raise ValueError("No extractable text found in PDF.")
+    return "\n".join(texts)
+
+
+def pdf_to_chordpro_text(pdf_path):
+    """Extract text from PDF and convert into ChordPro string."""
+    return convert_pdf_text(extract_pdf_text(pdf_path))
+
+
+def extract_revision_date_from_filename(pdf_path):
+    """
+    Extract revision date from file name in format:
+    Song Title (Month Day, Year).pdf
+    Returns a date object or None.
+    """
+    match = REVISION_DATE_RE.search(Path(pdf_path).name)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), "%B %d, %Y").date()
+        except ValueError:
+            return None
+    return None
@@ -0,0 +1,73 @@
+# songbook/utils/rehearsal_pack.py
+"""
+Rehearsal packs: a setlist's songs as one PDF per instrument.
+
+The instruments only differ in the chord footer, so the lyric pages are
+laid out once. The layout pass runs platypus with a frame that records
+where each flowable lands instead of drawing it; every instrument's PDF then
+replays those placements on its own canvas under that song's footer
+(footer_chords with the instrument's chord library, loaded once per pack).
+
+This module is what views import (instrument lists); the ReportLab side,
+utils/pack_layout.py and pdf_generator, is loaded by the first render.
+"""
+import io
+import zipfile
+
+from django.utils.text import slugify
+
+DEFAULT_PACK_INSTRUMENTS = ["ukulele", "baritone_ukulele", "guitar", "mandolin"]
+PACK_INSTRUMENTS = {
+    "ukulele": "Ukulele", "baritone_ukulele": "Baritone Ukulele", "guitar": "Guitar",
+    "guitalele": "Guitalele", "banjo": "Banjo", "mandolin": "Mandolin",
+}
+
+
+# =======================
+# RENDER
+# =======================
+def render_pack(songs, user, instruments=None, site_name="FrancoUke", title="Rehearsal pack"):
+    """{instrument: PDF bytes} for the songs, one layout pass for all instruments."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen.canvas import Canvas
+    from songbook.utils.chords.loader import load_chords
+    from songbook.utils.metrics import span
+    from songbook.utils.pack_layout import layout_pages
+    from songbook.utils.pdf_generator import draw_song_footer, footer_chords, get_user_preferences
+
+    instruments = instruments or DEFAULT_PACK_INSTRUMENTS
+    pages = layout_pages(songs, user, site_name)
+    user_prefs = get_user_preferences(user)
+
+    pdfs = {}
+    for instrument in instruments:
+        # Packs are handed out: no personal known-chord filter or lefty diagrams
+        prefs = dict(user_prefs, primary_instrument=instrument, use_known_chord_filter=False, is_lefty=False)
+        library = load_chords(instrument)
+        song_chords = {}
+
+        for song, _placements in pages:
+            if song.pk not in song_chords:
+                song_chords[song.pk] = footer_chords(song, prefs, chords=library)
+
+        with span("pdf_build"):
+            buffer = io.BytesIO()
+            canvas = Canvas(buffer, pagesize=letter)
+            canvas.setTitle(f"{title} ({PACK_INSTRUMENTS.get(instrument, instrument)})")
+            for song, placements in pages:
+                draw_song_footer(canvas, None, song_chords[song.pk], prefs, getattr(song, "acknowledgement", ""))
+                for flowable, x, y, _sW in placements:
+                    flowable.drawOn(canvas, x, y, _sW)
+                canvas.showPage()
+            canvas.save()
+        pdfs[instrument] = buffer.getvalue()
+    return pdfs
+
+
+def pack_zip(pdfs, name):
+    """The pack's PDFs in one zip, as <name>_<instrument>.pdf."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for instrument, pdf in pdfs.items():
+            archive.writestr(f"{slugify(name) or 'setlist'}_{instrument}.pdf", pdf)
+    return buffer.getvalue()
@@ -0,0 +1,249 @@
+# songbook/utils/render_ir.py
+"""
+Render-ready intermediate representation of a song, shared by every output
+format (PDF, HTML chord sheet, teleprompter, setlist views).
+
+build_render_ir() walks lyrics_with_chords once and resolves what the
+renderers used to work out for themselves (section directives, instructions,
+line breaks, page breaks, chords):
+
+    {
+        "v": IR_VERSION,
+        "meta": {"title": .., "artist": .., "album": .., "year": .., "songwriter": .., "recording": ..},
+        "chords": ["C", "G7", "Am"],                # first-appearance order
+        "blocks": [
+            {"kind": "section", "type": "chorus", "instruction": "x2", "continues": False,
+             "lines": [{"spans": [["C", "Quand le "], ["", "soleil"]], "br": True}, ...]},
+            {"kind": "paragraph_break"},
+            {"kind": "page_break"},
+        ],
+    }
+
+- "type" is the section key (intro, verse, chorus, bridge, outro, interlude,
+  centered) or None outside a section.
+- A section block ends at a section directive, {page} or a blank line;
+  "continues" is True when it follows a blank line inside the same section
+  (the PDF and chord sheet join those, the teleprompter keeps them apart).
+- "br" is the parser's LINEBREAK after the line.
+
+The IR is site-independent and stored on Song.render_ir (derived in
+parsers.derive_song_fields; `manage.py reparse_songs --force` rebuilds it).
+song_render_ir() adds the site's section labels and keeps the result in
+memory per (song, content_version, site).
+"""
+import threading
+from collections import OrderedDict
+
+from songbook.utils.metrics import span
+from songbook.utils.transposer import transpose_chord
+
+# Bump when the IR layout changes: stored IRs of another version are rebuilt on read
+IR_VERSION = 1
+
+SECTION_DIRECTIVES = {
+    "{soi}": "intro", "{soc}": "chorus", "{sov}": "verse", "{sob}": "bridge",
+    "{soo}": "outro", "{sod}": "interlude", "{sos}": "centered",
+}
+SECTION_END_DIRECTIVES = {"{eoi}", "{eoc}", "{eov}", "{eob}", "{eoo}", "{eod}", "{eos}"}
+PAGE_DIRECTIVE = "{page}"
+
+SECTION_LABELS = {
+    "FrancoUke": {"intro": "Intro", "chorus": "Refrain", "verse": "Couplet", "bridge": "Pont",
+                  "outro": "Outro", "interlude": "Interlude", "centered": "Centered"},
+    "StrumSphere": {"intro": "Intro", "chorus": "Chorus", "verse": "Verse", "bridge": "Bridge",
+                    "outro": "Outro", "interlude": "Interlude", "centered": "Centered"},
+}
+
+META_KEYS = {"t": "title", "title": "title", "artist": "artist", "album": "album",
+             "year": "year", "songwriter": "songwriter", "recording": "recording"}
+
+
+# =======================
+# BUILD
+# =======================
+def build_render_ir(lyrics_with_chords):
+    """Site-independent IR of parsed lyrics (see the module docstring)."""
+    blocks = []
+    chords = {}
+    meta = dict.fromkeys(["title", "artist", "album", "year", "songwriter", "recording"])
+
+    section = None
+    instruction = None
+    lines = []
+    new_section = True
+
+    def flush():
+        nonlocal lines, instruction, new_section
+        if not lines:
+            return
+        blocks.append({
+            "kind": "section",
+            "type": section,
+            "instruction": instruction,
+            "continues": not new_section,
+            "lines": lines,
+        })
+        lines = []
+        instruction = None
+        new_section = False
+
+    for group in lyrics_with_chords or []:
+        if not isinstance(group, list):
+            continue  # {start_of_tab} blocks: no renderer draws them
+        spans = []
+        br = False
+        for item in group:
+            if "directive" in item:
+                directive = item["directive"]
+                key, _, value = directive.strip("{}").partition(":")
+                key = key.strip().lower()
+                if key in META_KEYS:
+                    meta[META_KEYS[key]] = value.strip()
+                    continue
+                directive = directive.lower()
+                if directive in SECTION_DIRECTIVES or directive in SECTION_END_DIRECTIVES or directive == PAGE_DIRECTIVE:
+                    flush()
+                    new_section = True
+                    section = SECTION_DIRECTIVES.get(directive)
+                    if directive == PAGE_DIRECTIVE:
+                        blocks.append({"kind": "page_break"})
+            elif "instruction" in item:
+                instruction = item["instruction"]
+            elif "lyric" in item:
+                chord = item.get("chord") or ""
+                if chord:
+                    chords.setdefault(chord, None)
+                spans.append([chord, item["lyric"]])
+            elif item.get("format") == "LINEBREAK":
+                br = True
+            elif item.get("format") == "PARAGRAPHBREAK":
+                flush()
+                blocks.append({"kind": "paragraph_break"})
+        if spans:
+            lines.append({"spans": spans, "br": br})
+    flush()
+
+    return {"v": IR_VERSION, "meta": meta, "chords": list(chords), "blocks": blocks}
+
+
+def transpose_ir(ir, steps):
+    """Copy of an IR with every chord moved by `steps` semitones."""
+    if not steps:
+        return ir
+
+    def move(chord):
+        return transpose_chord(chord, steps) if chord else chord
+
+    blocks = []
+    for block in ir["blocks"]:
+        if block["kind"] == "section":
+            block = dict(block, lines=[
+                dict(line, spans=[[move(chord), lyric] for chord, lyric in line["spans"]])
+                for line in block["lines"]
+            ])
+        blocks.append(block)
+    return dict(ir, chords=list(dict.fromkeys(move(chord) for chord in ir["chords"])), blocks=blocks)
+
+
+# =======================
+# PER SONG / SITE
+# =======================
+def localize_ir(ir, site_name):
+    """The IR with each section's label for the site ("Refrain" / "Chorus")."""
+    labels = SECTION_LABELS.get(site_name, SECTION_LABELS["StrumSphere"])
+    blocks = [
+        dict(block, label=labels[block["type"]] if block["type"] else None)
+        if block["kind"] == "section" else block
+        for block in ir["blocks"]
+    ]
+    return dict(ir, site=site_name, blocks=blocks)
+
+
+_CACHE_SIZE = 512
+_cache = OrderedDict()  # (song id, content_version, site) -> localized IR
+_cache_lock = threading.Lock()
+
+
+def stored_render_ir(song):
+    """Song.render_ir, rebuilt (and saved) when missing or from an older IR_VERSION."""
+    ir = song.render_ir
+    if not ir or ir.get("v") != IR_VERSION:
+        ir = build_render_ir(song.lyrics_with_chords)
+        song.render_ir = ir
+        if song.pk:
+            from songbook.models import Song
+            Song.objects.filter(pk=song.pk).update(render_ir=ir)
+    return ir
+
+
+def song_render_ir(song, site_name):
+    """
+    Localized IR of a saved song, built at most once per (song version, site).
+    Treat the result as read-only: it is shared between requests.
+    """
+    if not song.pk:
+        return localize_ir(stored_render_ir(song), site_name)
+
+    key = (song.pk, song.content_version, site_name)
+    with _cache_lock:
+        ir = _cache.get(key)
+        if ir is not None:
+            _cache.move_to_end(key)
+            return ir
+
+    with span("render_ir"):
+        ir = localize_ir(stored_render_ir(song), site_name)
+    with _cache_lock:
+        _cache[key] = ir
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return ir
+
+
+def is_labelled(block):
+    """Sections drawn with a label column (everything but the site's plain "Verse")."""
+    return bool(block.get("label")) and block["label"].lower() != "verse"
+
+
+# =======================
+# PAGE LAYOUT HELPERS
+# =======================
+def layout_blocks(ir):
+    """
+    Blocks as the page layouts (PDF, chord sheet) draw them: a section that
+    continues after a blank line is joined to the one before, and
+    paragraph breaks are dropped.
+    """
+    blocks = []
+    for block in ir["blocks"]:
+        if block["kind"] == "paragraph_break":
+            continue
+        if block["kind"] == "section" and block["continues"] and blocks and blocks[-1]["kind"] == "section":
+            previous = blocks[-1]
+            blocks[-1] = dict(
+                previous,
+                lines=previous["lines"] + block["lines"],
+                instruction=previous["instruction"] or block["instruction"],
+            )
+            continue
+        blocks.append(block)
+    return blocks
+
+
+def lines_markup(lines, chord_markup, lyric_markup=str, br="<br/>"):
+    """
+    A section's lines as one markup string. A chord gets a space before it,
+    except mid-word (ri[Am]sing) or before a dash continuation.
+    """
+    parts = []
+    for line in lines:
+        for chord, lyric in line["spans"]:
+            lyric = lyric_markup(lyric)
+            if chord:
+                glued = lyric[:1].isalpha() or lyric.startswith("-")
+                parts.append(("" if glued else " ") + chord_markup(chord) + lyric)
+            else:
+                parts.append(lyric)
+        if line["br"]:
+            parts.append(br)
+    return "".join(parts)
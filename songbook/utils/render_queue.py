@@ -0,0 +1,273 @@
+# songbook/utils/render_queue.py
+"""
+Background PDF renders, for exports too heavy for the request thread
+(tag songbooks, setlist rehearsal packs), and for pre-warming the
+rendered-PDF cache (utils/pdf_cache.py).
+
+A view calls enqueue_render() and answers 202 with the job's status URL
+(views/render_job_views.py); `manage.py run_render_jobs` claims queued jobs
+and stores each result under MEDIA_ROOT/render_jobs/. At most
+settings.PDF_RENDER_CONCURRENCY jobs run at once, however many workers are
+started (each running job holds a slot, see claim_job). A request identical
+to a queued or running job (same kind, params and user) gets that job
+instead of a new one. Jobs are claimed by priority, then age; a job can be
+held back until not_before, and rate_limits() caps how many jobs of a kind
+start per minute.
+
+A worker renews its job's lease while rendering; requeue_stale_jobs() puts
+back jobs whose lease ran out, so a long render is never started twice
+while its worker is alive.
+"""
+import hashlib
+import io
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RENDERERS = {}
+
+
+def renderer(kind):
+    """Register `func(job) -> (filename, bytes) or None` as the renderer of a job kind."""
+    def register(func):
+        RENDERERS[kind] = func
+        return func
+    return register
+
+
+def _job_songs(job):
+    """The job's songs in params order (a setlist may list a song twice)."""
+    from songbook.models import Song
+
+    song_ids = job.params.get("song_ids", [])
+    songs = Song.objects.in_bulk(song_ids)
+    return [songs[pk] for pk in song_ids if pk in songs]
+
+
+@renderer("songs")
+def render_songs(job):
+    """Params: song_ids, filename, transpose, site_name."""
+    from songbook.utils.pdf_generator import generate_songs_pdf
+
+    buffer = io.BytesIO()
+    generate_songs_pdf(
+        buffer, _job_songs(job), job.user,
+        transpose_value=job.params.get("transpose", 0),
+        site_name=job.params.get("site_name", "FrancoUke"),
+    )
+    return f"{job.params.get('filename') or 'songbook'}.pdf", buffer.getvalue()
+
+
+@renderer("setlist_pack")
+def render_setlist_pack(job):
+    """Params: song_ids, instruments, title, filename, site_name."""
+    from songbook.utils.rehearsal_pack import pack_zip, render_pack
+
+    params = job.params
+    pdfs = render_pack(_job_songs(job), job.user, params.get("instruments"), params.get("site_name", "FrancoUke"),
+                       title=params.get("title") or "Rehearsal pack")
+    filename = params.get("filename") or "rehearsal_pack"
+    if len(pdfs) == 1:
+        instrument, pdf = next(iter(pdfs.items()))
+        return f"{filename}_{instrument}.pdf", pdf
+    return f"{filename}_pack.zip", pack_zip(pdfs, params.get("title") or filename)
+
+
+@renderer("prewarm")
+def render_prewarm(job):
+    """Params: song_id, site_name, content_version. Fills the rendered-PDF cache; no download."""
+    from songbook.models import Song
+    from songbook.utils.pdf_cache import prewarm_song
+
+    song = Song.objects.filter(pk=job.params.get("song_id")).first()
+    if song is not None:
+        prewarm_song(song, job.params.get("site_name", "FrancoUke"))
+    return None
+
+
+def rate_limits():
+    """{kind: jobs started per minute at most}; kinds not listed are not limited."""
+    return {"prewarm": settings.PDF_PREWARM_PER_MINUTE}
+
+
+# =======================
+# QUEUE
+# =======================
+def job_key(kind, params, user=None):
+    payload = json.dumps([kind, params, user.pk if user else None], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def enqueue_render(kind, params, user=None, delay=None, priority=0):
+    """
+    The queued or running job for this request, created if there is none.
+    `delay` (a timedelta) keeps a new job from being claimed before then.
+    """
+    from songbook.models import RenderJob
+
+    if kind not in RENDERERS:
+        raise ValueError(f"Unknown render job kind: {kind}")
+    user = user if user is not None and user.is_authenticated else None
+    key = job_key(kind, params, user)
+    active = [RenderJob.QUEUED, RenderJob.RUNNING]
+
+    job = RenderJob.objects.filter(key=key, status__in=active).first()
+    if job:
+        return job
+    try:
+        with transaction.atomic():
+            return RenderJob.objects.create(
+                kind=kind, params=params, key=key, user=user, priority=priority,
+                not_before=timezone.now() + delay if delay else None,
+            )
+    except IntegrityError:
+        # An identical request created it first (render_job_active_key)
+        return RenderJob.objects.filter(key=key).latest("created_at")
+
+
+def lease():
+    return timedelta(seconds=settings.PDF_RENDER_JOB_LEASE_SECONDS)
+
+
+def claim_job():
+    """
+    Mark the next due job running (by priority, then age) and return it;
+    None if nothing is due or all PDF_RENDER_CONCURRENCY slots are taken.
+
+    A running job holds a slot number below PDF_RENDER_CONCURRENCY, and the
+    render_job_running_slot constraint lets only one running job hold each
+    number. The claiming UPDATE takes a free slot in the same statement, so
+    workers racing for the last slot cannot both win: the loser's UPDATE
+    fails and it tries the next free slot.
+    """
+    from songbook.models import RenderJob
+
+    while True:
+        now = timezone.now()
+        taken = set(RenderJob.objects.filter(status=RenderJob.RUNNING).values_list("slot", flat=True))
+        free = [slot for slot in range(settings.PDF_RENDER_CONCURRENCY) if slot not in taken]
+        if not free:
+            return None
+        limited = [
+            kind for kind, per_minute in rate_limits().items()
+            if RenderJob.objects.filter(kind=kind, started_at__gte=now - timedelta(minutes=1)).count() >= per_minute
+        ]
+        job = (
+            RenderJob.objects.filter(status=RenderJob.QUEUED)
+            .filter(Q(not_before__isnull=True) | Q(not_before__lte=now))
+            .exclude(kind__in=limited)
+            .order_by("priority", "created_at")
+            .first()
+        )
+        if job is None:
+            return None
+
+        claimed = None
+        for slot in free:
+            try:
+                with transaction.atomic():
+                    claimed = RenderJob.objects.filter(pk=job.pk, status=RenderJob.QUEUED).update(
+                        status=RenderJob.RUNNING, slot=slot, started_at=now, lease_until=now + lease()
+                    )
+            except IntegrityError:
+                continue  # Another worker took this slot meanwhile
+            break
+        if claimed is None:
+            return None  # Every free slot was taken meanwhile
+        if claimed:
+            job.status, job.slot, job.started_at, job.lease_until = RenderJob.RUNNING, slot, now, now + lease()
+            return job
+        # Another worker took the job: try the next one
+
+
+def _claimed(job):
+    """The job's row while it is still this claim's (requeue and re-claim change started_at)."""
+    from songbook.models import RenderJob
+
+    return RenderJob.objects.filter(pk=job.pk, status=RenderJob.RUNNING, started_at=job.started_at)
+
+
+class _Heartbeat(threading.Thread):
+    """Renews a running job's lease until stopped."""
+
+    def __init__(self, job):
+        super().__init__(daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(lease().total_seconds() / 3):
+                _claimed(self.job).update(lease_until=timezone.now() + lease())
+        finally:
+            connection.close()
+
+
+def run_job(job):
+    """
+    Render a claimed job and store its result (or its error). The lease is
+    renewed while the renderer runs. If the job was requeued meanwhile (this
+    worker stalled past its lease), the result is dropped: the job now
+    belongs to another claim.
+    """
+    from songbook.models import RenderJob
+
+    heartbeat = _Heartbeat(job)
+    heartbeat.start()
+    try:
+        result = RENDERERS[job.kind](job)
+    except Exception as exc:
+        logger.exception("Render job %s (%s) failed", job.token, job.kind)
+        job.status = RenderJob.FAILED
+        job.error = str(exc) or exc.__class__.__name__
+        job.finished_at = timezone.now()
+        if not _claimed(job).update(
+            status=job.status, error=job.error, finished_at=job.finished_at, slot=None, lease_until=None
+        ):
+            logger.warning("Render job %s was requeued while it ran; its error is dropped", job.token)
+        return
+    finally:
+        heartbeat.stopped.set()
+        heartbeat.join()
+
+    if result is not None:
+        filename, content = result
+        job.result.save(filename, ContentFile(content), save=False)
+    job.status = RenderJob.DONE
+    job.finished_at = timezone.now()
+    if not _claimed(job).update(
+        status=job.status, result=job.result.name, finished_at=job.finished_at, slot=None, lease_until=None
+    ):
+        logger.warning("Render job %s was requeued while it ran; its result is dropped", job.token)
+        if job.result:
+            job.result.delete(save=False)
+
+
+def requeue_stale_jobs():
+    """Put back running jobs whose lease ran out (their worker died or hung). Returns how many."""
+    from songbook.models import RenderJob
+
+    return RenderJob.objects.filter(status=RenderJob.RUNNING, lease_until__lt=timezone.now()).update(
+        status=RenderJob.QUEUED, started_at=None, slot=None, lease_until=None
+    )
+
+
+def prune_jobs():
+    """Delete finished jobs older than PDF_RENDER_JOB_TTL_HOURS, with their files."""
+    from songbook.models import RenderJob
+
+    cutoff = timezone.now() - timedelta(hours=settings.PDF_RENDER_JOB_TTL_HOURS)
+    expired = RenderJob.objects.filter(status__in=[RenderJob.DONE, RenderJob.FAILED], finished_at__lt=cutoff)
+    for job in expired:
+        if job.result:
+            job.result.delete(save=False)
+    return expired.delete()[0]
@@ -0,0 +1,215 @@
+# songbook/utils/search.py
+"""
+Accent-insensitive song search.
+
+Every Song has a SongSearchDocument row holding an accent-folded, lower-cased
+copy of its title, artist, songwriter, tags and lyric text. On SQLite the
+document table is mirrored into an FTS5 index (created by migration 0014 and
+kept in sync by triggers) so searches are ranked prefix matches served from
+the index. On any other database, or if FTS5 is missing, we fall back to
+plain LIKE lookups on the folded columns.
+"""
+import logging
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from unidecode import unidecode
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "songbook_song_fts"
+
+# bm25() weights, in the column order of the FTS table
+FTS_WEIGHTS = (10.0, 6.0, 4.0, 2.0, 1.0)
+
+MARKUP_TAG_RE = re.compile(r"<[^>]+>")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_fts_ready = None
+
+
+# -------------------------------------------------------------
+# Text folding
+# -------------------------------------------------------------
+def fold_text(text):
+    """Lower-case and strip accents: 'Été' -> 'ete', 'Chançon' -> 'chancon'."""
+    if not text:
+        return ""
+    return unidecode(str(text)).lower().strip()
+
+
+def query_tokens(query):
+    """Split a user query into folded alphanumeric tokens."""
+    return TOKEN_RE.findall(fold_text(query))
+
+
+def extract_lyric_text(lyrics_with_chords):
+    """Plain lyric text (no chords, directives or color markup) from parsed song data."""
+    words = []
+    for group in lyrics_with_chords or []:
+        if not isinstance(group, list):
+            continue
+        for item in group:
+            if isinstance(item, dict) and item.get("lyric"):
+                words.append(item["lyric"])
+            elif isinstance(item, dict) and item.get("format") == "LINEBREAK":
+                words.append("\n")
+        words.append("\n")
+    return MARKUP_TAG_RE.sub("", "".join(words))
+
+
+def build_search_fields(title, metadata, lyrics_with_chords, tag_names):
+    """Folded column values for one SongSearchDocument."""
+    metadata = metadata or {}
+    return {
+        "title": fold_text(title),
+        "artist": fold_text(metadata.get("artist")),
+        "songwriter": fold_text(metadata.get("songwriter")),
+        "tags": fold_text(" ".join(sorted(tag_names))),
+        "lyrics": fold_text(extract_lyric_text(lyrics_with_chords)),
+    }
+
+
+# -------------------------------------------------------------
+# Index maintenance
+# -------------------------------------------------------------
+def index_songs(songs):
+    """Create or refresh the search documents of the given Song instances."""
+    from taggit.models import TaggedItem
+    from django.contrib.contenttypes.models import ContentType
+    from songbook.models import Song, SongSearchDocument
+
+    songs = [song for song in songs if song.pk]
+    if not songs:
+        return 0
+
+    tag_names = {song.pk: [] for song in songs}
+    tagged = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Song),
+        object_id__in=list(tag_names),
+    ).values_list("object_id", "tag__name")
+    for object_id, name in tagged:
+        tag_names[object_id].append(name)
+
+    documents = [
+        SongSearchDocument(
+            song_id=song.pk,
+            **build_search_fields(
+                song.songTitle, song.metadata, song.lyrics_with_chords, tag_names[song.pk]
+            ),
+        )
+        for song in songs
+    ]
+
+    upsert = {"update_conflicts": True, "update_fields": ["title", "artist", "songwriter", "tags", "lyrics"]}
+    if connection.features.supports_update_conflicts_with_target:
+        upsert["unique_fields"] = ["song"]
+    SongSearchDocument.objects.bulk_create(documents, batch_size=500, **upsert)
+    return len(documents)
+
+
+def fts_available():
+    """True when the SQLite FTS5 mirror table exists (checked once per process)."""
+    global _fts_ready
+    if _fts_ready is None:
+        _fts_ready = (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_ready
+
+
+def rebuild_fts():
+    """Rebuild the FTS5 mirror from the document table (no-op without FTS5)."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+
+
+# -------------------------------------------------------------
+# Querying
+# -------------------------------------------------------------
+def _fts_match_expression(tokens):
+    # Every token must match; the last one as a prefix so typeahead works mid-word
+    parts = [f'"{token}"' for token in tokens[:-1]]
+    parts.append(f'"{tokens[-1]}"*')
+    return " AND ".join(parts)
+
+
+def _search_fts(tokens, limit, songs):
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+    params = [_fts_match_expression(tokens)]
+    if songs is not None:
+        songs_sql, songs_params = songs.order_by().values("pk").query.sql_with_params()
+        sql += f" AND rowid IN ({songs_sql})"
+        params.extend(songs_params)
+    sql += f" ORDER BY bm25({FTS_TABLE}, {weights})"
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_fallback(tokens, limit, songs):
+    from songbook.models import SongSearchDocument
+
+    qs = SongSearchDocument.objects.all()
+    if songs is not None:
+        qs = qs.filter(song__in=songs.order_by().values("pk"))
+    for token in tokens:
+        qs = qs.filter(
+            Q(title__contains=token)
+            | Q(artist__contains=token)
+            | Q(songwriter__contains=token)
+            | Q(tags__contains=token)
+            | Q(lyrics__contains=token)
+        )
+
+    first = tokens[0]
+    qs = qs.annotate(
+        rank=Case(
+            When(title__startswith=first, then=Value(0)),
+            When(title__contains=first, then=Value(1)),
+            When(artist__contains=first, then=Value(2)),
+            When(songwriter__contains=first, then=Value(3)),
+            default=Value(4),
+            output_field=IntegerField(),
+        )
+    ).order_by("rank", "title")
+
+    ids = qs.values_list("song_id", flat=True)
+    return list(ids[:limit] if limit else ids)
+
+
+def search_song_ids(query, limit=None, songs=None):
+    """
+    Return the ids of songs matching `query`, best match first.
+    Matching is accent/case-insensitive and the last word matches as a prefix.
+    `songs` (a Song queryset: site, privacy, other filters) restricts the
+    matches in the same query, so `limit` counts only songs the caller shows.
+    Leave `limit` unset for paginated lists; it is meant for short,
+    typeahead-style result lists.
+    """
+    tokens = query_tokens(query)
+    if not tokens:
+        return []
+
+    if fts_available():
+        return _search_fts(tokens, limit, songs)
+    return _search_fallback(tokens, limit, songs)
+
+
+def order_by_ids(queryset, ids):
+    """Order a Song queryset to follow the ranking in `ids`."""
+    if not ids:
+        return queryset
+    ranking = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.annotate(search_rank=ranking).order_by("search_rank")
@@ -0,0 +1,199 @@
+# songbook/utils/sync.py
+"""
+Offline sync for tablets: a snapshot of the songs a user can see, then deltas.
+
+Every change to a song (save, import, reparse, tag edit, admin bulk action,
+delete) goes through log_song_changes(), which replaces the song's
+SongChangeLog row. Row ids only grow, so "everything after id N" is exactly
+the set of songs that changed since a device last synced, whatever happened
+to them in between.
+
+Sync tokens are opaque strings:
+
+    "<N>"          deltas: songs whose latest change has an id > N
+    "<N>.<pk>"     snapshot in progress: songs with pk > <pk>; N is the
+                   change id the snapshot started at, so edits made while
+                   the pages are downloaded come back in the first delta
+
+A device with no token gets a snapshot; it then keeps calling with the
+returned token while has_more is true, and again whenever it's online.
+Changed songs it can no longer see (deleted, made private, moved to another
+site) are listed in "removed".
+
+Why nothing falls between a snapshot and the deltas: any change made after
+the snapshot started, including a song deleted and re-created under the
+same pk while the pages are fetched, gets a log id above N and comes back
+in the deltas, whichever pages it was or wasn't in. Log rows are replaced,
+never pruned, so a delta token never outlives the rows it points past.
+This relies on log ids being committed in order, which SQLite's single
+writer guarantees; a database with concurrent writers would need the
+deltas to hold back the newest ids until older transactions finish.
+
+A token naming a change id the log doesn't have yet (the database was
+restored from a backup, or the token is made up) is rejected like a
+malformed one: the device drops it and starts over with a snapshot.
+"""
+import json
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import Max, Q
+
+from songbook.utils.chord_library import CHORDS_DIR
+from songbook.utils.chordpro_lint import library_key
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+# -------------------------------------------------------------
+# Change log
+# -------------------------------------------------------------
+def log_song_changes(song_ids):
+    """Record that these songs changed (one row per song, with a fresh id)."""
+    from songbook.models import SongChangeLog
+
+    song_ids = sorted({song_id for song_id in song_ids if song_id is not None})
+    if not song_ids:
+        return
+    with transaction.atomic():
+        SongChangeLog.objects.filter(song_id__in=song_ids).delete()
+        SongChangeLog.objects.bulk_create([SongChangeLog(song_id=song_id) for song_id in song_ids])
+
+
+def current_change_id():
+    from songbook.models import SongChangeLog
+
+    return SongChangeLog.objects.aggregate(last=Max("id"))["last"] or 0
+
+
+# -------------------------------------------------------------
+# Tokens
+# -------------------------------------------------------------
+def parse_sync_token(token):
+    """(change_id, snapshot_after_pk or None); (None, None) when there is no token yet."""
+    if not token:
+        return None, None
+    change_id, _, after = token.partition(".")
+    try:
+        return int(change_id), (int(after) if after else None)
+    except ValueError:
+        raise InvalidSyncToken(f"Invalid sync token: {token!r}")
+
+
+# -------------------------------------------------------------
+# Payload
+# -------------------------------------------------------------
+def visible_songs(user, site_name):
+    from songbook.models import Song
+
+    songs = Song.objects.filter(site_name=site_name)
+    if user and user.is_authenticated:
+        return songs.filter(Q(is_public=True) | Q(contributor=user))
+    return songs.filter(is_public=True)
+
+
+@lru_cache(maxsize=None)
+def _chord_diagrams(instrument, mtime_ns):
+    with open(CHORDS_DIR / f"{instrument}.json", "r", encoding="utf-8") as f:
+        chords = json.load(f)
+    diagrams = {}
+    for chord in chords:
+        diagrams.setdefault(library_key(chord.get("name", "")), chord)
+    return diagrams
+
+
+def chord_diagrams(instrument):
+    """{library_key: chord entry} for an instrument, reloaded when the JSON file changes."""
+    return _chord_diagrams(instrument, (CHORDS_DIR / f"{instrument}.json").stat().st_mtime_ns)
+
+
+def song_payload(song):
+    return {
+        "id": song.pk,
+        "title": song.songTitle,
+        "artist": song.artist,
+        "public": song.is_public,
+        "version": song.content_version,
+        "updated_at": song.updated_at.isoformat() if song.updated_at else None,
+        "key": song.key,
+        "tempo": song.tempo,
+        "capo": song.capo,
+        "time_signature": song.time_signature,
+        "year": song.year,
+        "scroll_speed": song.scroll_speed,
+        "metadata": song.metadata or {},
+        "tags": sorted(tag.name for tag in song.tags.all()),
+        "lyrics": song.lyrics_with_chords or [],
+        "chords": [chord for chord in song.chords_used.split(",") if chord],
+    }
+
+
+def _page_payload(songs, instrument):
+    """Song payloads plus the diagrams of the chords they use, keyed as written in the songs."""
+    diagrams = chord_diagrams(instrument)
+    payloads, chords = [], {}
+    for song in songs:
+        payload = song_payload(song)
+        for chord in payload["chords"]:
+            if chord not in chords:
+                diagram = diagrams.get(library_key(chord))
+                if diagram is not None:
+                    chords[chord] = diagram
+        payloads.append(payload)
+    return payloads, chords
+
+
+# -------------------------------------------------------------
+# Sync pages
+# -------------------------------------------------------------
+def sync_page(user, site_name, instrument, token=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of a snapshot or of the deltas after `token`.
+    Raises InvalidSyncToken for tokens this server didn't issue.
+    """
+    from songbook.models import SongChangeLog
+
+    change_id, after = parse_sync_token(token)
+    if change_id is not None and change_id > current_change_id():
+        raise InvalidSyncToken(f"Sync token {token!r} is ahead of this server: start over with a snapshot")
+    songs = visible_songs(user, site_name).prefetch_related("tags")
+
+    if change_id is None or after is not None:
+        # Snapshot, one pk range at a time
+        if change_id is None:
+            change_id, after = current_change_id(), 0
+        page = list(songs.filter(pk__gt=after).order_by("pk")[:page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        removed = []
+        next_token = f"{change_id}.{page[-1].pk}" if has_more else str(change_id)
+        snapshot = True
+    else:
+        changes = list(
+            SongChangeLog.objects.filter(id__gt=change_id).order_by("id")
+            .values_list("id", "song_id")[:page_size + 1]
+        )
+        has_more = len(changes) > page_size
+        changes = changes[:page_size]
+        changed_ids = [song_id for _, song_id in changes]
+        page = list(songs.filter(pk__in=changed_ids).order_by("pk"))
+        visible = {song.pk for song in page}
+        removed = [song_id for song_id in changed_ids if song_id not in visible]
+        next_token = str(changes[-1][0] if changes else change_id)
+        snapshot = False
+
+    payloads, chords = _page_payload(page, instrument)
+    return {
+        "snapshot": snapshot,
+        "token": next_token,
+        "has_more": has_more,
+        "instrument": instrument,
+        "songs": payloads,
+        "removed": removed,
+        "chords": chords,
+    }
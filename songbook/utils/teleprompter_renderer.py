@@ -1,111 +1,40 @@
-def render_lyrics_with_chords_html(lyrics_with_chords, site_name="StrumSphere"):
+from songbook.utils.metrics import span
+from songbook.utils.render_ir import is_labelled
+
+
+@span("html_render")
+def render_lyrics_with_chords_html(render_ir):
     """
-    Render parsed lyrics_with_chords (list of groups) into HTML,
-    while extracting metadata directives (title, artist, year, etc.).
+    Render a song's localized render IR (utils/render_ir.song_render_ir) into
+    HTML, returning it with the metadata found in the lyrics' directives
+    (title, artist, year, etc.).
     Preserves color markup tags like <r>, <g>, <y>, <b>, <i>, <u>, etc.
     """
-
-    directive_map = {
-        "FrancoUke": {
-            "{soi}": "Intro", "{soc}": "Refrain", "{sov}": "Couplet",
-            "{sob}": "Pont", "{soo}": "Outro", "{sod}": "Interlude",
-            "{sos}": "",
-            "{eoi}": None, "{eoc}": None, "{eov}": None,
-            "{eob}": None, "{eoo}": None, "{eod}": None,
-            "{eos}": None  # 🆕 Add this
-        },
-        "StrumSphere": {
-            "{soi}": "Intro", "{soc}": "Chorus", "{sov}": "Verse",
-            "{sob}": "Bridge", "{soo}": "Outro", "{sod}": "Interlude",
-            "{sos}": "",
-            "{eoi}": None, "{eoc}": None, "{eov}": None,
-            "{eob}": None, "{eoo}": None, "{eod}": None,
-            "{eos}": None  # 🆕 Add this
-        }
-    }
-    selected_map = directive_map.get(site_name, directive_map["StrumSphere"])
-
-    metadata = {
-        "title": None,
-        "artist": None,
-        "album": None,
-        "year": None,
-        "songwriter": None,
-        "recording": None,
-    }
-
     html = []
-    current_buffer = []
-    section_type = None
-
-    def flush_buffer():
-        nonlocal current_buffer, section_type
-        if current_buffer:
-            text = "".join(current_buffer)
-            # 🆕 Check for empty section_type (centered sections with no label)
-            if section_type == "":
-                html.append(f'<div class="centered">{text}</div>')
-            elif section_type and section_type.lower() != "verse":
-                html.append(
-                    f'<div class="section">'
-                    f'<div class="section-name">{section_type}</div>'
-                    f'<div class="section-body">{text}</div>'
-                    f'</div>'
-                )
-            else:
-                html.append(f'<div class="verse">{text}</div>')
-            current_buffer = []
-
-    for group in lyrics_with_chords:
-        for item in group:
-            if "directive" in item:
-                directive = item["directive"]
-                key_val = directive.strip("{}").split(":", 1)
-                key = key_val[0].strip().lower()
-                val = key_val[1].strip() if len(key_val) > 1 else ""
-
-                # Metadata
-                if key in ["t", "title"]:
-                    metadata["title"] = val
-                elif key == "artist":
-                    metadata["artist"] = val
-                elif key == "album":
-                    metadata["album"] = val
-                elif key == "year":
-                    metadata["year"] = val
-                elif key == "songwriter":
-                    metadata["songwriter"] = val
-                elif key == "recording":
-                    metadata["recording"] = val
-
-                # Section markers
-                elif directive in selected_map:
-                    flush_buffer()
-                    section_type = selected_map[directive]
-
-            elif "lyric" in item:
-                chord = item.get("chord", "")
-                lyric = item["lyric"]  # This contains color markup tags
-                
-                # 🎨 Preserve color markup tags - don't escape them
-                if chord:
-                    current_buffer.append(f"<b>[{chord}]</b>{lyric}")
-                else:
-                    current_buffer.append(lyric)
-
-            elif "format" in item:
-                if item["format"] == "LINEBREAK":
-                    current_buffer.append("<br/>")
-                elif item["format"] == "PARAGRAPHBREAK":
-                    flush_buffer()
-                    html.append('<div class="para-break"></div>')
 
-    flush_buffer()
-    
-    # 🐛 DEBUG: Print a sample to verify tags are present
-    result = "".join(html)
-    print("🎨 RENDERER OUTPUT (first 300 chars):")
-    print(result[:300])
-    print("=" * 80)
-    
-    return result, metadata
\ No newline at end of file
+    for block in render_ir["blocks"]:
+        if block["kind"] == "paragraph_break":
+            html.append('<div class="para-break"></div>')
+            continue
+        if block["kind"] != "section":
+            continue
+
+        # 🎨 Preserve color markup tags - don't escape them
+        text = "".join(
+            "".join(f"<b>[{chord}]</b>{lyric}" if chord else lyric for chord, lyric in line["spans"])
+            + ("<br/>" if line["br"] else "")
+            for line in block["lines"]
+        )
+        if block["type"] == "centered":
+            html.append(f'<div class="centered">{text}</div>')
+        elif is_labelled(block):
+            html.append(
+                f'<div class="section">'
+                f'<div class="section-name">{block["label"]}</div>'
+                f'<div class="section-body">{text}</div>'
+                f'</div>'
+            )
+        else:
+            html.append(f'<div class="verse">{text}</div>')
+
+    return "".join(html), dict(render_ir["meta"])
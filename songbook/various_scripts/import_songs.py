@@ -21,31 +21,19 @@
 
 
 exec("""
-import os
-from django.contrib.auth.models import User
-from songbook.models import Song
+import sys
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import OutputWrapper
+from django.core.management.color import color_style
+from songbook.utils.chordpro_import import ChordProImporter, collect_files, write_report
 # Define the directory containing your ChordPro files
 chordpro_dir = 'mychordpro'
-# Fetch or create the User instance for "Gaulind"
-contributor_user, created = User.objects.get_or_create(username="Gaulind")
-# Counter to track imported files
-imported_count = 0
-# Loop through all .pro files in the directory
-for filename in os.listdir(chordpro_dir):
-    if filename.endswith('.pro'):
-        # Construct the full path to the file
-        file_path = os.path.join(chordpro_dir, filename)
-        # Open and read the file content
-        with open(file_path, 'r') as file:
-            chordpro_text = file.read()
-            # Assign a default title based on the filename if no title is extracted
-            title = filename.rsplit('.', 1)[0]
-            # Create a new Song instance with the file content and the User instance as contributor
-            song = Song(songTitle=title, songChordPro=chordpro_text, contributor=contributor_user)
-            song.save()
-            # Increment the counter
-            imported_count += 1
-            print(f"Imported: {filename}")
-# Print the total count of imported songs
-print(f"Total songs imported: {imported_count}")
+# User credited for the songs: the SONG_IMPORT_CONTRIBUTOR setting (an existing username)
+contributor_user = get_user_model().objects.get(username=settings.SONG_IMPORT_CONTRIBUTOR)
+# Parse all .pro files in parallel, title defaults to the file name
+importer = ChordProImporter("filename_title", contributor=contributor_user, update_existing=False)
+report = importer.run(collect_files(chordpro_dir, ['.pro']))
+# Songs imported, errors and totals, as the import commands print them
+write_report(report, OutputWrapper(sys.stdout), OutputWrapper(sys.stderr), color_style())
 """)
\ No newline at end of file
@@ -5,3 +5,5 @@ from .artist_views import *
 from .song_display_views import *
 from .song_crud_views import *
 from .misc_views import *
+from .export_views import *
+from .sync_views import *
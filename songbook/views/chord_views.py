@@ -1,14 +1,23 @@
 # songbook/views/chord_views.py
 import os
 import json
+import logging
 import re
 from django.conf import settings
 from django.http import Http404, JsonResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_GET
 
+from django.db.models import Q
+from django.urls import reverse
+
+from songbook.context_processors import site_context
+from songbook.models import Song
 from songbook.utils.chords.loader import load_chords
-from songbook.utils.chord_diagram_svg import render_chord_svg
+from songbook.utils.chord_index import chord_matches, chord_song_ids, normalize_chord_token
+from songbook.utils.http_cache import chord_json_response
+
+logger = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------------------------
@@ -26,7 +35,7 @@ CHORD_TABS = {
 }
 
 ALLOWED_INSTRUMENTS = {
-    "ukulele", "guitar", "guitalele", "banjo", "mandolin", "baritoneUke",
+    "ukulele", "guitar", "guitalele", "banjo", "mandolin", "baritoneUke", "baritone_ukulele",
 }
 
 INSTRUMENTS = [
@@ -37,19 +46,17 @@ INSTRUMENTS = [
 # Chord JSON endpoints
 # ---------------------------------------------------------------------
 
+@require_GET
 def serve_chords_json(request, instrument):
+    """Pre-serialized, pre-compressed chord library (see utils/http_cache.py)."""
     if instrument not in ALLOWED_INSTRUMENTS:
         raise Http404("Instrument not supported")
 
-    file_path = os.path.join(
-        settings.BASE_DIR, "songbook", "chords", f"{instrument}.json"
-    )
-    if not os.path.exists(file_path):
+    try:
+        return chord_json_response(request, instrument)
+    except FileNotFoundError:
         raise Http404("Chord file not found")
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        return JsonResponse(json.load(f), safe=False)
-
 
 def get_chord_definition(request, chord_name):
     chords = load_chords()
@@ -60,12 +67,58 @@ def get_chord_definition(request, chord_name):
         {"success": False, "error": f"Chord '{chord_name}' not found."}
     )
 
+@require_GET
+def chord_usage_api(request):
+    """
+    Songs of the current site using a chord, with highlighted line snippets.
+    ?chord=Bbdim7  (&exact=1 to match the spelling as written)  &limit=50
+    """
+    chord = request.GET.get("chord", "").strip().strip("[]")
+    if not chord:
+        return JsonResponse({"success": False, "error": "Missing 'chord' parameter."}, status=400)
+    exact = request.GET.get("exact") in ["1", "true", "on"]
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 50)), 500))
+    except ValueError:
+        limit = 50
+
+    context = site_context(request)
+    songs = Song.objects.filter(site_name=context["site_name"])
+    if request.user.is_authenticated:
+        songs = songs.filter(Q(is_public=True) | Q(contributor=request.user))
+    else:
+        songs = songs.filter(is_public=True)
+
+    matches = chord_matches(chord, exact=exact, songs=songs, limit=limit)
+    namespace = context["site_namespace"] or "songbook"
+    return JsonResponse({
+        "success": True,
+        "chord": chord,
+        "normalized": chord if exact else normalize_chord_token(chord),
+        "count": chord_song_ids(chord, exact=exact, songs=songs).count(),
+        "songs": [
+            {
+                "id": match["song"].pk,
+                "title": match["song"].songTitle,
+                "url": reverse(f"{namespace}:chord_sheet", kwargs={"pk": match["song"].pk}),
+                "lines": [
+                    {key: str(value) if key == "html" else value for key, value in line.items()}
+                    for line in match["lines"]
+                ],
+            }
+            for match in matches
+        ],
+    })
+
+
 # ---------------------------------------------------------------------
 # Chord Dictionary Page
 # ---------------------------------------------------------------------
 
 @require_GET
 def chord_dictionary(request):
+    from songbook.utils.chord_diagram_svg import render_chord_svg  # ReportLab: loaded on first use
+
     instrument = request.GET.get("instrument", "ukulele")
     site_name = request.resolver_match.namespace
     lefty = request.GET.get("lefty") in ["1", "true", "on"]
@@ -75,17 +128,8 @@ def chord_dictionary(request):
     allowed_types = CHORD_TABS.get(tab, CHORD_TABS["triads"])
 
     chords = load_chords(instrument)
-
-    # DEBUG
-    print("=== DEBUG chord_dictionary ===")
-    print("Instrument:", instrument)
-    print("Loaded chords:", len(chords))
-    if chords:
-        print("First chord:", chords[0])
-    else:
-        print("NO chords loaded!")
-
-
+    if not chords:
+        logger.warning("chord_dictionary: no chords loaded for %s", instrument)
 
     grouped = {root: {} for root in ROOTS}
 
@@ -0,0 +1,68 @@
+# songbook/views/export_views.py
+
+import json
+from datetime import date
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+
+from songbook.utils.chordpro_export import (
+    ARCHIVE_FORMATS, CONTENT_TYPES, MANIFEST_VERSION, select_songs, stream_archive,
+)
+
+
+# ---------------------------------------------------------------------
+# Staff: ChordPro archive export, streamed as it is built
+# ---------------------------------------------------------------------
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def export_chordpro_archive(request):
+    """
+    ?format=zip|tar.zst|tar.gz  &site=FrancoUke  &tag=...(repeatable)  &changed_since=YYYY-MM-DD
+    POST a previous manifest.json as `manifest` to only receive songs changed since.
+    """
+    params = request.POST if request.method == "POST" else request.GET
+    archive_format = params.get("format", "zip")
+    if archive_format not in ARCHIVE_FORMATS:
+        return HttpResponseBadRequest("Unknown archive format")
+
+    try:
+        changed_since = date.fromisoformat(params["changed_since"]) if params.get("changed_since") else None
+    except ValueError:
+        return HttpResponseBadRequest("changed_since must be YYYY-MM-DD")
+
+    previous_manifest = None
+    if "manifest" in request.FILES:
+        try:
+            previous_manifest = json.load(request.FILES["manifest"])
+        except ValueError:
+            return HttpResponseBadRequest("Invalid manifest")
+        if previous_manifest.get("version") != MANIFEST_VERSION:
+            return HttpResponseBadRequest("Unsupported manifest version")
+
+    site_name = params.get("site") or None
+    tags = params.getlist("tag")
+    filters = {
+        "site": site_name,
+        "tags": tags,
+        "changed_since": changed_since.isoformat() if changed_since else None,
+    }
+    songs = select_songs(site_name, tags, changed_since)
+
+    try:
+        chunks = stream_archive(songs, archive_format, previous_manifest, filters)
+        first = next(chunks, b"")  # surfaces a missing zstandard before headers go out
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    def content():
+        yield first
+        yield from chunks
+
+    filename = f"songbook-export-{timezone.now():%Y%m%d-%H%M%S}{ARCHIVE_FORMATS[archive_format]}"
+    response = StreamingHttpResponse(content(), content_type=CONTENT_TYPES[archive_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
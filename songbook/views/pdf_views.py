@@ -1,16 +1,22 @@
 # songbook/views/pdf_views.py
 
 import json
+import math
 import os
+from datetime import timedelta
 
-from django.http import HttpResponse, JsonResponse
-from django.shortcuts import get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Count, Sum
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, render
 from django.contrib.auth.decorators import login_required
+from django.utils import timezone
 
-from songbook.models import Song
+from songbook.models import PdfCacheStat, RenderedPdf, RenderJob, Song
 from songbook.context_processors import site_context
-from songbook.utils.pdf_generator import generate_songs_pdf
-from songbook.utils.transposer import transpose_lyrics
+from songbook.utils.pdf_cache import cached_song_pdf
+from songbook.utils.render_queue import enqueue_render
+from songbook.views.render_job_views import render_job_accepted
 
 
 # -------------------------------------------------------------
@@ -28,6 +34,8 @@ def generate_pdf_response(
     """
     Wrap PDF output in an HttpResponse and send it inline or as attachment.
     """
+    from songbook.utils.pdf_generator import generate_songs_pdf  # ReportLab: loaded on first render
+
     content_type = "application/pdf"
     response = HttpResponse(content_type=content_type)
 
@@ -46,23 +54,37 @@ def generate_pdf_response(
     return response
 
 
+def song_pdf_response(filename, song, user=None, transpose_value=0, site_name=None, inline=False):
+    """One song's PDF from the rendered-PDF cache (utils/pdf_cache.py), rendered on a miss."""
+    pdf = cached_song_pdf(song, user, transpose_value, site_name or "FrancoUke")
+    response = HttpResponse(pdf, content_type="application/pdf")
+    disposition = "inline" if inline else "attachment"
+    response["Content-Disposition"] = f'{disposition}; filename="{filename}.pdf"'
+    return response
+
+
 # -------------------------------------------------------------
 # Multiple song PDF (tag filtered)
 # -------------------------------------------------------------
 def generate_multi_song_pdf(request):
     """
-    POST: expects {"tag_name": "..."} and returns a PDF of all songs with that tag.
+    POST: expects {"tag_name": "..."} and queues a PDF of all songs with that
+    tag; answers 202 with the job's status URL (views/render_job_views.py).
     """
     tag_name = request.POST.get("tag_name", "").strip()
     if not tag_name:
         return JsonResponse({"error": "Missing tag_name"}, status=400)
 
-    songs = Song.objects.filter(tags__name=tag_name)
-    return generate_pdf_response(
-        "multi_song_report",
-        songs,
+    # A whole tag songbook is rendered by run_render_jobs, not in the request
+    song_ids = list(Song.objects.filter(tags__name=tag_name).values_list("pk", flat=True))
+    if not song_ids:
+        return JsonResponse({"error": f"No songs tagged '{tag_name}'"}, status=404)
+    job = enqueue_render(
+        "songs",
+        {"song_ids": song_ids, "filename": "multi_song_report", "site_name": site_context(request).get("site_name")},
         user=request.user,
     )
+    return render_job_accepted(job)
 
 
 # -------------------------------------------------------------
@@ -73,12 +95,11 @@ def generate_single_song_pdf(request, song_id):
     song = get_object_or_404(Song, pk=song_id)
     site_name = site_context(request).get("site_name")
 
-    return generate_pdf_response(
+    return song_pdf_response(
         filename=song.songTitle,
-        songs=[song],
+        song=song,
         user=request.user,
         transpose_value=0,
-        formatting=None,
         site_name=site_name,
         inline=True,
     )
@@ -89,27 +110,52 @@ def generate_single_song_pdf(request, song_id):
 # -------------------------------------------------------------
 def preview_pdf(request, song_id):
     song = get_object_or_404(Song, pk=song_id)
-    transpose_value = int(request.GET.get("transpose", "0") or 0)
-
-    # safe shallow copy for preview
-    preview_song = song
-    if transpose_value != 0 and song.lyrics_with_chords:
-        # avoid mutating DB
-        preview_song = Song(
-            **{field.name: getattr(song, field.name) for field in song._meta.fields}
-        )
-        preview_song.lyrics_with_chords = transpose_lyrics(
-            song.lyrics_with_chords, transpose_value
-        )
-
+    try:
+        transpose_value = int(request.GET.get("transpose", "0") or 0)
+    except ValueError:
+        return HttpResponseBadRequest("transpose must be a whole number of semitones")
+    # Chord names repeat every octave: -11..11 covers every transposition
+    transpose_value = int(math.fmod(transpose_value, 12))
+
+    # generate_songs_pdf transposes the song's render IR (and the chord footer)
     site_name = site_context(request).get("site_name")
 
-    return generate_pdf_response(
+    return song_pdf_response(
         filename=f"{song.songTitle}_preview",
-        songs=[preview_song],
+        song=song,
         user=request.user if request.user.is_authenticated else None,
         transpose_value=transpose_value,
-        formatting=None,
         site_name=site_name,
         inline=True,
     )
+
+
+# -------------------------------------------------------------
+# Staff: rendered-PDF cache dashboard
+# -------------------------------------------------------------
+@staff_member_required
+def pdf_cache_dashboard(request):
+    try:
+        days = max(1, min(int(request.GET.get("days", 30)), 365))
+    except ValueError:
+        days = 30
+    since = timezone.localdate() - timedelta(days=days - 1)
+    stats = list(PdfCacheStat.objects.filter(day__gte=since))
+    for stat in stats:
+        served = stat.hits + stat.misses
+        stat.hit_ratio = stat.hits / served if served else None
+
+    hits = sum(stat.hits for stat in stats)
+    misses = sum(stat.misses for stat in stats)
+    entries = RenderedPdf.objects.aggregate(count=Count("pk"), size=Sum("size"), hits=Sum("hits"))
+    return render(request, "songbook/pdf_cache_dashboard.html", {
+        "days": days,
+        "stats": stats,
+        "hits": hits,
+        "misses": misses,
+        "prewarmed": sum(stat.prewarmed for stat in stats),
+        "hit_ratio": hits / (hits + misses) if hits + misses else None,
+        "entries": entries,
+        "prewarm_queued": RenderJob.objects.filter(kind="prewarm", status=RenderJob.QUEUED).count(),
+        "prewarm_failed": RenderJob.objects.filter(kind="prewarm", status=RenderJob.FAILED, created_at__date__gte=since).count(),
+    })
@@ -0,0 +1,58 @@
+# songbook/views/render_job_views.py
+
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+from songbook.models import RenderJob
+
+
+# ---------------------------------------------------------------------
+# Background PDF renders (see utils/render_queue.py)
+# ---------------------------------------------------------------------
+
+def _namespace(job):
+    return (job.params.get("site_name") or "FrancoUke").lower()
+
+
+def render_job_payload(job):
+    payload = {
+        "job": str(job.token),
+        "kind": job.kind,
+        "status": job.status,
+        "status_url": reverse(f"{_namespace(job)}:render_job_status", args=[job.token]),
+    }
+    if job.status == RenderJob.DONE:
+        payload["download_url"] = reverse(f"{_namespace(job)}:render_job_download", args=[job.token])
+    elif job.status == RenderJob.FAILED:
+        payload["error"] = job.error
+    return payload
+
+
+def render_job_accepted(job):
+    """202 answer of a view that queued `job`: poll status_url, then fetch download_url."""
+    payload = render_job_payload(job)
+    response = JsonResponse(payload, status=202)
+    response["Location"] = payload["status_url"]
+    return response
+
+
+def _get_job(request, token):
+    job = get_object_or_404(RenderJob, token=token)
+    if job.user_id and job.user_id != request.user.pk:
+        raise Http404
+    return job
+
+
+@require_GET
+def render_job_status(request, token):
+    return JsonResponse(render_job_payload(_get_job(request, token)))
+
+
+@require_GET
+def render_job_download(request, token):
+    job = _get_job(request, token)
+    if job.status != RenderJob.DONE or not job.result:
+        raise Http404
+    return FileResponse(job.result.open("rb"), as_attachment=True, filename=job.result.name.rsplit("/", 1)[-1])
@@ -11,6 +11,7 @@ from django.core.exceptions import PermissionDenied
 from songbook.models import Song
 from songbook.context_processors import site_context
 from songbook.parsers import parse_song_data
+from users.context import get_user_context
 
 class SongCreateView(LoginRequiredMixin, CreateView):
     model = Song
@@ -31,7 +32,7 @@ class SongCreateView(LoginRequiredMixin, CreateView):
         ]
         
         # 🆕 Only leaders can set privacy
-        if self.request.user.groups.filter(name='Leaders').exists():
+        if get_user_context(self.request).is_leader:
             base_fields.insert(2, "is_public")  # Add after songChordPro
         
         class DynamicSongForm(forms.ModelForm):
@@ -47,7 +48,7 @@ class SongCreateView(LoginRequiredMixin, CreateView):
         form.instance.site_name = context_data.get("site_name")
         
         # 🆕 Non-leaders: songs are private by default
-        if not self.request.user.groups.filter(name='Leaders').exists():
+        if not get_user_context(self.request).is_leader:
             form.instance.is_public = False
         
         return super().form_valid(form)
@@ -55,7 +56,7 @@ class SongCreateView(LoginRequiredMixin, CreateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update(site_context(self.request))
-        context['is_leader'] = self.request.user.groups.filter(name='Leaders').exists()
+        context['is_leader'] = get_user_context(self.request).is_leader
         return context
 
     def get_success_url(self):
@@ -83,7 +84,7 @@ class SongUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         ]
         
         # 🆕 Only leaders can edit privacy
-        if self.request.user.groups.filter(name='Leaders').exists():
+        if get_user_context(self.request).is_leader:
             base_fields.insert(2, "is_public")  # Add after songChordPro
         
         class DynamicSongForm(forms.ModelForm):
@@ -111,7 +112,7 @@ class SongUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         form.instance.contributor = self.request.user
         
         # 🆕 Non-leaders cannot change privacy via form manipulation
-        if not self.request.user.groups.filter(name='Leaders').exists():
+        if not get_user_context(self.request).is_leader:
             original = Song.objects.get(pk=self.object.pk)
             form.instance.is_public = original.is_public
         
@@ -120,7 +121,7 @@ class SongUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update(site_context(self.request))
-        context['is_leader'] = self.request.user.groups.filter(name='Leaders').exists()
+        context['is_leader'] = get_user_context(self.request).is_leader
         return context
 
     def get_success_url(self):
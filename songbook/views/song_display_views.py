@@ -3,6 +3,7 @@
 from django.shortcuts import get_object_or_404
 from django.views.generic import TemplateView, ListView, DetailView
 from django.db.models import Q
+from django.utils.decorators import method_decorator
 from django.contrib.auth import get_user_model
 from types import SimpleNamespace
 import re
@@ -12,8 +13,12 @@ from songbook.mixins import SiteContextMixin
 from songbook.context_processors import site_context
 from songbook.models import Song, SongFormatting
 from songbook.utils.transposer import extract_chords
+from songbook.utils.search import search_song_ids, order_by_ids
+from songbook.utils.artists import artist_sort_key
+from songbook.utils.http_cache import chord_json_url, conditional_song_view
+from songbook.utils.chord_sheet_html import chord_sheet_context
 from taggit.models import Tag
-from users.models import UserPreference
+from users.context import get_user_context
 
 User = get_user_model()
 
@@ -107,6 +112,7 @@ class UserSongListView(SiteContextMixin, ListView):
 # -------------------------------------------------------------
 # ChordSheet View (detailed view of a single song)
 # -------------------------------------------------------------
+@method_decorator(conditional_song_view("pk"), name="dispatch")
 class ChordSheetView(DetailView):
     """
     Display a single song.
@@ -138,7 +144,7 @@ class ChordSheetView(DetailView):
         
 
         if self.request.user.is_authenticated:
-            preferences, _ = UserPreference.objects.get_or_create(user=self.request.user)
+            preferences = get_user_context(self.request).preferences
         else:
             preferences = SimpleNamespace(
                 font_size=18,
@@ -153,6 +159,18 @@ class ChordSheetView(DetailView):
         #context["is_owner"] = (self.request.user == context["song"].contributor)
         context["is_owner"] = (self.request.user == self.object.contributor)
 
+        # HTML chord sheet; the PDF is only built for print/download
+        site = site_context(self.request)
+        user_prefs = get_user_context(self.request).preference_values
+        context.update(chord_sheet_context(self.object, self.request.user, site["site_name"], user_prefs))
+        instrument = context["sheet_footer"]["instrument"]
+        try:
+            library_url = chord_json_url(instrument, site["site_namespace"] or "francouke")
+        except FileNotFoundError:
+            library_url = chord_json_url("ukulele", site["site_namespace"] or "francouke")
+            context["sheet_footer"]["instrument"] = "ukulele"
+        context["sheet_footer"]["chordLibraryUrl"] = library_url
+
         return context
 
 
@@ -171,9 +189,6 @@ class SongListView(SiteContextMixin, ListView):
     paginate_by = 25
 
     def get_queryset(self):
-        chord_filter = self.request.GET.get("chords", "").strip()
-        print(f"DEBUG chord_filter: '{chord_filter}'")
-
         qs = super().get_queryset()
         site_name = self.get_site_name()
         qs = qs.filter(site_name=site_name)
@@ -194,18 +209,11 @@ class SongListView(SiteContextMixin, ListView):
         selected_tag = self.request.GET.get("tag", "").strip()
         artist_name = self.kwargs.get("artist_name")
 
-        if search_query:
-            qs = qs.filter(
-                Q(songTitle__icontains=search_query)
-                | Q(metadata__artist__icontains=search_query)
-                | Q(metadata__songwriter__icontains=search_query)
-            )
-
         if selected_tag:
             qs = qs.filter(tags__name=selected_tag)
 
         if artist_name:
-            qs = qs.filter(metadata__artist__iexact=artist_name)
+            qs = qs.filter(artist_key=artist_sort_key(artist_name))
 
         # 🆕 Filter by starting letter (A-Z) or number/symbol ("#")
         letter_filter = self.request.GET.get("letter", "").strip().upper()
@@ -265,9 +273,16 @@ class SongListView(SiteContextMixin, ListView):
 
             qs = qs.filter(pk__in=matching_pks)
 
+        # Accent-insensitive ranked search over title, artist, songwriter, tags and
+        # lyrics, among the songs the filters above let through; every match is
+        # kept so pagination reaches all of them
+        if search_query:
+            search_ids = search_song_ids(search_query, songs=qs)
+            qs = order_by_ids(qs.filter(pk__in=search_ids).distinct(), search_ids)
+        else:
+            qs = qs.distinct()
 
-
-        return qs.distinct()
+        return qs
     
     
 
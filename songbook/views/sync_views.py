@@ -0,0 +1,47 @@
+# songbook/views/sync_views.py
+
+from django.http import JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from songbook.context_processors import site_context
+from songbook.utils.chordpro_lint import available_instruments
+from songbook.utils.sync import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidSyncToken, sync_page
+from users.context import get_user_context
+
+
+# ---------------------------------------------------------------------
+# Offline sync for tablets (see utils/sync.py)
+# ---------------------------------------------------------------------
+
+@require_GET
+@gzip_page
+def sync_songs(request):
+    """
+    ?token=<sync token from the previous call; omit for a full snapshot>
+    &instrument=ukulele (default: the user's primary instrument)  &page_size=100
+    A 400 for the token means it is malformed or unknown here: drop it and
+    sync again without one.
+    """
+    instrument = request.GET.get("instrument") or get_user_context(request).preference_values["primary_instrument"]
+    if instrument not in available_instruments():
+        return JsonResponse({"success": False, "error": f"Unknown instrument '{instrument}'."}, status=400)
+    try:
+        page_size = max(1, min(int(request.GET.get("page_size", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+
+    try:
+        page = sync_page(
+            request.user,
+            site_context(request)["site_name"],
+            instrument,
+            token=request.GET.get("token"),
+            page_size=page_size,
+        )
+    except InvalidSyncToken as exc:
+        return JsonResponse({"success": False, "error": str(exc)}, status=400)
+
+    response = JsonResponse({"success": True, **page}, json_dumps_params={"separators": (",", ":")})
+    response["Cache-Control"] = "private, no-store"
+    return response
@@ -0,0 +1,131 @@
+# users/context.py
+"""
+Per-request user facts: preferences, group names and the known-chord set.
+
+get_user_context(request_or_user) returns one UserContext per user object,
+so every caller during a request (views, PDF builder, has_group filters)
+shares it. It loads lazily in at most two queries (UserPreference, group
+names). Nothing is kept between requests: group membership decides access
+(group_required, is_leader) and preferences decide cached PDFs, so both are
+read fresh from the database by every request and every render job.
+
+context_version() condenses the loaded values into a token for ETags
+(utils/http_cache.py); it changes whenever the preferences or groups do.
+
+UserContextMiddleware exposes it as request.user_context.
+"""
+import hashlib
+import json
+
+DEFAULT_PREFERENCES = {
+    "primary_instrument": "ukulele",
+    "is_lefty": False,
+    "show_alternate_chords": False,
+    "use_known_chord_filter": False,
+    "known_chords": [],
+    "chord_bracket_style": "square",
+    "chord_color": "black",
+}
+
+
+def context_version(user):
+    """Token that changes with the user's preferences/groups ("anon" when logged out)."""
+    if not (user and user.is_authenticated):
+        return "anon"
+    context = get_user_context(user)
+    payload = json.dumps([context.preference_values, sorted(context.group_names)], sort_keys=True)
+    return f"{user.pk}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]}"
+
+
+class UserContext:
+    def __init__(self, user):
+        self.user = user
+        self._data = None
+        self._known_chords = None
+
+    @property
+    def is_authenticated(self):
+        return bool(self.user and self.user.is_authenticated)
+
+    def _load(self):
+        if self._data is not None:
+            return self._data
+        if not self.is_authenticated:
+            self._data = {"preferences": None, "groups": frozenset()}
+            return self._data
+
+        from users.models import UserPreference
+
+        preferences, _ = UserPreference.objects.get_or_create(
+            user=self.user,
+            defaults={"primary_instrument": getattr(self.user, "primary_instrument", "ukulele")},
+        )
+        self._data = {
+            "preferences": preferences,
+            "groups": frozenset(self.user.groups.values_list("name", flat=True)),
+        }
+        return self._data
+
+    # ---------- Groups ----------
+    @property
+    def group_names(self):
+        return self._load()["groups"]
+
+    def in_group(self, group_name):
+        return group_name in self.group_names
+
+    @property
+    def is_leader(self):
+        return self.in_group("Leaders")
+
+    # ---------- Preferences ----------
+    @property
+    def preferences(self):
+        """The user's UserPreference, or None for anonymous users."""
+        return self._load()["preferences"]
+
+    @property
+    def preference_values(self):
+        """Preferences as the plain dict the PDF builder uses (defaults when anonymous)."""
+        prefs = self.preferences
+        if prefs is None:
+            return dict(DEFAULT_PREFERENCES)
+        return {
+            "primary_instrument": prefs.primary_instrument,
+            "is_lefty": prefs.is_lefty,
+            "show_alternate_chords": prefs.is_printing_alternate_chord,
+            "use_known_chord_filter": prefs.use_known_chord_filter,
+            "known_chords": prefs.known_chords or [],
+            "chord_bracket_style": prefs.chord_bracket_style,
+            "chord_color": prefs.chord_color,
+        }
+
+    @property
+    def known_chords(self):
+        """Known chords normalized like the chord library names (lowercase)."""
+        if self._known_chords is None:
+            from songbook.utils.formatting import clean_chord_name
+
+            chords = self.preferences.known_chords if self.preferences else []
+            self._known_chords = frozenset(clean_chord_name(ch).lower() for ch in chords or [])
+        return self._known_chords
+
+    def knows_chord(self, chord_name):
+        from songbook.utils.formatting import clean_chord_name
+
+        return clean_chord_name(chord_name).lower() in self.known_chords
+
+
+def get_user_context(request_or_user):
+    """The UserContext of a request or user, created once per user object."""
+    user = getattr(request_or_user, "user", request_or_user)
+    if user is None:
+        return UserContext(None)
+    context = getattr(user, "_user_context", None)
+    if context is None:
+        context = UserContext(user)
+        try:
+            user._user_context = context
+        except AttributeError:
+            pass
+    return context
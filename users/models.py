@@ -94,4 +94,4 @@ class UserPreference(models.Model):
 
     def __str__(self):
         sec = f", Secondary: {self.secondary_instrument}" if self.secondary_instrument else ""
-        return f"{self.user.username} - {self.primary_instrument}{sec}"
\ No newline at end of file
+        return f"{self.user.username} - {self.primary_instrument}{sec}"
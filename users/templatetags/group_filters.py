@@ -1,7 +1,9 @@
 from django import template
 
+from users.context import get_user_context
+
 register = template.Library()
 
 @register.filter(name='has_group')
 def has_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
+    return get_user_context(user).in_group(group_name)
@@ -1,5 +1,7 @@
 from django import template
 
+from users.context import get_user_context
+
 register = template.Library()
 
 @register.filter
@@ -8,4 +10,4 @@ def has_group(user, group_name):
     Check if a user belongs to a specific group.
     Usage: {% if user|has_group:"Leaders" %}
     """
-    return user.groups.filter(name=group_name).exists()
+    return get_user_context(user).in_group(group_name)
@@ -1,3 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from django.test import TestCase
 
-# Create your tests here.
+from users.context import context_version, get_user_context
+
+
+class UserContextTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("ctx", email="ctx@example.com", password="pw")
+        self.leaders = Group.objects.create(name="Leaders")
+
+    def fresh_user(self):
+        # A new request gets a new user object, hence a new UserContext
+        return get_user_model().objects.get(pk=self.user.pk)
+
+    def test_group_removal_applies_to_next_request(self):
+        self.user.groups.add(self.leaders)
+        self.assertTrue(get_user_context(self.fresh_user()).is_leader)
+
+        self.leaders.user_set.remove(self.user)
+        self.assertFalse(get_user_context(self.fresh_user()).is_leader)
+
+    def test_context_version_follows_preferences_and_groups(self):
+        before = context_version(self.fresh_user())
+
+        preference = self.user.userpreference
+        preference.primary_instrument = "guitar"
+        preference.save()
+        after_preferences = context_version(self.fresh_user())
+        self.assertNotEqual(before, after_preferences)
+        self.assertEqual(get_user_context(self.fresh_user()).preference_values["primary_instrument"], "guitar")
+
+        self.user.groups.add(self.leaders)
+        self.assertNotEqual(after_preferences, context_version(self.fresh_user()))
+        self.assertEqual(context_version(None), "anon")